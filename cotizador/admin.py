@@ -1,5 +1,10 @@
+import csv
+
+from django.conf import settings
 from django.contrib import admin
-from .models import TransporteApp, CotizacionTraslado, Ruta
+from django.http import StreamingHttpResponse
+from .models import TransporteApp, CotizacionTraslado, FranjaDinamica, HistorialTarifa, ResumenDiario, Ruta, Ubicacion
+from .paginacion import PaginadorConteoEstimado
 
 @admin.register(TransporteApp)
 class TransporteAppAdmin(admin.ModelAdmin):
@@ -9,11 +14,68 @@ class TransporteAppAdmin(admin.ModelAdmin):
 
 @admin.register(Ruta)
 class RutaAdmin(admin.ModelAdmin):
-    list_display = ('origen', 'destino', 'distancia_km', 'tiempo_min')
+    list_display = ('origen', 'destino', 'distancia_km', 'tiempo_min', 'estimada')
     search_fields = ('origen', 'destino')
-    list_filter = ('origen', 'destino')
+    list_filter = ('estimada', 'origen', 'destino')
     ordering = ('origen', 'destino')
 
+@admin.register(Ubicacion)
+class UbicacionAdmin(admin.ModelAdmin):
+    # El índice se mantiene desde las rutas: en el admin solo se editan la zona y las coordenadas
+    list_display = ('nombre', 'zona', 'latitud', 'longitud', 'num_rutas')
+    list_editable = ('zona', 'latitud', 'longitud')
+    list_filter = ('zona',)
+    search_fields = ('nombre', 'nombre_normalizado', 'zona')
+    fields = ('nombre', 'zona', 'latitud', 'longitud', 'num_rutas')
+    readonly_fields = ('nombre', 'num_rutas')
+    ordering = ('nombre',)
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(FranjaDinamica)
+class FranjaDinamicaAdmin(admin.ModelAdmin):
+    list_display = ('app', 'zona', 'dia_semana', 'hora_inicio', 'hora_fin', 'multiplicador')
+    list_filter = ('app', 'dia_semana', 'zona')
+    ordering = ('app', 'zona', 'dia_semana', 'hora_inicio')
+
+@admin.register(HistorialTarifa)
+class HistorialTarifaAdmin(admin.ModelAdmin):
+    # Se agrega al guardar una app con tarifas distintas: solo lectura
+    list_display = ('app', 'vigente_desde', 'precio_base', 'costo_por_km', 'costo_por_min', 'factor_dinamico')
+    list_filter = ('app',)
+    list_select_related = ('app',)
+    date_hierarchy = 'vigente_desde'
+    ordering = ('app', '-vigente_desde')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(ResumenDiario)
+class ResumenDiarioAdmin(admin.ModelAdmin):
+    # Los mantiene el comando agregar_cotizaciones: solo lectura
+    list_display = ('fecha', 'ruta', 'app', 'cantidad', 'precio_minimo', 'precio_maximo')
+    list_filter = ('app',)
+    list_select_related = ('ruta', 'app')
+    date_hierarchy = 'fecha'
+    ordering = ('-fecha',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+class _Eco:
+    """
+    Pseudo-archivo para csv.writer: devuelve la línea en vez de escribirla.
+    """
+    def write(self, valor):
+        return valor
+
 @admin.register(CotizacionTraslado)
 class CotizacionTrasladoAdmin(admin.ModelAdmin):
     list_display = (
@@ -29,11 +91,42 @@ class CotizacionTrasladoAdmin(admin.ModelAdmin):
     )
     list_display_links = ('id', 'usuario')
     ordering = ('-fecha_creacion',)
+    # Pensado para tablas con decenas de millones de filas:
+    # un JOIN en vez de una consulta por fila y sin COUNT(*) completo en cada página
+    list_select_related = ('usuario', 'ruta', 'app_seleccionada')
+    paginator = PaginadorConteoEstimado
+    show_full_result_count = False
+    date_hierarchy = 'fecha_creacion'
+    actions = ['exportar_csv']
 
     def get_origen(self, obj):
         return obj.ruta.origen if obj.ruta else None
     get_origen.short_description = 'Origen'
+    get_origen.admin_order_field = 'ruta__origen'
 
     def get_destino(self, obj):
         return obj.ruta.destino if obj.ruta else None
     get_destino.short_description = 'Destino'
+    get_destino.admin_order_field = 'ruta__destino'
+
+    @admin.action(description="Exportar las cotizaciones seleccionadas a CSV")
+    def exportar_csv(self, request, queryset):
+        # Se exporta como máximo COTIZADOR_EXPORTACION_MAXIMA filas, generadas a medida que se envían
+        columnas = (
+            'id', 'usuario__username', 'ruta__origen', 'ruta__destino', 'app_seleccionada__nombre',
+            'precio', 'tiempo_espera', 'factor_dinamico', 'fecha_creacion',
+        )
+        filas = (
+            queryset.order_by('-fecha_creacion', '-id')
+            .values_list(*columnas)[:settings.COTIZADOR_EXPORTACION_MAXIMA]
+        )
+        escritor = csv.writer(_Eco())
+
+        def generar():
+            yield escritor.writerow(columnas)
+            for fila in filas.iterator(chunk_size=2000):
+                yield escritor.writerow(fila)
+
+        response = StreamingHttpResponse(generar(), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="cotizaciones.csv"'
+        return response
@@ -0,0 +1,353 @@
+import logging
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .archivo import leer_archivos
+from .models import CotizacionTraslado, MarcaAgregacion, ResumenDiario, Ruta, TransporteApp
+
+logger = logging.getLogger(__name__)
+
+MARCA_RESUMEN = 'resumen_diario'
+CAMPOS_RESUMEN = ['cantidad', 'suma_precio', 'precio_minimo', 'precio_maximo', 'suma_factor']
+
+
+def _resumenes_existentes(claves, tamano_lote=500):
+    """
+    Resúmenes ya guardados para las claves (fecha, ruta_id, app_id), por clave.
+    Se consultan por fecha (un bloque de cotizaciones nuevas suele abarcar uno o dos días).
+    """
+    rutas_por_fecha = {}
+    for fecha, ruta_id, _ in claves:
+        rutas_por_fecha.setdefault(fecha, set()).add(ruta_id)
+    existentes = {}
+    for fecha, ruta_ids in rutas_por_fecha.items():
+        ruta_ids = sorted(ruta_ids)
+        for inicio in range(0, len(ruta_ids), tamano_lote):
+            for resumen in ResumenDiario.objects.filter(fecha=fecha, ruta_id__in=ruta_ids[inicio:inicio + tamano_lote]):
+                clave = (resumen.fecha, resumen.ruta_id, resumen.app_id)
+                if clave in claves:
+                    existentes[clave] = resumen
+    return existentes
+
+
+def _grupos(cotizaciones):
+    """
+    Totales por (fecha, ruta_id, app_id) de las cotizaciones del queryset.
+    """
+    grupos = (
+        cotizaciones
+        .filter(ruta__isnull=False, app_seleccionada__isnull=False)
+        .annotate(fecha=TruncDate('fecha_creacion'))
+        .values('fecha', 'ruta_id', 'app_seleccionada_id')
+        .annotate(
+            cantidad=Count('id'), suma_precio=Sum('precio'), precio_minimo=Min('precio'),
+            precio_maximo=Max('precio'), suma_factor=Sum('factor_dinamico'),
+        )
+        .order_by()
+    )
+    return {(g['fecha'], g['ruta_id'], g['app_seleccionada_id']): g for g in grupos}
+
+
+def _agregar_bloque(cotizaciones):
+    """
+    Suma a los resúmenes las cotizaciones del queryset. Devuelve cuántos grupos tocó.
+    """
+    return _sumar_grupos(_grupos(cotizaciones))
+
+
+def _sumar_grupos(nuevos):
+    """
+    Suma a los resúmenes los grupos {(fecha, ruta_id, app_id): totales}. Devuelve cuántos tocó.
+    """
+    if not nuevos:
+        return 0
+    existentes = _resumenes_existentes(nuevos.keys())
+    resumenes = []
+    for (fecha, ruta_id, app_id), grupo in nuevos.items():
+        resumen = existentes.get((fecha, ruta_id, app_id))
+        if resumen is None:
+            resumen = ResumenDiario(fecha=fecha, ruta_id=ruta_id, app_id=app_id, **{c: grupo[c] for c in CAMPOS_RESUMEN})
+        else:
+            resumen.cantidad += grupo['cantidad']
+            resumen.suma_precio += grupo['suma_precio']
+            resumen.suma_factor += grupo['suma_factor']
+            resumen.precio_minimo = min(resumen.precio_minimo, grupo['precio_minimo'])
+            resumen.precio_maximo = max(resumen.precio_maximo, grupo['precio_maximo'])
+        resumenes.append(resumen)
+    ResumenDiario.objects.bulk_create(
+        resumenes,
+        update_conflicts=True,
+        unique_fields=['fecha', 'ruta', 'app'],
+        update_fields=CAMPOS_RESUMEN,
+    )
+    return len(resumenes)
+
+
+def agregar_cotizaciones(tamano_lote=20000, reconstruir=False):
+    """
+    Incorpora a ResumenDiario las cotizaciones posteriores a la marca, en bloques por id, y
+    las de los huecos que quedaron detrás de ella (ids confirmados después de pasarlos).
+    Cada bloque y el avance de la marca se guardan en la misma transacción, así que una
+    corrida interrumpida se retoma sin contar dos veces. Con `reconstruir` se recalculan los
+    resúmenes de los días que siguen en la tabla (para reflejar ediciones y eliminaciones);
+    los de días ya archivados se conservan.
+    Devuelve (cotizaciones procesadas, grupos actualizados).
+    """
+    with transaction.atomic():
+        marca, _ = MarcaAgregacion.objects.get_or_create(nombre=MARCA_RESUMEN)
+        if reconstruir:
+            _reiniciar_resumenes()
+            marca.ultimo_id = 0
+            marca.huecos = []
+            marca.save(update_fields=['ultimo_id', 'huecos', 'actualizado'])
+
+    ventana = settings.COTIZADOR_AGREGACION_VENTANA
+    with transaction.atomic():
+        marca = MarcaAgregacion.objects.select_for_update().get(pk=marca.pk)
+        limite = marca.ultimo_id - ventana
+        huecos = [hueco for hueco in marca.huecos if hueco > limite]
+        llegadas = list(CotizacionTraslado.objects.filter(id__in=huecos).values_list('id', flat=True))
+        procesadas = len(llegadas)
+        grupos = _agregar_bloque(CotizacionTraslado.objects.filter(id__in=llegadas)) if llegadas else 0
+        if huecos != marca.huecos or llegadas:
+            marca.huecos = sorted(set(huecos) - set(llegadas))
+            marca.save(update_fields=['huecos', 'actualizado'])
+
+    # Solo hasta el último id presente al empezar: lo que llegue mientras, en la próxima corrida
+    tope = CotizacionTraslado.objects.aggregate(tope=Max('id'))['tope'] or 0
+    while marca.ultimo_id < tope:
+        hasta = CotizacionTraslado.objects.filter(id__gt=marca.ultimo_id, id__lte=tope).order_by('id').values_list(
+            'id', flat=True
+        )[tamano_lote - 1:tamano_lote].first() or tope
+        with transaction.atomic():
+            marca = MarcaAgregacion.objects.select_for_update().get(pk=marca.pk)
+            desde = marca.ultimo_id
+            if desde >= hasta:
+                # Otra corrida simultánea ya avanzó la marca
+                continue
+            # Los ids ausentes cerca de la marca pueden ser transacciones aún abiertas: no se cuentan
+            # ahora (aunque se confirmen antes de sumar) sino cuando aparezcan
+            presentes = set(
+                CotizacionTraslado.objects.filter(id__gt=desde, id__lte=hasta).values_list('id', flat=True)
+            )
+            nuevos_huecos = [
+                hueco for hueco in range(max(desde, hasta - ventana) + 1, hasta + 1) if hueco not in presentes
+            ]
+            grupos += _agregar_bloque(
+                CotizacionTraslado.objects.filter(id__gt=desde, id__lte=hasta).exclude(id__in=nuevos_huecos)
+            )
+            procesadas += len(presentes)
+            marca.ultimo_id = hasta
+            marca.huecos = [hueco for hueco in marca.huecos + nuevos_huecos if hueco > hasta - ventana]
+            marca.save(update_fields=['ultimo_id', 'huecos', 'actualizado'])
+    return procesadas, grupos
+
+
+def recotizar_en_resumenes(cotizacion, ruta_id, app_id, precio, factor_dinamico):
+    """
+    Refleja en los resúmenes una cotización reescrita en su lugar (recotizar_cotizacion) con
+    sus valores anteriores (ruta_id, app_id, precio, factor_dinamico): si ya estaba agregada,
+    la descuenta de su grupo anterior y la suma al nuevo; si no, la próxima corrida la toma
+    con los valores nuevos. Se llama en la transacción que la guarda.
+    """
+    marca = MarcaAgregacion.objects.select_for_update().filter(nombre=MARCA_RESUMEN).first()
+    if marca is None or cotizacion.pk > marca.ultimo_id or cotizacion.pk in marca.huecos:
+        return
+    fecha = timezone.localdate(cotizacion.fecha_creacion)
+    anterior = ResumenDiario.objects.select_for_update().filter(fecha=fecha, ruta_id=ruta_id, app_id=app_id).first()
+    if anterior is not None and anterior.cantidad <= 1:
+        anterior.delete()
+    elif anterior is not None:
+        anterior.cantidad -= 1
+        anterior.suma_precio -= precio
+        anterior.suma_factor -= factor_dinamico
+        if precio in (anterior.precio_minimo, anterior.precio_maximo):
+            # El mínimo o el máximo pudo ser esta cotización: se recalculan con las del grupo en la tabla
+            extremos = CotizacionTraslado.objects.filter(
+                fecha_creacion__date=fecha, ruta_id=ruta_id, app_seleccionada_id=app_id
+            ).aggregate(minimo=Min('precio'), maximo=Max('precio'))
+            anterior.precio_minimo = extremos['minimo'] if extremos['minimo'] is not None else anterior.precio_minimo
+            anterior.precio_maximo = extremos['maximo'] if extremos['maximo'] is not None else anterior.precio_maximo
+        anterior.save(update_fields=CAMPOS_RESUMEN)
+    if cotizacion.ruta_id is not None and cotizacion.app_seleccionada_id is not None:
+        _sumar_grupos({(fecha, cotizacion.ruta_id, cotizacion.app_seleccionada_id): {
+            'cantidad': 1, 'suma_precio': cotizacion.precio, 'precio_minimo': cotizacion.precio,
+            'precio_maximo': cotizacion.precio, 'suma_factor': cotizacion.factor_dinamico,
+        }})
+
+
+def filtro_sin_agregar():
+    """
+    Filtro de las cotizaciones que la marca todavía no incorporó a los resúmenes: las
+    posteriores a ella y las de sus huecos (todas, si la agregación nunca corrió).
+    """
+    marca = MarcaAgregacion.objects.filter(nombre=MARCA_RESUMEN).first()
+    if marca is None:
+        return Q(pk__isnull=False)
+    return Q(id__gt=marca.ultimo_id) | Q(id__in=marca.huecos)
+
+
+def verificar_resumenes_dia(dia, directorio=None, con_archivos=True):
+    """
+    Comprueba que los resúmenes de `dia` sumen exactamente sus cotizaciones ya agregadas:
+    las de la tabla y, con `con_archivos`, las que solo están en los archivos. Si no, los
+    rehace con ellas y devuelve True.
+    Una cotización confirmada tarde, cuando la marca ya la había dejado atrás de la ventana
+    de huecos, nunca se agrega; archivar_cotizaciones verifica cada día antes de borrar sus
+    filas, mientras todavía se puede corregir.
+    """
+    inicio = timezone.make_aware(datetime.combine(dia, time.min))
+    fin = timezone.make_aware(datetime.combine(dia + timedelta(days=1), time.min))
+    with transaction.atomic():
+        # Con la marca bloqueada no avanza ni cambia de huecos mientras se compara
+        MarcaAgregacion.objects.select_for_update().filter(nombre=MARCA_RESUMEN).first()
+        esperados = _grupos(
+            CotizacionTraslado.objects.filter(fecha_creacion__gte=inicio, fecha_creacion__lt=fin)
+            .exclude(filtro_sin_agregar())
+        )
+        if con_archivos:
+            for clave, grupo in _grupos_archivados(dia, directorio).items():
+                actual = esperados.get(clave)
+                if actual is None:
+                    esperados[clave] = grupo
+                    continue
+                actual['cantidad'] += grupo['cantidad']
+                actual['suma_precio'] += grupo['suma_precio']
+                actual['suma_factor'] += grupo['suma_factor']
+                actual['precio_minimo'] = min(actual['precio_minimo'], grupo['precio_minimo'])
+                actual['precio_maximo'] = max(actual['precio_maximo'], grupo['precio_maximo'])
+        guardados = {
+            (resumen.fecha, resumen.ruta_id, resumen.app_id): resumen
+            for resumen in ResumenDiario.objects.filter(fecha=dia)
+        }
+        if guardados.keys() == esperados.keys() and all(
+            getattr(guardados[clave], campo) == grupo[campo]
+            for clave, grupo in esperados.items() for campo in CAMPOS_RESUMEN
+        ):
+            return False
+        logger.warning("Resúmenes del %s sin cotizaciones agregadas; se rehacen", dia)
+        ResumenDiario.objects.filter(fecha=dia).delete()
+        _sumar_grupos(esperados)
+    return True
+
+
+def _reiniciar_resumenes():
+    """
+    Borra los resúmenes desde el día de la cotización más antigua de la tabla, que luego se
+    vuelven a sumar desde la marca 0; los días anteriores solo están en los archivos y se
+    conservan. Ese primer día puede estar archivado en parte: lo archivado se vuelve a sumar
+    desde los archivos.
+    """
+    primera = CotizacionTraslado.objects.aggregate(primera=Min('fecha_creacion'))['primera']
+    if primera is None:
+        # Todo está archivado (o no hay cotizaciones): no hay nada que recalcular
+        return
+    dia = timezone.localdate(primera)
+    ResumenDiario.objects.filter(fecha__gte=dia).delete()
+    _sumar_grupos(_grupos_archivados(dia))
+
+
+def _grupos_archivados(dia, directorio=None):
+    """
+    Totales por (fecha, ruta_id, app_id) de las cotizaciones de `dia` que ya solo están en los
+    archivos (las que siguen en la tabla se suman con las demás). Se omiten las de rutas o apps
+    eliminadas, cuyos resúmenes también se habrían borrado.
+    """
+    registros = [
+        registro for registro in leer_archivos(directorio, desde=dia, hasta=dia)
+        if registro['ruta_id'] is not None and registro['app_id'] is not None
+    ]
+    en_tabla = set(CotizacionTraslado.objects.filter(id__in=[r['id'] for r in registros]).values_list('id', flat=True))
+    rutas = set(Ruta.objects.filter(id__in={r['ruta_id'] for r in registros}).values_list('id', flat=True))
+    apps = set(TransporteApp.objects.filter(id__in={r['app_id'] for r in registros}).values_list('id', flat=True))
+    grupos = {}
+    for registro in registros:
+        if registro['id'] in en_tabla or registro['ruta_id'] not in rutas or registro['app_id'] not in apps:
+            continue
+        precio, factor = Decimal(registro['precio']), Decimal(registro['factor_dinamico'])
+        grupo = grupos.get((dia, registro['ruta_id'], registro['app_id']))
+        if grupo is None:
+            grupos[(dia, registro['ruta_id'], registro['app_id'])] = {
+                'cantidad': 1, 'suma_precio': precio, 'precio_minimo': precio,
+                'precio_maximo': precio, 'suma_factor': factor,
+            }
+        else:
+            grupo['cantidad'] += 1
+            grupo['suma_precio'] += precio
+            grupo['suma_factor'] += factor
+            grupo['precio_minimo'] = min(grupo['precio_minimo'], precio)
+            grupo['precio_maximo'] = max(grupo['precio_maximo'], precio)
+    return grupos
+
+
+def resumen_analitica(dias=30, limite=10):
+    """
+    Indicadores de los últimos `dias` días leídos de los resúmenes: totales y precio
+    promedio por día, selecciones por app y las rutas más elegidas con la app que más gana
+    en cada una. El costo depende de días x rutas, no del número de cotizaciones.
+    """
+    desde = timezone.localdate() - timedelta(days=dias - 1)
+    resumenes = ResumenDiario.objects.filter(fecha__gte=desde).order_by()
+
+    por_dia = [
+        {
+            'fecha': fila['fecha'].isoformat(),
+            'cantidad': fila['cantidad'],
+            'precio_promedio': round(fila['suma_precio'] / fila['cantidad'], 2),
+        }
+        for fila in resumenes.values('fecha').annotate(
+            cantidad=Sum('cantidad'), suma_precio=Sum('suma_precio')
+        ).order_by('fecha')
+    ]
+    por_app = [
+        {
+            'app': fila['app__nombre'],
+            'cantidad': fila['cantidad'],
+            'precio_promedio': round(fila['suma_precio'] / fila['cantidad'], 2),
+            'factor_promedio': round(fila['suma_factor'] / fila['cantidad'], 2),
+        }
+        for fila in resumenes.values('app__nombre').annotate(
+            cantidad=Sum('cantidad'), suma_precio=Sum('suma_precio'), suma_factor=Sum('suma_factor')
+        ).order_by('-cantidad', 'app__nombre')
+    ]
+    rutas = list(
+        resumenes.values('ruta_id', 'ruta__origen', 'ruta__destino').annotate(
+            cantidad=Sum('cantidad'), suma_precio=Sum('suma_precio'),
+            precio_minimo=Min('precio_minimo'), precio_maximo=Max('precio_maximo'),
+        ).order_by('-cantidad', 'ruta_id')[:limite]
+    )
+    ganadoras = {}
+    for fila in resumenes.filter(ruta_id__in=[r['ruta_id'] for r in rutas]).values(
+        'ruta_id', 'app__nombre'
+    ).annotate(cantidad=Sum('cantidad')):
+        actual = ganadoras.get(fila['ruta_id'])
+        if actual is None or fila['cantidad'] > actual['cantidad']:
+            ganadoras[fila['ruta_id']] = fila
+    por_ruta = [
+        {
+            'origen': fila['ruta__origen'],
+            'destino': fila['ruta__destino'],
+            'cantidad': fila['cantidad'],
+            'precio_promedio': round(fila['suma_precio'] / fila['cantidad'], 2),
+            'precio_minimo': fila['precio_minimo'],
+            'precio_maximo': fila['precio_maximo'],
+            'app_ganadora': ganadoras[fila['ruta_id']]['app__nombre'],
+            'selecciones_ganadora': ganadoras[fila['ruta_id']]['cantidad'],
+        }
+        for fila in rutas
+    ]
+    marca = MarcaAgregacion.objects.filter(nombre=MARCA_RESUMEN).first()
+    return {
+        'desde': desde.isoformat(),
+        'dias': dias,
+        'actualizado': marca.actualizado.isoformat() if marca else None,
+        'por_dia': por_dia,
+        'por_app': por_app,
+        'por_ruta': por_ruta,
+    }
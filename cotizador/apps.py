@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CotizadorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cotizador'
+
+    def ready(self):
+        # Registra los receptores que invalidan las copias en memoria del catálogo
+        from . import signals  # noqa: F401
@@ -0,0 +1,236 @@
+import gzip
+import json
+import os
+import re
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import particiones
+from .models import CotizacionTraslado
+
+# Columnas de cada registro archivado: los ids y, para las auditorías, los nombres vigentes al archivar
+COLUMNAS = {
+    'id': 'id',
+    'usuario_id': 'usuario_id',
+    'usuario': 'usuario__username',
+    'ruta_id': 'ruta_id',
+    'origen': 'ruta__origen',
+    'destino': 'ruta__destino',
+    'app_id': 'app_seleccionada_id',
+    'app': 'app_seleccionada__nombre',
+    'precio': 'precio',
+    'tiempo_espera': 'tiempo_espera',
+    'factor_dinamico': 'factor_dinamico',
+    'distancia_km': 'distancia_km',
+    'tiempo_min': 'tiempo_min',
+    'fecha_creacion': 'fecha_creacion',
+}
+
+_NOMBRE_ARCHIVO = re.compile(r'^cotizaciones-(\d{4})-(\d{2})\.jsonl\.gz$')
+
+
+def nombre_archivo(anio, mes):
+    return f"cotizaciones-{anio:04d}-{mes:02d}.jsonl.gz"
+
+
+def _fecha_local(registro):
+    """
+    Fecha y hora de creación del registro en la zona horaria local (TIME_ZONE), la misma
+    con que se cuentan los días de los resúmenes y los filtros de fecha.
+    """
+    return timezone.localtime(datetime.fromisoformat(registro['fecha_creacion']))
+
+
+def _a_registro(fila):
+    registro = dict(zip(COLUMNAS, fila))
+    registro['precio'] = str(registro['precio'])
+    registro['factor_dinamico'] = str(registro['factor_dinamico'])
+    if registro['distancia_km'] is not None:
+        registro['distancia_km'] = str(registro['distancia_km'])
+    registro['fecha_creacion'] = registro['fecha_creacion'].isoformat()
+    return registro
+
+
+def _escribir(directorio, registros):
+    """
+    Agrega los registros a los archivos del mes (local) de cada cotización. Cada escritura es un
+    miembro gzip nuevo al final del archivo (gzip los lee como uno solo) y se sincroniza
+    con el disco antes de volver, porque después se borran las filas.
+    """
+    por_mes = {}
+    for registro in registros:
+        fecha = _fecha_local(registro)
+        por_mes.setdefault((fecha.year, fecha.month), []).append(registro)
+    for (anio, mes), del_mes in sorted(por_mes.items()):
+        with open(os.path.join(directorio, nombre_archivo(anio, mes)), 'ab') as crudo:
+            with gzip.GzipFile(fileobj=crudo, mode='ab') as comprimido:
+                comprimido.write("".join(
+                    json.dumps(registro, ensure_ascii=False) + "\n" for registro in del_mes
+                ).encode('utf-8'))
+            crudo.flush()
+            os.fsync(crudo.fileno())
+
+
+def _meses_archivados(directorio):
+    return {
+        (int(coincidencia.group(1)), int(coincidencia.group(2)))
+        for coincidencia in map(_NOMBRE_ARCHIVO.match, os.listdir(directorio)) if coincidencia
+    }
+
+
+def _verificar_dias(dias, directorio, meses_previos, verificados):
+    """
+    Comprueba los resúmenes de los días que todavía no se verificaron, antes de que sus
+    filas salgan de la tabla. Los archivos se leen solo si ya existía alguno del mes del
+    día o de sus vecinos (los anteriores se agrupaban por mes UTC).
+    """
+    from .analitica import verificar_resumenes_dia
+
+    for dia in sorted(dias - verificados):
+        vecinos = {(d.year, d.month) for d in (dia - timedelta(days=1), dia, dia + timedelta(days=1))}
+        verificar_resumenes_dia(dia, directorio, con_archivos=bool(vecinos & meses_previos))
+        verificados.add(dia)
+
+
+def _archivar_lotes(consulta, directorio, tamano_lote, pausa, borrar, meses_previos, verificados):
+    """
+    Recorre `consulta` por id en lotes: verifica los resúmenes de los días de cada lote,
+    lo archiva y, con `borrar`, elimina sus filas en una transacción corta propia, de modo
+    que los escritores solo esperan un lote.
+    """
+    archivadas = 0
+    ultimo_id = 0
+    while True:
+        filas = list(
+            consulta.filter(id__gt=ultimo_id).order_by('id').values_list(*COLUMNAS.values())[:tamano_lote]
+        )
+        if not filas:
+            return archivadas
+        registros = [_a_registro(fila) for fila in filas]
+        _verificar_dias(
+            {_fecha_local(registro).date() for registro in registros}, directorio, meses_previos, verificados
+        )
+        _escribir(directorio, registros)
+        ultimo_id = registros[-1]['id']
+        if borrar:
+            with transaction.atomic():
+                CotizacionTraslado.objects.filter(id__in=[r['id'] for r in registros]).delete()
+        archivadas += len(registros)
+        if pausa:
+            time.sleep(pausa)
+
+
+def archivar_cotizaciones(antes_de, directorio=None, tamano_lote=2000, pausa=0.0):
+    """
+    Mueve a archivos JSONL comprimidos (uno por mes) las cotizaciones creadas antes de
+    `antes_de` y las borra de la tabla en lotes de `tamano_lote`, con `pausa` segundos
+    entre lotes. Si la tabla está particionada por mes (PostgreSQL), las particiones
+    vencidas completas se archivan y luego se eliminan enteras en vez de fila por fila.
+    Un lote se escribe en el archivo antes de borrarse: si el proceso se interrumpe entre
+    ambos pasos, la próxima corrida lo vuelve a archivar y los lectores omiten el duplicado.
+    Antes agrega las cotizaciones pendientes a los resúmenes diarios, que se conservan, y
+    solo archiva las que la marca de agregación ya incorporó: las que siguen pendientes
+    (confirmadas después de la corrida) quedan en la tabla hasta la próxima. Los resúmenes
+    de cada día se verifican contra sus filas antes de borrarlas, por si alguna se confirmó
+    tan tarde que la agregación ya no la iba a sumar.
+    Devuelve la cantidad de cotizaciones archivadas.
+    """
+    from .analitica import agregar_cotizaciones, filtro_sin_agregar
+
+    directorio = directorio or settings.COTIZADOR_ARCHIVO_DIRECTORIO
+    os.makedirs(directorio, exist_ok=True)
+    agregar_cotizaciones()
+    sin_agregar = filtro_sin_agregar()
+    meses_previos = _meses_archivados(directorio)
+    verificados = set()
+    archivadas = 0
+    for particion in particiones.particiones_vencidas(antes_de):
+        consulta = CotizacionTraslado.objects.filter(
+            fecha_creacion__gte=particion.desde, fecha_creacion__lt=particion.hasta
+        )
+        if consulta.filter(sin_agregar).exists():
+            # Se archiva fila por fila con el resto; la partición queda para la próxima corrida
+            continue
+        archivadas += _archivar_lotes(
+            consulta, directorio, tamano_lote, pausa, False, meses_previos, verificados
+        )
+        particiones.eliminar_particion(particion)
+    consulta = CotizacionTraslado.objects.filter(fecha_creacion__lt=antes_de).exclude(sin_agregar)
+    archivadas += _archivar_lotes(consulta, directorio, tamano_lote, pausa, True, meses_previos, verificados)
+    return archivadas
+
+
+def horizonte_retencion(dias=None):
+    """
+    Fecha antes de la cual las cotizaciones se archivan (COTIZADOR_RETENCION_DIAS por omisión).
+    """
+    dias = settings.COTIZADOR_RETENCION_DIAS if dias is None else dias
+    return timezone.now() - timedelta(days=dias)
+
+
+def archivos_del_periodo(directorio=None, desde=None, hasta=None):
+    """
+    Rutas de los archivos cuyo mes se superpone con [desde, hasta] (fechas, opcionales), en orden.
+    """
+    directorio = directorio or settings.COTIZADOR_ARCHIVO_DIRECTORIO
+    if not os.path.isdir(directorio):
+        return []
+    rutas = []
+    for nombre in sorted(os.listdir(directorio)):
+        coincidencia = _NOMBRE_ARCHIVO.match(nombre)
+        if not coincidencia:
+            continue
+        mes = (int(coincidencia.group(1)), int(coincidencia.group(2)))
+        if desde and mes < (desde.year, desde.month):
+            continue
+        if hasta and mes > (hasta.year, hasta.month):
+            continue
+        rutas.append(os.path.join(directorio, nombre))
+    return rutas
+
+
+def leer_archivo(ruta):
+    """
+    Registros de un archivo de cotizaciones, sin repetir ids (una corrida interrumpida
+    puede haber archivado dos veces el mismo lote).
+    """
+    vistos = set()
+    with gzip.open(ruta, 'rt', encoding='utf-8') as archivo:
+        for linea in archivo:
+            if not linea.strip():
+                continue
+            registro = json.loads(linea)
+            if registro['id'] in vistos:
+                continue
+            vistos.add(registro['id'])
+            yield registro
+
+
+def leer_archivos(directorio=None, desde=None, hasta=None, usuario=None, lugar=None):
+    """
+    Registros archivados entre las fechas locales `desde` y `hasta` (inclusive), opcionalmente
+    de un usuario (nombre) o de rutas con `lugar` como origen o destino.
+    """
+    lugar = lugar.casefold() if lugar else None
+    # Los archivos anteriores se agrupaban por mes UTC: un día del borde puede estar en el vecino
+    archivos = archivos_del_periodo(
+        directorio,
+        desde - timedelta(days=1) if desde else None,
+        hasta + timedelta(days=1) if hasta else None,
+    )
+    for ruta in archivos:
+        for registro in leer_archivo(ruta):
+            dia = _fecha_local(registro).date()
+            if desde and dia < desde:
+                continue
+            if hasta and dia > hasta:
+                continue
+            if usuario and registro['usuario'] != usuario:
+                continue
+            if lugar and lugar not in ((registro['origen'] or '').casefold(), (registro['destino'] or '').casefold()):
+                continue
+            yield registro
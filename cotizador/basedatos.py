@@ -0,0 +1,15 @@
+from django.conf import settings
+
+
+def aplicar_pragmas(connection, pragmas=None):
+    """
+    Aplica a una conexión SQLite los PRAGMAs indicados (por omisión, COTIZADOR_SQLITE_PRAGMAS).
+    journal_mode=WAL queda guardado en el archivo; los demás valen solo para la conexión.
+    """
+    if pragmas is None:
+        pragmas = getattr(settings, 'COTIZADOR_SQLITE_PRAGMAS', {})
+    if not pragmas:
+        return
+    # Directo sobre la conexión de sqlite3, sin contar como consultas de la solicitud
+    for nombre, valor in pragmas.items():
+        connection.connection.execute(f"PRAGMA {nombre} = {valor}")
@@ -0,0 +1,167 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import caches
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+
+def _clave_generacion(nombre):
+    return f"cotizador:generacion:{nombre}"
+
+
+def _clave_modificacion(nombre):
+    return f"cotizador:modificado:{nombre}"
+
+
+def _generaciones():
+    # Alias siempre compartido entre procesos (en archivos), aunque 'default' sea propia de cada uno
+    return caches['generaciones']
+
+
+def _generacion_inicial():
+    # Si el contador se pierde (cache vaciada), el nuevo valor no coincide con uno ya visto
+    return time.time_ns() // 1000
+
+
+@contextmanager
+def _bloqueo_incremento():
+    """
+    Serializa los incrementos entre procesos: incr() de la cache en archivos lee y
+    escribe por separado, y dos procesos podrían dejar el mismo valor.
+    """
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(settings.COTIZADOR_GENERACIONES_DIRECTORIO, exist_ok=True)
+    with open(os.path.join(settings.COTIZADOR_GENERACIONES_DIRECTORIO, 'incrementos.lock'), 'a') as archivo:
+        fcntl.flock(archivo, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(archivo, fcntl.LOCK_UN)
+
+
+# Últimos contadores leídos por este proceso: nombre -> (generación, momento de la lectura)
+_leidas = {}
+
+
+def obtener_generacion(nombre):
+    """
+    Devuelve el contador de generación compartido de un catálogo.
+    El contador vive en la cache 'generaciones', así todos los procesos ven el mismo valor;
+    cada proceso lo vuelve a leer como mucho cada COTIZADOR_GENERACIONES_VIGENCIA segundos
+    (leerlo de disco en cada acceso sumaría cerca de 1 ms por solicitud).
+    """
+    leida = _leidas.get(nombre)
+    ahora = time.monotonic()
+    if leida is not None and ahora - leida[1] < settings.COTIZADOR_GENERACIONES_VIGENCIA:
+        return leida[0]
+    cache = _generaciones()
+    clave = _clave_generacion(nombre)
+    generacion = cache.get(clave)
+    if generacion is None:
+        cache.add(clave, _generacion_inicial(), timeout=None)
+        generacion = cache.get(clave)
+    _leidas[nombre] = (generacion, ahora)
+    return generacion
+
+
+def incrementar_generacion(nombre):
+    """
+    Marca un catálogo como modificado para que cada proceso reconstruya su copia.
+    """
+    cache = _generaciones()
+    clave = _clave_generacion(nombre)
+    cache.set(_clave_modificacion(nombre), time.time(), timeout=None)
+    with _bloqueo_incremento():
+        try:
+            generacion = cache.incr(clave)
+        except ValueError:
+            # La clave no existía (o fue desalojada): cualquier valor nuevo invalida las copias
+            cache.add(clave, _generacion_inicial(), timeout=None)
+            generacion = cache.get(clave)
+    # Este proceso ve su propio cambio de inmediato
+    _leidas[nombre] = (generacion, time.monotonic())
+    return generacion
+
+
+def fecha_generacion(nombre):
+    """
+    Momento (UTC) del último cambio registrado de un catálogo, o None si no se conoce.
+    """
+    marca = _generaciones().get(_clave_modificacion(nombre))
+    return datetime.fromtimestamp(marca, tz=timezone.utc) if marca is not None else None
+
+
+class SnapshotVersionado:
+    """
+    Copia en memoria de un catálogo que solo se reconstruye cuando
+    cambia su contador de generación.
+    """
+
+    def __init__(self, nombre, construir):
+        self.nombre = nombre
+        self._construir = construir
+        self._lock = threading.Lock()
+        self._valor = None
+        self._generacion = None
+
+    @property
+    def generacion(self):
+        return self._generacion
+
+    def obtener(self):
+        generacion = obtener_generacion(self.nombre)
+        if self._generacion != generacion:
+            with self._lock:
+                if self._generacion != generacion:
+                    self._valor = self._construir()
+                    self._generacion = generacion
+        return self._valor
+
+    def invalidar(self):
+        incrementar_generacion(self.nombre)
+
+
+class CacheLRU:
+    """
+    Cache acotada en memoria (menos usado recientemente) que se vacía entera
+    cuando cambia la generación del catálogo al que pertenece.
+    """
+
+    def __init__(self, nombre, capacidad):
+        self.nombre = nombre
+        self.capacidad = capacidad
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self._generacion = None
+
+    def obtener(self, clave, calcular):
+        generacion = obtener_generacion(self.nombre)
+        with self._lock:
+            if self._generacion != generacion:
+                self._datos.clear()
+                self._generacion = generacion
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                return self._datos[clave]
+
+        valor = calcular(clave)
+        with self._lock:
+            if self._generacion == generacion:
+                self._datos[clave] = valor
+                while len(self._datos) > self.capacidad:
+                    self._datos.popitem(last=False)
+        return valor
+
+    def invalidar(self):
+        incrementar_generacion(self.nombre)
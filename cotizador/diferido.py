@@ -0,0 +1,293 @@
+import atexit
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+from itertools import count
+
+from django.conf import settings
+from django.db import (
+    DataError, IntegrityError, InterfaceError, OperationalError, close_old_connections, connection,
+)
+from django.utils import timezone
+
+from .models import CotizacionTraslado
+
+logger = logging.getLogger(__name__)
+
+CAMPOS = ('usuario_id', 'ruta_id', 'app_seleccionada_id', 'precio', 'tiempo_espera', 'factor_dinamico',
+          'distancia_km', 'tiempo_min', 'fecha_creacion')
+
+
+def _a_registro(cotizacion):
+    return {
+        'usuario_id': cotizacion.usuario_id,
+        'ruta_id': cotizacion.ruta_id,
+        'app_seleccionada_id': cotizacion.app_seleccionada_id,
+        'precio': str(cotizacion.precio),
+        'tiempo_espera': cotizacion.tiempo_espera,
+        'factor_dinamico': str(cotizacion.factor_dinamico),
+        'distancia_km': None if cotizacion.distancia_km is None else str(cotizacion.distancia_km),
+        'tiempo_min': cotizacion.tiempo_min,
+        'fecha_creacion': cotizacion.fecha_creacion.isoformat(),
+    }
+
+
+def _desde_registro(registro):
+    return CotizacionTraslado(
+        usuario_id=registro['usuario_id'],
+        ruta_id=registro['ruta_id'],
+        app_seleccionada_id=registro['app_seleccionada_id'],
+        precio=Decimal(registro['precio']),
+        tiempo_espera=registro['tiempo_espera'],
+        factor_dinamico=Decimal(registro['factor_dinamico']),
+        # Los segmentos escritos antes de guardar la distancia y el tiempo no los traen
+        distancia_km=None if registro.get('distancia_km') is None else Decimal(registro['distancia_km']),
+        tiempo_min=registro.get('tiempo_min'),
+        fecha_creacion=datetime.fromisoformat(registro['fecha_creacion']),
+    )
+
+
+def _proceso_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _ruta_descartes(segmento):
+    # recuperar_spool no toma los archivos 'descartadas-...': quedan para revisarlos a mano
+    return os.path.join(os.path.dirname(segmento), f"descartadas-{os.path.basename(segmento)}")
+
+
+def guardar_cotizaciones(cotizaciones, descartes=None):
+    """
+    Inserta un lote de cotizaciones. Si el lote completo falla por datos inválidos,
+    se reintenta fila por fila y se descartan solo las filas que no pueden guardarse
+    (se anotan en el archivo `descartes`, si se indica).
+    Los errores de conexión se propagan para reintentar el lote más tarde.
+    """
+    try:
+        CotizacionTraslado.objects.bulk_create(cotizaciones)
+        return len(cotizaciones)
+    except (IntegrityError, DataError):
+        pass
+    guardadas = 0
+    for cotizacion in cotizaciones:
+        try:
+            cotizacion.pk = None
+            cotizacion.save(force_insert=True)
+            guardadas += 1
+        except (IntegrityError, DataError) as e:
+            logger.error("Cotización diferida descartada (%s): %s", e, _a_registro(cotizacion))
+            if descartes:
+                with open(descartes, 'a', encoding='utf-8') as archivo:
+                    archivo.write(json.dumps(_a_registro(cotizacion)) + '\n')
+    return guardadas
+
+
+def guardar_segmento(cotizaciones, segmento):
+    """
+    Guarda las cotizaciones de un archivo de spool y lo borra.
+    Solo los errores de conexión se propagan (el archivo queda para reintentarlo); ante
+    cualquier otro error el lote no se guardaría nunca, así que pasa al archivo de descartes.
+    """
+    descartes = _ruta_descartes(segmento)
+    try:
+        guardadas = guardar_cotizaciones(cotizaciones, descartes)
+    except (OperationalError, InterfaceError):
+        raise
+    except Exception:
+        logger.exception("Lote diferido descartado; queda en %s", descartes)
+        with open(segmento, 'rb') as origen, open(descartes, 'ab') as destino:
+            shutil.copyfileobj(origen, destino)
+        guardadas = 0
+    os.remove(segmento)
+    return guardadas
+
+
+def recuperar_spool(directorio, propios=''):
+    """
+    Guarda las cotizaciones que quedaron en archivos de spool de procesos que ya no existen.
+    Los archivos se llaman '<tipo>-<pid>-<instancia>-...'; se omiten los que empiezan con
+    `propios` (los de esta misma cola) y los de procesos vivos.
+    Cada archivo se reclama con un rename atómico, así dos procesos no lo recuperan a la vez.
+    """
+    recuperadas = 0
+    if not os.path.isdir(directorio):
+        return recuperadas
+    pid_actual = os.getpid()
+    for nombre in sorted(os.listdir(directorio)):
+        partes = nombre.split('-')
+        if (not nombre.endswith('.jsonl') or len(partes) < 4
+                or partes[0] not in ('cotizaciones', 'recuperando') or not partes[1].isdigit()):
+            continue
+        pid = int(partes[1])
+        if propios and nombre.startswith(propios):
+            continue
+        if pid != pid_actual and _proceso_vivo(pid):
+            continue
+        reclamado = os.path.join(directorio, f"recuperando-{pid_actual}-{time.time_ns()}-{nombre}")
+        try:
+            os.rename(os.path.join(directorio, nombre), reclamado)
+        except OSError:
+            continue  # otro proceso lo reclamó primero
+        cotizaciones = []
+        with open(reclamado, encoding='utf-8') as archivo:
+            for linea in archivo:
+                try:
+                    cotizaciones.append(_desde_registro(json.loads(linea)))
+                except (ValueError, KeyError, TypeError):
+                    # Línea incompleta: el proceso murió mientras escribía
+                    continue
+        recuperadas += guardar_segmento(cotizaciones, reclamado)
+    return recuperadas
+
+
+class ColaCotizaciones:
+    """
+    Escritura diferida de cotizaciones (write-behind).
+    Cada cotización se anota primero en un archivo de spool local y luego se
+    encola en memoria; un hilo en segundo plano la guarda con bulk_create al
+    juntar `tamano_lote` registros o cada `intervalo` segundos.
+    El spool de un lote se borra solo después de guardarlo (al menos una vez).
+    """
+
+    def __init__(self, directorio, tamano_lote=200, intervalo=2.0):
+        self.directorio = directorio
+        self.tamano_lote = tamano_lote
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        # Un solo vaciado a la vez (el hilo y cerrar()): _fallidos y los segmentos no se comparten
+        self._lock_vaciar = threading.Lock()
+        self._despertar = threading.Event()
+        self._pendientes = []
+        self._fallidos = []
+        self._segmento = None
+        self._archivo = None
+        self._secuencia = count()
+        self._hilo = None
+        self._pid = None
+        self._prefijo = ''
+        self._detenida = False
+
+    def _iniciar(self):
+        # Se llama con el lock tomado. Con gunicorn --preload el proceso se bifurca:
+        # cada worker arranca su propio hilo y su propio spool.
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._detenida = False
+        self._prefijo = f"cotizaciones-{self._pid}-{time.time_ns()}-"
+        self._pendientes = []
+        self._fallidos = []
+        self._lock_vaciar = threading.Lock()
+        os.makedirs(self.directorio, exist_ok=True)
+        self._abrir_segmento()
+        self._hilo = threading.Thread(target=self._ciclo, name='cola-cotizaciones', daemon=True)
+        self._hilo.start()
+        atexit.register(self.cerrar)
+
+    def _abrir_segmento(self):
+        self._segmento = os.path.join(self.directorio, f"{self._prefijo}{next(self._secuencia):06d}.jsonl")
+        self._archivo = open(self._segmento, 'a', encoding='utf-8')
+
+    def encolar(self, cotizacion):
+        if cotizacion.fecha_creacion is None:
+            cotizacion.fecha_creacion = timezone.now()
+        linea = json.dumps(_a_registro(cotizacion)) + '\n'
+        with self._lock:
+            self._iniciar()
+            self._archivo.write(linea)
+            self._archivo.flush()
+            self._pendientes.append(cotizacion)
+            lleno = len(self._pendientes) >= self.tamano_lote
+        if lleno:
+            self._despertar.set()
+
+    def _tomar_lote(self):
+        # Cierra el segmento actual y lo devuelve junto con sus cotizaciones
+        with self._lock:
+            if not self._pendientes:
+                return None
+            lote = (self._pendientes, self._segmento)
+            self._archivo.close()
+            self._pendientes = []
+            self._abrir_segmento()
+        return lote
+
+    def vaciar(self):
+        """
+        Guarda todo lo pendiente, incluidos los lotes que fallaron antes.
+        Si la conexión con la base de datos falla, el segmento queda en disco y se reintenta en
+        el próximo ciclo; un lote que falla por otro motivo se descarta y no bloquea a los siguientes.
+        """
+        with self._lock_vaciar:
+            lote = self._tomar_lote()
+            if lote:
+                self._fallidos.append(lote)
+            guardadas = 0
+            while self._fallidos:
+                cotizaciones, segmento = self._fallidos[0]
+                try:
+                    guardadas += guardar_segmento(cotizaciones, segmento)
+                except (OperationalError, InterfaceError):
+                    logger.exception("No se pudo guardar un lote diferido; queda en %s", segmento)
+                    break
+                except Exception:
+                    # Ni guardado ni descartado: el segmento queda en disco y lo recupera el
+                    # próximo proceso con recuperar_spool
+                    logger.exception("No se pudo procesar el lote diferido %s", segmento)
+                self._fallidos.pop(0)
+            return guardadas
+
+    def _ciclo(self):
+        # Cualquier excepción se registra y el hilo sigue: si muriera, la cola crecería sin límite
+        try:
+            recuperar_spool(self.directorio, self._prefijo)
+        except Exception:
+            logger.exception("No se pudo recuperar el spool de cotizaciones")
+        while not self._detenida:
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+            try:
+                close_old_connections()
+                self.vaciar()
+            except Exception:
+                logger.exception("Error en la cola de cotizaciones diferidas")
+        connection.close()
+
+    def cerrar(self):
+        """
+        Vacía la cola al terminar el proceso (registrado con atexit).
+        """
+        if self._pid != os.getpid():
+            return
+        self._detenida = True
+        self._despertar.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout=self.intervalo + 5)
+            if self._hilo.is_alive():
+                # Sigue guardando un lote: lo pendiente queda en el spool y lo recupera el próximo proceso
+                logger.warning("La cola de cotizaciones no terminó a tiempo; lo pendiente queda en %s", self.directorio)
+                return
+        self.vaciar()
+        with self._lock:
+            self._archivo.close()
+            if not os.path.getsize(self._segmento):
+                os.remove(self._segmento)
+            self._pid = None
+
+
+cola_cotizaciones = ColaCotizaciones(
+    getattr(settings, 'COTIZADOR_DIFERIDA_DIRECTORIO', os.path.join(settings.BASE_DIR, 'spool')),
+    tamano_lote=getattr(settings, 'COTIZADOR_DIFERIDA_LOTE', 200),
+    intervalo=getattr(settings, 'COTIZADOR_DIFERIDA_INTERVALO', 2.0),
+)
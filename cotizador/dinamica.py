@@ -0,0 +1,133 @@
+from array import array
+from decimal import ROUND_HALF_EVEN, Decimal
+
+from django.utils import timezone
+
+from .cache import SnapshotVersionado
+from .models import FranjaDinamica
+from .normalizacion import normalizar_lugar
+from .ubicaciones import obtener_indice_ubicaciones
+
+HORAS_SEMANA = 7 * 24
+# Los multiplicadores se guardan en centésimas: 100 = sin recargo
+SIN_RECARGO = 100
+
+
+def hora_semana(momento=None):
+    """
+    Hora de la semana (0 = lunes de 0 a 1 h, 167 = domingo de 23 a 24 h) en la zona horaria local.
+    """
+    momento = timezone.localtime(momento)
+    return momento.weekday() * 24 + momento.hour
+
+
+def factor_efectivo(factor_dinamico, multiplicador):
+    """
+    Factor dinámico de la app con el recargo aplicado, redondeado a centésimas (mitad al par).
+    """
+    if multiplicador == SIN_RECARGO:
+        return factor_dinamico
+    return (factor_dinamico * multiplicador / SIN_RECARGO).quantize(Decimal('0.01'), rounding=ROUND_HALF_EVEN)
+
+
+class TablaDinamica:
+    """
+    Franjas de recargo compiladas: un arreglo de 168 multiplicadores (uno por hora de la semana)
+    por cada par (app, zona). La zona '' vale para todas las zonas; las franjas de una zona
+    concreta reemplazan a las generales en sus horas. Si dos franjas se solapan, gana la mayor.
+    Las instancias son compartidas entre peticiones: no deben modificarse.
+    """
+
+    def __init__(self, franjas):
+        generales, por_zona = {}, {}
+        for app_id, zona, dia_semana, hora_inicio, hora_fin, multiplicador in franjas:
+            zona = normalizar_lugar(zona)
+            dias = range(7) if dia_semana is None else (dia_semana,)
+            horas = [dia * 24 + hora for dia in dias for hora in range(hora_inicio, hora_fin)]
+            destino = generales.setdefault(app_id, {}) if not zona else por_zona.setdefault((app_id, zona), {})
+            centesimas = int(multiplicador * SIN_RECARGO)
+            for hora in horas:
+                destino[hora] = max(destino.get(hora, 0), centesimas)
+
+        self.tablas = {}
+        for app_id, horas in generales.items():
+            self.tablas[(app_id, '')] = self._compilar(array('H', [SIN_RECARGO]) * HORAS_SEMANA, horas)
+        for (app_id, zona), horas in por_zona.items():
+            base = self.tablas.get((app_id, ''))
+            base = array('H', base) if base is not None else array('H', [SIN_RECARGO]) * HORAS_SEMANA
+            self.tablas[(app_id, zona)] = self._compilar(base, horas)
+
+        # Por zona, la tabla de cada app ya resuelta (la de la zona o la general)
+        self.generales = {app_id: tabla for (app_id, zona), tabla in self.tablas.items() if not zona}
+        self.por_zona = {}
+        for (app_id, zona), tabla in self.tablas.items():
+            if zona:
+                self.por_zona.setdefault(zona, dict(self.generales))[app_id] = tabla
+
+    @staticmethod
+    def _compilar(tabla, horas):
+        for hora, centesimas in horas.items():
+            tabla[hora] = centesimas
+        return tabla
+
+    @property
+    def vacia(self):
+        return not self.tablas
+
+    def multiplicador(self, app_id, zona, hora):
+        tabla = self.por_zona.get(zona, self.generales).get(app_id)
+        return tabla[hora] if tabla is not None else SIN_RECARGO
+
+    def multiplicadores(self, app_ids, zona, hora):
+        """
+        Multiplicador (en centésimas) de cada app, en el orden recibido.
+        """
+        tablas = self.por_zona.get(zona, self.generales)
+        return [tablas[app_id][hora] if app_id in tablas else SIN_RECARGO for app_id in app_ids]
+
+
+def _construir_tabla():
+    return TablaDinamica(FranjaDinamica.objects.values_list(
+        'app_id', 'zona', 'dia_semana', 'hora_inicio', 'hora_fin', 'multiplicador'
+    ))
+
+
+# Se reconstruye solo cuando las señales de FranjaDinamica incrementan la generación 'dinamica'
+tabla_dinamica = SnapshotVersionado('dinamica', _construir_tabla)
+
+
+def obtener_tabla_dinamica():
+    return tabla_dinamica.obtener()
+
+
+class RecargosVigentes:
+    """
+    Recargos de un conjunto de apps en un momento dado; se crea una vez por solicitud
+    y se consulta por ruta (para cotizar muchas rutas sin releer la tabla ni el índice).
+    """
+
+    def __init__(self, apps, momento=None):
+        self.tabla = obtener_tabla_dinamica()
+        if not self.tabla.vacia:
+            self.app_ids = [app.pk for app in apps]
+            self.hora = hora_semana(momento)
+            self.indice = obtener_indice_ubicaciones()
+
+    def para(self, ruta):
+        """
+        Multiplicador (en centésimas) de cada app para la ruta, según la zona de su origen.
+        Devuelve None si ninguna app tiene recargo, para usar los precios sin recargo.
+        """
+        if self.tabla.vacia:
+            return None
+        multiplicadores = self.tabla.multiplicadores(self.app_ids, self.indice.zona(ruta.origen), self.hora)
+        if all(multiplicador == SIN_RECARGO for multiplicador in multiplicadores):
+            return None
+        return multiplicadores
+
+
+def obtener_multiplicadores(apps, ruta, momento=None):
+    """
+    Recargos vigentes de cada app para una ruta (None si no hay ninguno).
+    """
+    return RecargosVigentes(apps, momento).para(ruta)
@@ -1,29 +1,43 @@
 from django import forms
-from .simulador import obtener_ubicaciones_disponibles
+from django.urls import reverse_lazy
 from .models import CotizacionTraslado
+from .ubicaciones import obtener_indice_ubicaciones
 
-class CotizacionForm(forms.Form):
-    origen = forms.ChoiceField(
-        label="Punto de Origen",
-        widget=forms.Select(attrs={'class': 'form-control'}),
-        required=True
-    )
-    destino = forms.ChoiceField(
-        label="Punto de Destino",
-        widget=forms.Select(attrs={'class': 'form-control'}),
-        required=True
-    )
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        ubicaciones = obtener_ubicaciones_disponibles()
-        CHOICES = [(u, u) for u in ubicaciones]
-        if not CHOICES:
-            CHOICES = [('', '--- No hay ubicaciones disponibles ---')]
+class UbicacionField(forms.CharField):
+    """
+    Lugar escrito con autocompletado; se acepta sin distinguir tildes ni mayúsculas y se
+    devuelve con el nombre del índice de ubicaciones.
+    """
+    widget = forms.TextInput
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('max_length', 100)
+        super().__init__(**kwargs)
 
-        CHOICES.insert(0, ('', '--- Seleccione un lugar ---'))
-        self.fields['origen'].choices = CHOICES
-        self.fields['destino'].choices = CHOICES
+    def widget_attrs(self, widget):
+        attrs = super().widget_attrs(widget)
+        attrs.update({
+            'class': 'form-control',
+            'autocomplete': 'off',
+            'data-autocompletar': reverse_lazy('sugerencias_ubicaciones'),
+            'placeholder': "Escriba un lugar",
+        })
+        return attrs
+
+    def clean(self, value):
+        value = super().clean(value)
+        if not value:
+            return value
+        nombre = obtener_indice_ubicaciones().nombre(value)
+        if nombre is None:
+            raise forms.ValidationError("Elija un lugar de la lista de sugerencias.", code='invalid_choice')
+        return nombre
+
+
+class CotizacionForm(forms.Form):
+    origen = UbicacionField(label="Punto de Origen", required=True)
+    destino = UbicacionField(label="Punto de Destino", required=True)
 
     def clean(self):
         cleaned_data = super().clean()
@@ -34,16 +48,8 @@ class CotizacionForm(forms.Form):
         return cleaned_data
 
 class EditarCotizacionForm(forms.ModelForm):
-    origen = forms.CharField(
-        max_length=100,
-        widget=forms.TextInput(attrs={'class': 'form-control'}),
-        label="Origen"
-    )
-    destino = forms.CharField(
-        max_length=100,
-        widget=forms.TextInput(attrs={'class': 'form-control'}),
-        label="Destino"
-    )
+    origen = UbicacionField(label="Origen")
+    destino = UbicacionField(label="Destino")
 
     class Meta:
         model = CotizacionTraslado
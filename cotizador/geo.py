@@ -0,0 +1,164 @@
+import math
+from decimal import Decimal
+from heapq import nsmallest
+
+from django.conf import settings
+
+from .cache import SnapshotVersionado
+from .models import Ruta, Ubicacion
+from .normalizacion import clave_ruta, normalizar_lugar
+
+RADIO_TIERRA_KM = 6371.0088
+
+
+def haversine_km(latitud1, longitud1, latitud2, longitud2):
+    """
+    Distancia en línea recta (sobre la esfera) entre dos puntos, en km.
+    """
+    phi1, phi2 = math.radians(latitud1), math.radians(latitud2)
+    delta_phi = phi2 - phi1
+    delta_lambda = math.radians(longitud2 - longitud1)
+    h = math.sin(delta_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+class IndiceEspacial:
+    """
+    Índice en memoria de los lugares con coordenadas: una grilla de celdas de `tamano` grados
+    con los puntos de cada celda. Si no se indica el tamaño, se elige para que haya unos
+    pocos lugares por celda. La búsqueda del más cercano recorre anillos de celdas alrededor
+    del punto y se detiene cuando ningún anillo más lejano puede tener un punto más cerca.
+    No contempla el cruce del antimeridiano.
+    Las instancias son compartidas entre peticiones: no deben modificarse.
+    """
+    LUGARES_POR_CELDA = 2
+
+    def __init__(self, puntos, tamano=None):
+        self.puntos = []
+        self.coordenadas = {}
+        for nombre, latitud, longitud in puntos:
+            latitud, longitud = float(latitud), float(longitud)
+            self.coordenadas[normalizar_lugar(nombre)] = (latitud, longitud)
+            self.puntos.append((latitud, longitud, nombre))
+        self.tamano = tamano or self._tamano_automatico()
+        self.latitud_maxima = max((abs(latitud) for latitud, _, _ in self.puntos), default=0.0)
+        self.celdas = {}
+        for punto in self.puntos:
+            self.celdas.setdefault(self._celda(punto[0], punto[1]), []).append(punto)
+        if self.celdas:
+            filas = [fila for fila, _ in self.celdas]
+            columnas = [columna for _, columna in self.celdas]
+            self.limites = (min(filas), max(filas), min(columnas), max(columnas))
+
+    def _tamano_automatico(self):
+        if len(self.puntos) < 2:
+            return 1.0
+        alto = max(p[0] for p in self.puntos) - min(p[0] for p in self.puntos)
+        ancho = max(p[1] for p in self.puntos) - min(p[1] for p in self.puntos)
+        area = max(alto, 0.001) * max(ancho, 0.001)
+        return min(1.0, max(0.0005, math.sqrt(area * self.LUGARES_POR_CELDA / len(self.puntos))))
+
+    def _celda(self, latitud, longitud):
+        return (math.floor(latitud / self.tamano), math.floor(longitud / self.tamano))
+
+    def _anillo(self, fila, columna, radio):
+        if radio == 0:
+            yield (fila, columna)
+            return
+        for desplazamiento in range(-radio, radio + 1):
+            yield (fila - radio, columna + desplazamiento)
+            yield (fila + radio, columna + desplazamiento)
+        for desplazamiento in range(-radio + 1, radio):
+            yield (fila + desplazamiento, columna - radio)
+            yield (fila + desplazamiento, columna + radio)
+
+    def _cota(self, radio, latitud):
+        """
+        Distancia mínima (km) a cualquier punto fuera de los primeros `radio` anillos.
+        """
+        coseno = math.cos(math.radians(max(self.latitud_maxima, abs(latitud))))
+        angulo = min(math.radians(radio * self.tamano), math.pi)
+        return 2 * RADIO_TIERRA_KM * math.asin(min(1.0, coseno * math.sin(angulo / 2)))
+
+    def cercanos(self, latitud, longitud, cantidad=1, radio_km=None):
+        """
+        Los `cantidad` lugares más cercanos al punto, como tuplas (distancia_km, nombre),
+        opcionalmente solo los que están a menos de `radio_km`.
+        """
+        if not self.celdas:
+            return []
+        fila, columna = self._celda(latitud, longitud)
+        fila_minima, fila_maxima, columna_minima, columna_maxima = self.limites
+        radio_maximo = max(fila - fila_minima, fila_maxima - fila, columna - columna_minima, columna_maxima - columna)
+        candidatos = []
+        for radio in range(max(radio_maximo, 0) + 1):
+            if 8 * radio > len(self.celdas):
+                # Lejos de los lugares, los anillos son casi todos celdas vacías: se revisan todos
+                candidatos = [
+                    (distancia, nombre)
+                    for distancia, nombre in (
+                        (haversine_km(latitud, longitud, lat, lon), nombre) for lat, lon, nombre in self.puntos
+                    )
+                    if radio_km is None or distancia <= radio_km
+                ]
+                break
+            for celda in self._anillo(fila, columna, radio):
+                for latitud_punto, longitud_punto, nombre in self.celdas.get(celda, ()):
+                    distancia = haversine_km(latitud, longitud, latitud_punto, longitud_punto)
+                    if radio_km is None or distancia <= radio_km:
+                        candidatos.append((distancia, nombre))
+            cota = self._cota(radio, latitud)
+            if radio_km is not None and cota > radio_km:
+                break
+            if len(candidatos) >= cantidad and nsmallest(cantidad, candidatos)[-1][0] <= cota:
+                break
+        return nsmallest(cantidad, candidatos)
+
+    def mas_cercano(self, latitud, longitud, radio_km=None):
+        """
+        Nombre del lugar más cercano al punto, o None.
+        """
+        encontrados = self.cercanos(latitud, longitud, 1, radio_km)
+        return encontrados[0][1] if encontrados else None
+
+    def ubicar(self, nombre):
+        """
+        Coordenadas (latitud, longitud) de un lugar, o None si no las tiene.
+        """
+        return self.coordenadas.get(normalizar_lugar(nombre))
+
+
+def _construir_indice_espacial():
+    return IndiceEspacial(
+        Ubicacion.objects.filter(latitud__isnull=False, longitud__isnull=False)
+        .values_list('nombre', 'latitud', 'longitud')
+    )
+
+
+# Comparte la generación 'ubicaciones': se reconstruye al editar las coordenadas en el admin
+indice_espacial = SnapshotVersionado('ubicaciones', _construir_indice_espacial)
+
+
+def obtener_indice_espacial():
+    return indice_espacial.obtener()
+
+
+def estimar_ruta(origen, destino, coordenadas_origen=None, coordenadas_destino=None):
+    """
+    Ruta sin guardar estimada a partir de la distancia en línea recta entre los lugares
+    (o las coordenadas recibidas), corregida por COTIZADOR_FACTOR_DESVIO, y del tiempo
+    a COTIZADOR_VELOCIDAD_KMH. Devuelve None si falta alguna coordenada.
+    """
+    indice = obtener_indice_espacial()
+    punto_origen = coordenadas_origen or indice.ubicar(origen)
+    punto_destino = coordenadas_destino or indice.ubicar(destino)
+    if punto_origen is None or punto_destino is None:
+        return None
+    distancia = haversine_km(*punto_origen, *punto_destino) * settings.COTIZADOR_FACTOR_DESVIO
+    distancia = Decimal(str(round(distancia, 2)))
+    if distancia <= 0:
+        return None
+    tiempo = max(1, math.ceil(float(distancia) / settings.COTIZADOR_VELOCIDAD_KMH * 60))
+    ruta = Ruta(origen=origen, destino=destino, distancia_km=distancia, tiempo_min=tiempo)
+    ruta.clave = clave_ruta(origen, destino)
+    return ruta
@@ -0,0 +1,264 @@
+import threading
+from array import array
+from decimal import Decimal
+from heapq import heappop, heappush
+
+from django.conf import settings
+
+from .cache import CacheLRU, incrementar_generacion, obtener_generacion
+from .geo import estimar_ruta
+from .models import Ruta, Ubicacion
+from .normalizacion import clave_ruta, normalizar_lugar
+from .simulador import _escalar, obtener_datos_ruta
+
+# Distancia máxima (en centésimas de km) que cabe en Ruta.distancia_km
+_campo_distancia = Ruta._meta.get_field('distancia_km')
+DISTANCIA_MAXIMA = 10 ** _campo_distancia.max_digits - 1
+
+
+class GrafoRutas:
+    """
+    Red de lugares (nodos) unidos por las rutas guardadas (aristas en ambos sentidos),
+    con la distancia en centésimas de km como peso y el tiempo en minutos.
+    Las instancias son compartidas entre peticiones: los cambios crean un grafo nuevo
+    que comparte con el anterior los nodos que no cambiaron.
+    """
+
+    def __init__(self, aristas=(), frecuentes=()):
+        self.indices = {}
+        self.vecinos = []
+        for origen, destino, distancia, tiempo in aristas:
+            self._unir(self._nodo(origen), self._nodo(destino), distancia, tiempo)
+        self.frecuentes = frozenset(self.indices[lugar] for lugar in frecuentes if lugar in self.indices)
+        self._arboles = {}
+        self._lock = threading.Lock()
+
+    def _nodo(self, lugar):
+        indice = self.indices.get(lugar)
+        if indice is None:
+            indice = self.indices[lugar] = len(self.vecinos)
+            self.vecinos.append({})
+        return indice
+
+    def _unir(self, a, b, distancia, tiempo):
+        if a != b:
+            self.vecinos[a][b] = (distancia, tiempo)
+            self.vecinos[b][a] = (distancia, tiempo)
+
+    def con_cambios(self, retiradas=(), agregadas=()):
+        """
+        Devuelve un grafo nuevo sin las aristas `retiradas` (pares de lugares) y con las
+        `agregadas` (origen, destino, distancia, tiempo). Solo se copian los nodos afectados.
+        """
+        nuevo = GrafoRutas.__new__(GrafoRutas)
+        nuevo.indices = dict(self.indices)
+        nuevo.vecinos = list(self.vecinos)
+        nuevo.frecuentes = self.frecuentes
+        nuevo._arboles = {}
+        nuevo._lock = threading.Lock()
+        copiados = set()
+
+        def propio(indice):
+            if indice not in copiados:
+                nuevo.vecinos[indice] = dict(nuevo.vecinos[indice])
+                copiados.add(indice)
+            return indice
+
+        for origen, destino in retiradas:
+            a, b = nuevo.indices.get(origen), nuevo.indices.get(destino)
+            if a is not None and b is not None:
+                nuevo.vecinos[propio(a)].pop(b, None)
+                nuevo.vecinos[propio(b)].pop(a, None)
+        for origen, destino, distancia, tiempo in agregadas:
+            a, b = nuevo._nodo(origen), nuevo._nodo(destino)
+            copiados.update(i for i in (a, b) if i >= len(self.vecinos))
+            nuevo._unir(propio(a), propio(b), distancia, tiempo)
+        return nuevo
+
+    def _dijkstra(self, fuente, objetivo=None):
+        """
+        Caminos más cortos (por distancia) desde `fuente`. Si se indica `objetivo`,
+        se detiene al llegar a él. Devuelve dos diccionarios nodo -> distancia y nodo -> tiempo.
+        """
+        distancias = {fuente: 0}
+        tiempos = {fuente: 0}
+        cerrados = set()
+        cola = [(0, fuente)]
+        while cola:
+            distancia, nodo = heappop(cola)
+            if nodo in cerrados:
+                continue
+            if nodo == objetivo:
+                break
+            cerrados.add(nodo)
+            tiempo = tiempos[nodo]
+            for vecino, (tramo, minutos) in self.vecinos[nodo].items():
+                nueva = distancia + tramo
+                if nueva < distancias.get(vecino, nueva + 1):
+                    distancias[vecino] = nueva
+                    tiempos[vecino] = tiempo + minutos
+                    heappush(cola, (nueva, vecino))
+        return distancias, tiempos
+
+    def _arbol(self, fuente):
+        """
+        Distancias y tiempos desde un lugar frecuente a todos los demás,
+        calculados una vez por grafo y guardados en arreglos compactos (-1: sin camino).
+        """
+        arbol = self._arboles.get(fuente)
+        if arbol is None:
+            distancias, tiempos = self._dijkstra(fuente)
+            arbol = (array('q', [-1]) * len(self.vecinos), array('q', [-1]) * len(self.vecinos))
+            for nodo, distancia in distancias.items():
+                arbol[0][nodo] = distancia
+                arbol[1][nodo] = tiempos[nodo]
+            with self._lock:
+                self._arboles[fuente] = arbol
+        return arbol
+
+    def precalcular(self):
+        """
+        Calcula de una vez los árboles de todos los lugares frecuentes.
+        """
+        for fuente in self.frecuentes:
+            self._arbol(fuente)
+
+    def camino(self, origen, destino):
+        """
+        Distancia (centésimas de km) y tiempo del camino más corto entre dos lugares
+        normalizados, o None si no están conectados.
+        """
+        a, b = self.indices.get(origen), self.indices.get(destino)
+        if a is None or b is None or a == b:
+            return None
+        if b in self.frecuentes:
+            a, b = b, a
+        if a in self.frecuentes:
+            distancias, tiempos = self._arbol(a)
+            return (distancias[b], tiempos[b]) if distancias[b] >= 0 else None
+        distancias, tiempos = self._dijkstra(a, objetivo=b)
+        return (distancias[b], tiempos[b]) if b in distancias else None
+
+
+def arista_ruta(ruta):
+    """
+    Arista (origen, destino, distancia en centésimas de km, tiempo) de una ruta.
+    """
+    return (
+        normalizar_lugar(ruta.origen),
+        normalizar_lugar(ruta.destino),
+        _escalar(str(ruta.distancia_km), 2),
+        int(ruta.tiempo_min),
+    )
+
+
+def _construir_grafo():
+    aristas = (
+        (normalizar_lugar(origen), normalizar_lugar(destino), _escalar(distancia_km, 2), tiempo_min)
+        for origen, destino, distancia_km, tiempo_min in (
+            Ruta.objects.filter(estimada=False).order_by()
+            .values_list('origen', 'destino', 'distancia_km', 'tiempo_min').iterator(chunk_size=5000)
+        )
+    )
+    cantidad = getattr(settings, 'COTIZADOR_GRAFO_FRECUENTES', 32)
+    frecuentes = Ubicacion.objects.order_by('-num_rutas').values_list('nombre_normalizado', flat=True)[:cantidad]
+    return GrafoRutas(aristas, list(frecuentes))
+
+
+class GrafoVersionado:
+    """
+    Grafo de rutas en memoria con su propio contador de generación ('grafo').
+    El proceso que guarda una ruta aplica el cambio a su copia sin reconstruirla;
+    los demás procesos ven la generación nueva y la reconstruyen desde la base de datos.
+    """
+    nombre = 'grafo'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._grafo = None
+        self._generacion = None
+
+    def obtener(self):
+        generacion = obtener_generacion(self.nombre)
+        if self._generacion != generacion:
+            with self._lock:
+                if self._generacion != generacion:
+                    self._grafo = _construir_grafo()
+                    self._generacion = generacion
+        return self._grafo
+
+    def actualizar(self, retiradas=(), agregadas=()):
+        generacion = incrementar_generacion(self.nombre)
+        with self._lock:
+            # Solo si la copia estaba al día; si no, se reconstruirá en la próxima consulta
+            if self._grafo is not None and self._generacion == generacion - 1:
+                self._grafo = self._grafo.con_cambios(retiradas, agregadas)
+                self._generacion = generacion
+
+    def invalidar(self):
+        incrementar_generacion(self.nombre)
+
+
+grafo_rutas = GrafoVersionado()
+
+# Caminos calculados recientemente por clave de ruta; se vacía cuando cambia la generación 'grafo'
+caminos_recientes = CacheLRU('grafo', getattr(settings, 'COTIZADOR_CACHE_RUTAS', 1024))
+
+
+def componer_ruta(origen, destino):
+    """
+    Ruta sin guardar entre dos lugares sin ruta directa, por el camino más corto
+    en el grafo de rutas. Devuelve None si no hay camino (o no cabe en una Ruta).
+    """
+    def calcular(clave):
+        return grafo_rutas.obtener().camino(normalizar_lugar(origen), normalizar_lugar(destino))
+
+    camino = caminos_recientes.obtener(clave_ruta(origen, destino), calcular)
+    if camino is None or camino[0] > DISTANCIA_MAXIMA:
+        return None
+    distancia, tiempo = camino
+    ruta = Ruta(origen=origen, destino=destino, distancia_km=Decimal(distancia).scaleb(-2), tiempo_min=tiempo)
+    ruta.clave = clave_ruta(origen, destino)
+    return ruta
+
+
+def ruta_aproximada(origen, destino):
+    """
+    Ruta sin guardar entre dos lugares sin ruta directa: el camino más corto por las rutas
+    guardadas o, si no lo hay, la estimada por coordenadas. None si no cabe en una Ruta.
+    """
+    ruta = componer_ruta(origen, destino) or estimar_ruta(origen, destino)
+    if ruta is None or _escalar(ruta.distancia_km, 2) > DISTANCIA_MAXIMA:
+        return None
+    return ruta
+
+
+def buscar_ruta(origen, destino):
+    """
+    Ruta directa entre los lugares o, si no existe, una aproximada (sin guardar).
+    """
+    ruta = obtener_datos_ruta(origen, destino)
+    if ruta is None:
+        ruta = ruta_aproximada(origen, destino)
+    return ruta
+
+
+def materializar_ruta(origen, destino, usuario=None):
+    """
+    Guarda la ruta aproximada entre dos lugares como ruta estimada (al seleccionar una
+    cotización), para que la cotización conserve la distancia y el tiempo cotizados.
+    No agrega una arista al grafo: el par se sigue componiendo con las rutas directas.
+    Si ya hay una ruta estimada igual, la reutiliza. Devuelve la ruta guardada, o None
+    si no hay forma de aproximarla.
+    """
+    ruta = ruta_aproximada(origen, destino)
+    if ruta is None:
+        return None
+    # La restricción ruta_estimada_unica evita duplicados entre peticiones simultáneas: si otra
+    # inserta la misma fila primero, get_or_create recibe el IntegrityError y vuelve a buscarla
+    ruta, _ = Ruta.objects.get_or_create(
+        estimada=True, origen=ruta.origen, destino=ruta.destino,
+        distancia_km=ruta.distancia_km, tiempo_min=ruta.tiempo_min,
+        defaults={'creado_por': usuario},
+    )
+    return ruta
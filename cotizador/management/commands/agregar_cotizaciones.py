@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from cotizador.analitica import agregar_cotizaciones
+
+
+class Command(BaseCommand):
+    help = ("Incorpora a los resúmenes diarios por (ruta, app) las cotizaciones nuevas desde la última corrida. "
+            "Pensado para ejecutarse periódicamente (cron).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=20000, help="Cotizaciones por transacción")
+        parser.add_argument('--reconstruir', action='store_true',
+                            help="Recalcula los resúmenes de los días aún en la tabla (refleja ediciones y "
+                                 "eliminaciones); los de días archivados se conservan")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        procesadas, grupos = agregar_cotizaciones(options['lote'], reconstruir=options['reconstruir'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{procesadas} cotizaciones agregadas en {grupos} resúmenes en {time.perf_counter() - inicio:.1f}s"
+        ))
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from cotizador.archivo import archivar_cotizaciones, horizonte_retencion
+from cotizador.models import CotizacionTraslado
+
+
+class Command(BaseCommand):
+    help = ("Mueve las cotizaciones más antiguas que el horizonte de retención (COTIZADOR_RETENCION_DIAS) "
+            "a archivos JSONL comprimidos por mes y las borra de la tabla en lotes cortos. "
+            "Antes agrega las cotizaciones pendientes a los resúmenes diarios, que se conservan, y "
+            "verifica los de cada día antes de borrar sus filas.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, help="Días a conservar en la tabla (por omisión, COTIZADOR_RETENCION_DIAS)")
+        parser.add_argument('--directorio', help="Directorio de los archivos (por omisión, COTIZADOR_ARCHIVO_DIRECTORIO)")
+        parser.add_argument('--lote', type=int, default=2000, help="Cotizaciones borradas por transacción")
+        parser.add_argument('--pausa', type=float, default=0.0, help="Segundos de espera entre lotes")
+        parser.add_argument('--simular', action='store_true', help="Solo informa cuántas cotizaciones se archivarían")
+
+    def handle(self, *args, **options):
+        antes_de = horizonte_retencion(options['dias'])
+        if options['simular']:
+            cantidad = CotizacionTraslado.objects.filter(fecha_creacion__lt=antes_de).count()
+            self.stdout.write(f"Se archivarían {cantidad} cotizaciones anteriores a {antes_de:%Y-%m-%d %H:%M}")
+            return
+
+        inicio = time.perf_counter()
+        archivadas = archivar_cotizaciones(
+            antes_de, options['directorio'], tamano_lote=options['lote'], pausa=options['pausa']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{archivadas} cotizaciones anteriores a {antes_de:%Y-%m-%d %H:%M} archivadas "
+            f"en {time.perf_counter() - inicio:.1f}s"
+        ))
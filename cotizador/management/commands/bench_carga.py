@@ -0,0 +1,243 @@
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.cookiejar import CookieJar
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from cotizador.models import Ruta
+from cotizador.rendimiento import campos_redireccion, informe, resumen_latencias
+from cotizador.management.commands.sembrar_catalogo import CLAVE_USUARIOS, PREFIJO_LUGAR, PREFIJO_USUARIO
+
+_EDITAR = re.compile(r'href="(/cotizacion/editar/\d+/)"')
+_CAMPO_TEXTO = re.compile(r'<input[^>]*name="(origen|destino)"[^>]*value="([^"]*)"')
+_OPCION = re.compile(r'<option value="(\d+)"')
+_METRICA_CONSULTAS = re.compile(r'^cotizador_bd_consultas_(sum|count)\{vista="([^"]+)"\} (\S+)$', re.M)
+
+
+class _SinRedirecciones(urllib.request.HTTPRedirectHandler):
+    # RedireccionView envía a la página externa de la app: la redirección se mide, no se sigue
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class Sesion:
+    """
+    Usuario simulado: un cliente HTTP con sus cookies (sesión y CSRF).
+    """
+
+    def __init__(self, base, timeout):
+        self.base = base.rstrip('/')
+        self.timeout = timeout
+        self.cookies = CookieJar()
+        self.cliente = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), _SinRedirecciones
+        )
+
+    def _csrf(self):
+        return next((cookie.value for cookie in self.cookies if cookie.name == 'csrftoken'), '')
+
+    def solicitar(self, ruta, datos=None):
+        """
+        Devuelve (código de estado, cuerpo). Los datos se envían por POST con el token CSRF.
+        """
+        cuerpo = None
+        encabezados = {}
+        if datos is not None:
+            cuerpo = urllib.parse.urlencode({**datos, 'csrfmiddlewaretoken': self._csrf()}).encode()
+            encabezados['Referer'] = self.base + ruta
+        solicitud = urllib.request.Request(self.base + ruta, data=cuerpo, headers=encabezados)
+        try:
+            with self.cliente.open(solicitud, timeout=self.timeout) as respuesta:
+                return respuesta.status, respuesta.read().decode('utf-8', 'replace')
+        except urllib.error.HTTPError as error:
+            return error.code, error.read().decode('utf-8', 'replace')
+
+    def iniciar_sesion(self, usuario, clave):
+        self.solicitar('/usuarios/login/')
+        estado, _ = self.solicitar('/usuarios/login/', {'username': usuario, 'password': clave})
+        return estado == 302
+
+
+def _puerto_libre():
+    with socket.socket() as conexion:
+        conexion.bind(('127.0.0.1', 0))
+        return conexion.getsockname()[1]
+
+
+def _esperar_servidor(url, proceso, limite=30):
+    fin = time.monotonic() + limite
+    while time.monotonic() < fin:
+        if proceso.poll() is not None:
+            raise CommandError("gunicorn terminó antes de aceptar conexiones")
+        try:
+            urllib.request.urlopen(url + '/usuarios/login/', timeout=1).close()
+            return
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.2)
+    raise CommandError("gunicorn no respondió a tiempo")
+
+
+class Command(BaseCommand):
+    help = ("Genera carga HTTP concurrente sobre un servidor (o un gunicorn local que inicia) recorriendo "
+            "los flujos del cotizador con los usuarios de sembrar_catalogo. Informa rendimiento y "
+            "latencias p50/p95/p99 por flujo en JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--iniciar-gunicorn', action='store_true',
+                            help="Inicia gunicorn (damy.wsgi) en un puerto libre y lo detiene al terminar")
+        parser.add_argument('--workers', type=int, default=2, help="Workers de gunicorn (con --iniciar-gunicorn)")
+        parser.add_argument('--concurrencia', type=int, default=8, help="Usuarios simulados en paralelo")
+        parser.add_argument('--duracion', type=float, default=20, help="Segundos de carga")
+        parser.add_argument('--usuarios', type=int, default=20, help="Usuarios sembrados disponibles (bench_0 ...)")
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--semilla', type=int, default=2025)
+        parser.add_argument('--salida', help="Archivo donde guardar el JSON (por omisión, la salida estándar)")
+
+    def handle(self, *args, **options):
+        pares = list(Ruta.objects.filter(origen__startswith=PREFIJO_LUGAR).values_list('origen', 'destino'))
+        if not pares:
+            raise CommandError("No hay un catálogo sembrado: ejecute antes sembrar_catalogo.")
+
+        servidor = None
+        url = options['url']
+        if options['iniciar_gunicorn']:
+            url = f"http://127.0.0.1:{_puerto_libre()}"
+            entorno = {**os.environ, 'COTIZADOR_METRICAS_MUESTREO': '1.0'}
+            servidor = subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn', 'damy.wsgi:application',
+                 '--bind', url.removeprefix('http://'), '--workers', str(options['workers']),
+                 '--timeout', str(int(options['timeout']) + 5), '--log-level', 'warning'],
+                cwd=settings.BASE_DIR, env=entorno,
+            )
+        try:
+            if servidor is not None:
+                _esperar_servidor(url, servidor)
+            flujos, segundos = self._cargar(url, pares, options)
+            consultas = self._consultas_por_vista(url)
+        finally:
+            if servidor is not None:
+                servidor.terminate()
+                servidor.wait(10)
+
+        parametros = {
+            clave: options[clave]
+            for clave in ('concurrencia', 'duracion', 'usuarios', 'semilla', 'workers', 'iniciar_gunicorn')
+        }
+        parametros['url'] = url
+        resultado = informe('carga', parametros, {
+            flujo: resumen_latencias(duraciones, segundos=segundos, errores=errores)
+            for flujo, (duraciones, errores) in flujos.items()
+            if duraciones or errores
+        })
+        if consultas:
+            resultado['consultas_por_vista'] = consultas
+        resultado = json.dumps(resultado, indent=2, ensure_ascii=False)
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                archivo.write(resultado + "\n")
+            self.stderr.write(self.style.SUCCESS(f"Resultados guardados en {options['salida']}"))
+        else:
+            self.stdout.write(resultado)
+
+    def _cargar(self, url, pares, options):
+        flujos = {}
+        lock = threading.Lock()
+        fallas = []
+        periodo = {}
+
+        def comenzar():
+            # La carga se mide desde que todos los usuarios simulados iniciaron sesión
+            periodo['inicio'] = time.perf_counter()
+            periodo['fin'] = time.monotonic() + options['duracion']
+
+        listos = threading.Barrier(options['concurrencia'], action=comenzar)
+
+        def medir(sesion, flujo, ruta, datos=None, esperado=200):
+            inicio = time.perf_counter()
+            try:
+                estado, cuerpo = sesion.solicitar(ruta, datos)
+            except OSError:
+                estado, cuerpo = None, ''
+            duracion = time.perf_counter() - inicio
+            with lock:
+                duraciones, errores = flujos.setdefault(flujo, ([], 0))
+                if estado == esperado:
+                    duraciones.append(duracion)
+                else:
+                    flujos[flujo] = (duraciones, errores + 1)
+            return cuerpo if estado == esperado else None
+
+        def usuario_simulado(numero):
+            azar = random.Random(options['semilla'] + numero)
+            sesion = Sesion(url, options['timeout'])
+            conectado = sesion.iniciar_sesion(f"{PREFIJO_USUARIO}{numero % options['usuarios']}", CLAVE_USUARIOS)
+            listos.wait()
+            if not conectado:
+                fallas.append(numero)
+                return
+            while time.monotonic() < periodo['fin']:
+                medir(sesion, 'home', '/')
+                origen, destino = azar.choice(pares)
+                resultados = medir(sesion, 'cotizar', '/', {'origen': origen, 'destino': destino})
+                seleccionables = campos_redireccion(resultados or '')
+                if seleccionables:
+                    accion, datos = azar.choice(seleccionables)
+                    medir(sesion, 'redireccion', accion, datos, esperado=302)
+
+                listado = medir(sesion, 'mis_cotizaciones', '/mis_cotizaciones/') or ''
+                enlaces = _EDITAR.findall(listado)
+                if not enlaces:
+                    continue
+                ruta_editar = enlaces[0]
+                formulario = medir(sesion, 'editar', ruta_editar) or ''
+                campos = dict(_CAMPO_TEXTO.findall(formulario))
+                opciones = _OPCION.findall(formulario)
+                if len(campos) == 2 and len(opciones) > 1:
+                    medir(sesion, 'editar_app', ruta_editar, {**campos, 'app_seleccionada': azar.choice(opciones)}, esperado=302)
+
+        hilos = [threading.Thread(target=usuario_simulado, args=(i,)) for i in range(options['concurrencia'])]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        segundos = time.perf_counter() - periodo['inicio']
+        if fallas:
+            self.stderr.write(self.style.WARNING(
+                f"{len(fallas)} usuarios simulados no pudieron iniciar sesión (¿faltan usuarios sembrados?)"
+            ))
+        return flujos, segundos
+
+    def _consultas_por_vista(self, url):
+        """
+        Consultas promedio por solicitud de cada vista según /metricas/ (las de uno de los
+        workers, que es una muestra del total). Requiere COTIZADOR_METRICAS_TOKEN.
+        """
+        token = settings.COTIZADOR_METRICAS_TOKEN
+        if not token:
+            return None
+        solicitud = urllib.request.Request(url + '/metricas/', headers={'Authorization': f'Bearer {token}'})
+        try:
+            with urllib.request.urlopen(solicitud, timeout=10) as respuesta:
+                texto = respuesta.read().decode()
+        except (urllib.error.URLError, OSError):
+            return None
+        valores = {}
+        for tipo, vista, valor in _METRICA_CONSULTAS.findall(texto):
+            valores.setdefault(vista, {})[tipo] = float(valor)
+        return {
+            vista: round(valor['sum'] / valor['count'], 2)
+            for vista, valor in sorted(valores.items())
+            if valor.get('count')
+        }
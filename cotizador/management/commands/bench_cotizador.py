@@ -0,0 +1,83 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from cotizador.models import Ruta, TransporteApp
+from cotizador.simulador import AppCotizadora, CotizadorLote
+
+
+def _apps_sinteticas(cantidad, azar):
+    return [
+        TransporteApp(
+            pk=i + 1,
+            nombre=f"App {i + 1}",
+            precio_base=Decimal(azar.randint(100000, 500000)) / 100,
+            costo_por_km=Decimal(azar.randint(50000, 120000)) / 100,
+            costo_por_min=Decimal(azar.randint(5000, 20000)) / 100,
+            factor_dinamico=Decimal(azar.randint(80, 250)) / 100,
+        )
+        for i in range(cantidad)
+    ]
+
+
+def _rutas_sinteticas(cantidad, azar):
+    return [
+        Ruta(
+            origen=f"Origen {i}",
+            destino=f"Destino {i}",
+            distancia_km=Decimal(azar.randint(50, 99999)) / 100,
+            tiempo_min=azar.randint(1, 180),
+        )
+        for i in range(cantidad)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Compara el cotizador por lotes contra el ciclo de AppCotizadora (no usa la base de datos)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--apps', type=int, nargs='+', default=[10, 100, 1000])
+        parser.add_argument('--rutas', type=int, default=50)
+        parser.add_argument('--repeticiones', type=int, default=5)
+        parser.add_argument('--semilla', type=int, default=2025)
+
+    def handle(self, *args, **options):
+        azar = random.Random(options['semilla'])
+        rutas = _rutas_sinteticas(options['rutas'], azar)
+        repeticiones = options['repeticiones']
+
+        self.stdout.write(f"{'apps':>6} {'ciclo (ms)':>12} {'lote (ms)':>12} {'mejora':>8}")
+        for cantidad in options['apps']:
+            apps = _apps_sinteticas(cantidad, azar)
+
+            def ciclo():
+                return [
+                    [AppCotizadora(app, ruta).calcular_cotizacion()['precio'] for app in apps]
+                    for ruta in rutas
+                ]
+
+            def lote():
+                return CotizadorLote(apps).calcular_matriz(rutas)
+
+            if ciclo() != lote():
+                self.stderr.write(self.style.ERROR(f"Los precios no coinciden con {cantidad} apps"))
+                return
+
+            tiempo_ciclo = self._medir(ciclo, repeticiones)
+            tiempo_lote = self._medir(lote, repeticiones)
+            self.stdout.write(
+                f"{cantidad:>6} {tiempo_ciclo * 1000:>12.2f} {tiempo_lote * 1000:>12.2f} "
+                f"{tiempo_ciclo / tiempo_lote:>7.1f}x"
+            )
+
+    @staticmethod
+    def _medir(funcion, repeticiones):
+        # Se reporta el mejor tiempo para reducir el ruido
+        mejor = float('inf')
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion()
+            mejor = min(mejor, time.perf_counter() - inicio)
+        return mejor
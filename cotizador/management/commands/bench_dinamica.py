@@ -0,0 +1,104 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from cotizador.dinamica import HORAS_SEMANA, SIN_RECARGO, TablaDinamica
+from cotizador.management.commands.bench_cotizador import _apps_sinteticas, _rutas_sinteticas
+from cotizador.normalizacion import normalizar_lugar
+from cotizador.simulador import CotizadorLote
+from cotizador.ubicaciones import IndiceUbicaciones
+
+
+def _franjas_sinteticas(apps, zonas, por_app, azar):
+    franjas = []
+    for app in apps:
+        for _ in range(por_app):
+            hora_inicio = azar.randint(0, 22)
+            franjas.append((
+                app.pk,
+                azar.choice(zonas + ['']),
+                azar.choice([None, *range(7)]),
+                hora_inicio,
+                azar.randint(hora_inicio + 1, 24),
+                Decimal(azar.randint(100, 300)) / 100,
+            ))
+    return franjas
+
+
+class Command(BaseCommand):
+    help = "Mide cuánto agrega el recargo por horario y zona a cada cotización (no usa la base de datos)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--apps', type=int, default=10)
+        parser.add_argument('--rutas', type=int, default=5000)
+        parser.add_argument('--zonas', type=int, default=50)
+        parser.add_argument('--franjas', type=int, default=20, help="Franjas por app")
+        parser.add_argument('--repeticiones', type=int, default=5)
+        parser.add_argument('--semilla', type=int, default=2025)
+
+    def handle(self, *args, **options):
+        azar = random.Random(options['semilla'])
+        apps = _apps_sinteticas(options['apps'], azar)
+        rutas = _rutas_sinteticas(options['rutas'], azar)
+        zonas = [f"Zona {i}" for i in range(options['zonas'])]
+        indice = IndiceUbicaciones(
+            [ruta.origen for ruta in rutas],
+            {normalizar_lugar(ruta.origen): normalizar_lugar(azar.choice(zonas)) for ruta in rutas},
+        )
+
+        inicio = time.perf_counter()
+        tabla = TablaDinamica(_franjas_sinteticas(apps, zonas, options['franjas'], azar))
+        compilacion = time.perf_counter() - inicio
+
+        cotizador = CotizadorLote(apps)
+        app_ids = [app.pk for app in apps]
+        horas = [azar.randrange(HORAS_SEMANA) for _ in rutas]
+
+        def sin_recargo():
+            return [cotizador.calcular_precios(ruta) for ruta in rutas]
+
+        def solo_busqueda():
+            return [tabla.multiplicadores(app_ids, indice.zona(ruta.origen), hora) for ruta, hora in zip(rutas, horas)]
+
+        def con_recargo():
+            precios = []
+            for ruta, hora in zip(rutas, horas):
+                multiplicadores = tabla.multiplicadores(app_ids, indice.zona(ruta.origen), hora)
+                if all(multiplicador == SIN_RECARGO for multiplicador in multiplicadores):
+                    multiplicadores = None
+                precios.append(cotizador.calcular_precios(ruta, multiplicadores))
+            return precios
+
+        repeticiones = options['repeticiones']
+        cantidad = len(rutas)
+        tiempo_base = self._medir(sin_recargo, repeticiones)
+        tiempo_busqueda = self._medir(solo_busqueda, repeticiones)
+        tiempo_recargo = self._medir(con_recargo, repeticiones)
+
+        self.stdout.write(
+            f"Tablas compiladas: {len(tabla.tablas)} ({len(tabla.tablas) * HORAS_SEMANA * 2 / 1024:.1f} KiB) "
+            f"en {compilacion * 1000:.1f} ms"
+        )
+        self.stdout.write(f"{'':<22} {'µs/cotización':>14} {'cotizaciones/s':>15}")
+        for etiqueta, tiempo in (
+            ('sin recargo', tiempo_base),
+            ('búsqueda de recargo', tiempo_busqueda),
+            ('con recargo', tiempo_recargo),
+        ):
+            self.stdout.write(f"{etiqueta:<22} {tiempo / cantidad * 1e6:>14.2f} {cantidad / tiempo:>15,.0f}")
+        self.stdout.write(
+            f"El recargo agrega {(tiempo_recargo - tiempo_base) / cantidad * 1e6:.2f} µs por cotización "
+            f"({options['apps']} apps)."
+        )
+
+    @staticmethod
+    def _medir(funcion, repeticiones):
+        # Se reporta el mejor tiempo para reducir el ruido
+        mejor = float('inf')
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion()
+            mejor = min(mejor, time.perf_counter() - inicio)
+        return mejor
@@ -0,0 +1,129 @@
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+
+from cotizador.models import CotizacionTraslado, Ruta, TransporteApp
+from cotizador.rendimiento import informe, resumen_latencias
+
+# Configuración por omisión de SQLite (journal en archivo aparte, fsync en cada commit)
+PRAGMAS_PREDETERMINADOS = {'journal_mode': 'DELETE', 'synchronous': 'FULL', 'busy_timeout': 20000}
+
+
+def _trabajar(tipo, duracion, inicio, datos, resultados):
+    """
+    Proceso hijo (como un worker de gunicorn): escribe cotizaciones de a una, como
+    RedireccionView, o lee el historial de un usuario, durante `duracion` segundos.
+    """
+    connections.close_all()
+    duraciones, errores = [], 0
+    while time.time() < inicio:
+        time.sleep(0.001)
+    fin = inicio + duracion
+    while time.time() < fin:
+        comienzo = time.perf_counter()
+        try:
+            if tipo == 'escrituras':
+                CotizacionTraslado.objects.create(
+                    precio=Decimal("12500"), tiempo_espera=5, factor_dinamico=Decimal("1.2"), **datos
+                )
+            else:
+                list(CotizacionTraslado.objects.filter(usuario_id=datos['usuario_id']).order_by('-fecha_creacion', '-id')[:20])
+        except OperationalError:
+            errores += 1
+            continue
+        duraciones.append(time.perf_counter() - comienzo)
+    connections.close_all()
+    resultados.put((tipo, duraciones, errores))
+
+
+class Command(BaseCommand):
+    help = ("Compara el rendimiento de escrituras concurrentes (procesos como workers de gunicorn) en SQLite "
+            "con la configuración por omisión y con COTIZADOR_SQLITE_PRAGMAS, sobre una base de datos temporal.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escritores', type=int, default=4, help="Procesos que escriben")
+        parser.add_argument('--lectores', type=int, default=2, help="Procesos que leen a la vez")
+        parser.add_argument('--duracion', type=float, default=5, help="Segundos por configuración")
+        parser.add_argument('--salida', help="Archivo donde guardar el JSON (por omisión, la salida estándar)")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("Este benchmark es para SQLite (sin DATABASE_URL).")
+
+        pragmas_originales = settings.COTIZADOR_SQLITE_PRAGMAS
+        opciones_originales = dict(connection.settings_dict['OPTIONS'])
+        nombre_original = connection.settings_dict['NAME']
+        flujos = {}
+        with tempfile.TemporaryDirectory() as directorio:
+            connection.settings_dict['TEST']['NAME'] = os.path.join(directorio, 'bench.sqlite3')
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                usuario = User.objects.create(username='bench_escrituras')
+                app = TransporteApp.objects.create(
+                    nombre="Bench App", precio_base=2000, costo_por_km=800, costo_por_min=100, factor_dinamico=1,
+                )
+                ruta = Ruta.objects.create(origen="Lugar Bench A", destino="Lugar Bench B", distancia_km=10, tiempo_min=20)
+                datos = {'usuario_id': usuario.pk, 'app_seleccionada_id': app.pk, 'ruta_id': ruta.pk}
+
+                configuraciones = (
+                    ('predeterminado', PRAGMAS_PREDETERMINADOS, {k: v for k, v in opciones_originales.items() if k != 'transaction_mode'}),
+                    ('ajustado', pragmas_originales, opciones_originales),
+                )
+                for nombre, pragmas, opciones in configuraciones:
+                    settings.COTIZADOR_SQLITE_PRAGMAS = pragmas
+                    connection.settings_dict['OPTIONS'] = opciones
+                    connections.close_all()
+                    # Al reconectar se aplica (y queda guardado) el journal_mode de la configuración
+                    connection.ensure_connection()
+                    connections.close_all()
+                    for tipo, resumen in self._medir(datos, options).items():
+                        flujos[f"{nombre}_{tipo}"] = resumen
+                    self.stderr.write(f"{nombre}: {flujos[f'{nombre}_escrituras']['por_segundo']} escrituras/s")
+            finally:
+                settings.COTIZADOR_SQLITE_PRAGMAS = pragmas_originales
+                connection.settings_dict['OPTIONS'] = opciones_originales
+                connections.close_all()
+                connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+        parametros = {clave: options[clave] for clave in ('escritores', 'lectores', 'duracion')}
+        resultado = informe('escrituras', parametros, flujos)
+        base, ajustado = flujos['predeterminado_escrituras']['por_segundo'], flujos['ajustado_escrituras']['por_segundo']
+        resultado['mejora_escrituras'] = round(ajustado / base, 2) if base and ajustado else None
+        resultado = json.dumps(resultado, indent=2, ensure_ascii=False)
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                archivo.write(resultado + "\n")
+            self.stderr.write(self.style.SUCCESS(f"Resultados guardados en {options['salida']}"))
+        else:
+            self.stdout.write(resultado)
+
+    def _medir(self, datos, options):
+        contexto = multiprocessing.get_context('fork')
+        resultados = contexto.Queue()
+        inicio = time.time() + 0.5
+        tipos = ['escrituras'] * options['escritores'] + ['lecturas'] * options['lectores']
+        procesos = [
+            contexto.Process(target=_trabajar, args=(tipo, options['duracion'], inicio, datos, resultados))
+            for tipo in tipos
+        ]
+        for proceso in procesos:
+            proceso.start()
+        acumulado = {}
+        for _ in procesos:
+            tipo, duraciones, errores = resultados.get()
+            todas, fallidas = acumulado.get(tipo, ([], 0))
+            acumulado[tipo] = (todas + duraciones, fallidas + errores)
+        for proceso in procesos:
+            proceso.join()
+        return {
+            tipo: resumen_latencias(duraciones, segundos=options['duracion'], errores=errores)
+            for tipo, (duraciones, errores) in acumulado.items()
+        }
@@ -0,0 +1,138 @@
+import json
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from cotizador.models import CotizacionTraslado, Ruta, TransporteApp
+from cotizador.rendimiento import campos_redireccion, informe, resumen_latencias
+from cotizador.management.commands.sembrar_catalogo import PREFIJO_USUARIO, sembrar_catalogo
+
+FLUJOS = ('home', 'cotizar', 'redireccion', 'mis_cotizaciones', 'mis_cotizaciones_pagina', 'editar', 'editar_app')
+
+
+class ContadorConsultas:
+    """
+    Cuenta las consultas de una solicitud y el tiempo que pasan en la base de datos
+    (se usa con connection.execute_wrapper()).
+    """
+
+    def __init__(self):
+        self.consultas = 0
+        self.segundos = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.consultas += 1
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos += time.perf_counter() - inicio
+
+
+class Command(BaseCommand):
+    help = ("Mide los flujos del cotizador (inicio, cotizar, seleccionar, mis cotizaciones y editar) "
+            "con el cliente de pruebas de Django sobre una base de datos temporal con un catálogo sembrado. "
+            "Informa rendimiento, latencias p50/p95/p99 y consultas por solicitud en JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--apps', type=int, default=10)
+        parser.add_argument('--rutas', type=int, default=2000)
+        parser.add_argument('--usuarios', type=int, default=10)
+        parser.add_argument('--cotizaciones', type=int, default=20000)
+        parser.add_argument('--iteraciones', type=int, default=100, help="Solicitudes por flujo")
+        parser.add_argument('--semilla', type=int, default=2025)
+        parser.add_argument('--salida', help="Archivo donde guardar el JSON (por omisión, la salida estándar)")
+
+    def handle(self, *args, **options):
+        parametros = {clave: options[clave] for clave in ('apps', 'rutas', 'usuarios', 'cotizaciones', 'iteraciones', 'semilla')}
+        # Nunca sobre la base de datos real: se crea una temporal y se borra al terminar
+        nombre_original = connection.settings_dict['NAME']
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            inicio = time.perf_counter()
+            sembrar_catalogo(
+                apps=options['apps'], rutas=options['rutas'], usuarios=options['usuarios'],
+                cotizaciones=options['cotizaciones'], semilla=options['semilla'],
+            )
+            self.stderr.write(f"Catálogo sembrado en {time.perf_counter() - inicio:.1f}s")
+            flujos = self._medir(options['iteraciones'], random.Random(options['semilla']))
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            teardown_test_environment()
+
+        resultado = json.dumps(informe('flujo', parametros, flujos), indent=2, ensure_ascii=False)
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                archivo.write(resultado + "\n")
+            self.stderr.write(self.style.SUCCESS(f"Resultados guardados en {options['salida']}"))
+        else:
+            self.stdout.write(resultado)
+
+    def _medir(self, iteraciones, azar):
+        clientes = []
+        for usuario in User.objects.filter(username__startswith=PREFIJO_USUARIO).order_by('pk'):
+            cliente = Client()
+            cliente.force_login(usuario)
+            clientes.append((usuario, cliente))
+        pares = list(Ruta.objects.values_list('origen', 'destino'))
+        app_ids = list(TransporteApp.objects.values_list('pk', flat=True))
+        mediciones = {flujo: ([], [], [0]) for flujo in FLUJOS}
+
+        def solicitar(flujo, metodo, url, datos=None, esperado=200):
+            duraciones, consultas, errores = mediciones[flujo]
+            contador = ContadorConsultas()
+            with connection.execute_wrapper(contador):
+                inicio = time.perf_counter()
+                respuesta = metodo(url, datos)
+                duraciones.append(time.perf_counter() - inicio)
+            consultas.append(contador.consultas)
+            if respuesta.status_code != esperado:
+                errores[0] += 1
+            return respuesta
+
+        for i in range(iteraciones):
+            usuario, cliente = clientes[i % len(clientes)]
+            solicitar('home', cliente.get, reverse('home'))
+
+            origen, destino = azar.choice(pares)
+            respuesta = solicitar('cotizar', cliente.post, reverse('home'), {'origen': origen, 'destino': destino})
+            seleccionables = campos_redireccion(respuesta.content.decode())
+            if seleccionables:
+                url, datos = azar.choice(seleccionables)
+                solicitar('redireccion', cliente.post, url, datos, esperado=302)
+
+            respuesta = solicitar('mis_cotizaciones', cliente.get, reverse('mis_cotizaciones'))
+            cursor = respuesta.context and respuesta.context.get('cursor_siguiente')
+            if cursor:
+                solicitar('mis_cotizaciones_pagina', cliente.get, reverse('mis_cotizaciones'), {'cursor': cursor})
+
+            cotizacion = (
+                CotizacionTraslado.objects.filter(usuario=usuario, ruta__isnull=False)
+                .select_related('ruta').order_by('-fecha_creacion').first()
+            )
+            if cotizacion is None:
+                continue
+            url = reverse('editar_cotizacion', args=[cotizacion.pk])
+            solicitar('editar', cliente.get, url)
+            otras_apps = [pk for pk in app_ids if pk != cotizacion.app_seleccionada_id]
+            if not otras_apps:
+                continue
+            solicitar('editar_app', cliente.post, url, {
+                'origen': cotizacion.ruta.origen,
+                'destino': cotizacion.ruta.destino,
+                'app_seleccionada': azar.choice(otras_apps),
+            }, esperado=302)
+
+        return {
+            flujo: resumen_latencias(duraciones, consultas=consultas, errores=errores[0])
+            for flujo, (duraciones, consultas, errores) in mediciones.items()
+            if duraciones
+        }
+
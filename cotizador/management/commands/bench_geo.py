@@ -0,0 +1,61 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from cotizador.geo import IndiceEspacial, haversine_km
+
+
+class Command(BaseCommand):
+    help = "Mide el índice espacial: búsqueda del lugar más cercano y estimación de distancias (no usa la base de datos)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--puntos', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--consultas', type=int, default=2000)
+        parser.add_argument('--semilla', type=int, default=2025)
+
+    def handle(self, *args, **options):
+        azar = random.Random(options['semilla'])
+        # Lugares repartidos en un rectángulo del tamaño aproximado de una región (~110 x 90 km)
+        latitudes, longitudes = (-34.0, -33.0), (-71.2, -70.2)
+
+        def punto():
+            return azar.uniform(*latitudes), azar.uniform(*longitudes)
+
+        consultas = [punto() for _ in range(options['consultas'])]
+        self.stdout.write(
+            f"{'lugares':>8} {'índice (ms)':>12} {'cercano (µs)':>13} {'fuerza bruta (µs)':>18} {'estimación (µs)':>16}"
+        )
+        for cantidad in options['puntos']:
+            puntos = [(f"lugar {i}", *punto()) for i in range(cantidad)]
+
+            inicio = time.perf_counter()
+            indice = IndiceEspacial(puntos)
+            construccion = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            cercanos = [indice.mas_cercano(latitud, longitud) for latitud, longitud in consultas]
+            tiempo_cercano = (time.perf_counter() - inicio) / len(consultas)
+
+            # Fuerza bruta sobre una muestra de consultas, para comparar y verificar
+            muestra = consultas[:50]
+            inicio = time.perf_counter()
+            esperados = [
+                min(puntos, key=lambda p: haversine_km(latitud, longitud, p[1], p[2]))[0]
+                for latitud, longitud in muestra
+            ]
+            tiempo_bruto = (time.perf_counter() - inicio) / len(muestra)
+            if esperados != cercanos[:len(muestra)]:
+                self.stderr.write(self.style.ERROR(f"El índice no coincide con la fuerza bruta ({cantidad} lugares)"))
+                return
+
+            pares = [(azar.choice(puntos)[0], azar.choice(puntos)[0]) for _ in consultas]
+            inicio = time.perf_counter()
+            for origen, destino in pares:
+                haversine_km(*indice.ubicar(origen), *indice.ubicar(destino))
+            tiempo_estimacion = (time.perf_counter() - inicio) / len(pares)
+
+            self.stdout.write(
+                f"{cantidad:>8} {construccion * 1000:>12.1f} {tiempo_cercano * 1e6:>13.1f} "
+                f"{tiempo_bruto * 1e6:>18.1f} {tiempo_estimacion * 1e6:>16.1f}"
+            )
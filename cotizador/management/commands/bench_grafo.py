@@ -0,0 +1,101 @@
+import math
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from cotizador.grafo import GrafoRutas
+
+
+def _red_sintetica(nodos, grado, azar):
+    """
+    Lugares repartidos en un plano de 100 x 100 km, cada uno unido a sus vecinos más cercanos
+    de la grilla (distancia en centésimas de km, tiempo a ~30 km/h), más una cadena que
+    garantiza que la red es conexa.
+    """
+    lado = math.ceil(math.sqrt(nodos))
+    celda = 100 / lado
+    puntos = [
+        ((i % lado + azar.random()) * celda, (i // lado + azar.random()) * celda)
+        for i in range(nodos)
+    ]
+
+    def arista(a, b):
+        distancia = math.dist(puntos[a], puntos[b]) * azar.uniform(1.1, 1.5)
+        return (f"lugar {a}", f"lugar {b}", max(1, round(distancia * 100)), max(1, round(distancia * 2)))
+
+    aristas = [arista(i, i + 1) for i in range(nodos - 1)]
+    for i in range(nodos):
+        fila, columna = divmod(i, lado)
+        candidatos = [
+            (fila + df) * lado + columna + dc
+            for df in (-1, 0, 1) for dc in (-1, 0, 1)
+            if (df or dc) and 0 <= fila + df < lado and 0 <= columna + dc < lado
+        ]
+        for j in azar.sample(candidatos, min(grado, len(candidatos))):
+            if j < nodos and j != i:
+                aristas.append(arista(i, j))
+    return aristas
+
+
+class Command(BaseCommand):
+    help = "Mide el grafo de rutas: construcción, caminos más cortos y actualización incremental (no usa la base de datos)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--nodos', type=int, default=10000)
+        parser.add_argument('--grado', type=int, default=3, help="Vecinos por lugar")
+        parser.add_argument('--frecuentes', type=int, default=32)
+        parser.add_argument('--consultas', type=int, default=200)
+        parser.add_argument('--semilla', type=int, default=2025)
+
+    def handle(self, *args, **options):
+        azar = random.Random(options['semilla'])
+        nodos = options['nodos']
+        aristas = _red_sintetica(nodos, options['grado'], azar)
+        frecuentes = [f"lugar {i}" for i in azar.sample(range(nodos), min(options['frecuentes'], nodos))]
+        pares = [(f"lugar {azar.randrange(nodos)}", f"lugar {azar.randrange(nodos)}") for _ in range(options['consultas'])]
+
+        inicio = time.perf_counter()
+        grafo = GrafoRutas(aristas, frecuentes)
+        construccion = time.perf_counter() - inicio
+        self.stdout.write(f"{nodos} lugares, {len(aristas)} rutas: construcción en {construccion * 1000:.0f} ms")
+
+        inicio = time.perf_counter()
+        for origen, destino in pares:
+            grafo.camino(origen, destino)
+        punto_a_punto = (time.perf_counter() - inicio) / len(pares)
+        self.stdout.write(f"Dijkstra punto a punto: {punto_a_punto * 1000:.2f} ms por consulta")
+
+        inicio = time.perf_counter()
+        grafo.precalcular()
+        precalculo = time.perf_counter() - inicio
+        self.stdout.write(
+            f"Precálculo de {len(grafo.frecuentes)} lugares frecuentes: {precalculo * 1000:.0f} ms "
+            f"({precalculo / max(len(grafo.frecuentes), 1) * 1000:.1f} ms por lugar)"
+        )
+
+        consultas_frecuentes = [(azar.choice(frecuentes), destino) for _, destino in pares]
+        inicio = time.perf_counter()
+        for origen, destino in consultas_frecuentes:
+            grafo.camino(origen, destino)
+        desde_frecuente = (time.perf_counter() - inicio) / len(pares)
+        self.stdout.write(f"Desde un lugar frecuente (precalculado): {desde_frecuente * 1e6:.2f} µs por consulta")
+
+        # Consistencia: el árbol precalculado y el Dijkstra punto a punto dan lo mismo
+        for origen, destino in consultas_frecuentes[:20]:
+            esperado = grafo._dijkstra(grafo.indices[origen], grafo.indices[destino])
+            indice = grafo.indices[destino]
+            if grafo.camino(origen, destino) != (esperado[0][indice], esperado[1][indice]) and origen != destino:
+                self.stderr.write(self.style.ERROR(f"Resultado distinto para {origen} -> {destino}"))
+                return
+
+        nueva = ("lugar 0", f"lugar {nodos - 1}", 100, 2)
+        inicio = time.perf_counter()
+        actualizado = grafo.con_cambios(retiradas=[aristas[0][:2]], agregadas=[nueva])
+        incremental = time.perf_counter() - inicio
+        self.stdout.write(
+            f"Actualización incremental (1 ruta retirada, 1 agregada): {incremental * 1000:.2f} ms "
+            f"frente a {construccion * 1000:.0f} ms de reconstrucción"
+        )
+        if actualizado.camino("lugar 0", f"lugar {nodos - 1}") != (100, 2):
+            self.stderr.write(self.style.ERROR("La ruta agregada no se refleja en el grafo"))
@@ -0,0 +1,151 @@
+import json
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from cotizador.rendimiento import informe, resumen_latencias
+from cotizador.management.commands.bench_flujo import ContadorConsultas
+from cotizador.management.commands.sembrar_catalogo import PREFIJO_USUARIO, sembrar_catalogo
+
+_MIDDLEWARE_DJANGO = [
+    'django.contrib.auth.middleware.AuthenticationMiddleware'
+    if clase == 'usuarios.middleware.AutenticacionMiddleware' else clase
+    for clase in settings.MIDDLEWARE
+]
+
+# Configuración anterior (sesiones en la base y usuario completo de auth_user) y los modos de COTIZADOR_SESIONES
+CONFIGURACIONES = {
+    'django_db': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTHENTICATION_BACKENDS': ['django.contrib.auth.backends.ModelBackend'],
+        'MIDDLEWARE': _MIDDLEWARE_DJANGO,
+        'COTIZADOR_USUARIOS_CACHE_TTL': 0,
+    },
+    'db': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'COTIZADOR_USUARIOS_CACHE_TTL': 0,
+    },
+    'cached_db': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+        'COTIZADOR_USUARIOS_CACHE_TTL': 30,
+    },
+    'cookie': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.signed_cookies',
+        'COTIZADOR_USUARIOS_CACHE_TTL': 30,
+    },
+}
+FLUJOS = ('home', 'mis_cotizaciones')
+_TABLAS_SESION = ('django_session', 'auth_user')
+
+
+class ContadorSesion(ContadorConsultas):
+    """
+    ContadorConsultas que además cuenta las consultas a las sesiones y a los usuarios.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.consultas_sesion = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if any(tabla in sql for tabla in _TABLAS_SESION):
+            self.consultas_sesion += 1
+        return super().__call__(execute, sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = ("Compara el costo por solicitud de cargar la sesión y el usuario en las páginas de inicio y "
+            "mis cotizaciones con la configuración anterior y con cada modo de COTIZADOR_SESIONES "
+            "(db, cached_db, cookie), sobre una base de datos temporal sembrada. Informa en JSON latencias, "
+            "consultas y tiempo en la base de datos por solicitud, y cuánto baja este respecto de la anterior.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rutas', type=int, default=500)
+        parser.add_argument('--usuarios', type=int, default=10)
+        parser.add_argument('--cotizaciones', type=int, default=5000)
+        parser.add_argument('--iteraciones', type=int, default=200, help="Solicitudes por flujo y configuración")
+        parser.add_argument('--semilla', type=int, default=2025)
+        parser.add_argument('--salida', help="Archivo donde guardar el JSON (por omisión, la salida estándar)")
+
+    def handle(self, *args, **options):
+        parametros = {clave: options[clave] for clave in ('rutas', 'usuarios', 'cotizaciones', 'iteraciones', 'semilla')}
+        nombre_original = connection.settings_dict['NAME']
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            sembrar_catalogo(
+                apps=10, rutas=options['rutas'], usuarios=options['usuarios'],
+                cotizaciones=options['cotizaciones'], semilla=options['semilla'],
+            )
+            flujos = {}
+            for nombre, configuracion in CONFIGURACIONES.items():
+                with override_settings(**configuracion):
+                    for flujo, resumen in self._medir(options['iteraciones']).items():
+                        flujos[f"{nombre}/{flujo}"] = resumen
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            teardown_test_environment()
+
+        resultado = informe('sesiones', parametros, flujos)
+        resultado['reduccion_db_ms'] = {
+            f"{nombre}/{flujo}": _reduccion(flujos['django_db/' + flujo], flujos[f"{nombre}/{flujo}"])
+            for nombre in CONFIGURACIONES if nombre != 'django_db'
+            for flujo in FLUJOS
+        }
+        resultado = json.dumps(resultado, indent=2, ensure_ascii=False)
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                archivo.write(resultado + "\n")
+            self.stderr.write(self.style.SUCCESS(f"Resultados guardados en {options['salida']}"))
+        else:
+            self.stdout.write(resultado)
+
+    def _medir(self, iteraciones):
+        caches[settings.SESSION_CACHE_ALIAS].clear()
+        clientes = []
+        for usuario in User.objects.filter(username__startswith=PREFIJO_USUARIO).order_by('pk'):
+            cliente = Client()
+            cliente.force_login(usuario)
+            clientes.append(cliente)
+        urls = {'home': reverse('home'), 'mis_cotizaciones': reverse('mis_cotizaciones')}
+        # Una vuelta sin medir: llena las caches de catálogo, sesiones y usuarios
+        for cliente in clientes:
+            for url in urls.values():
+                cliente.get(url)
+
+        mediciones = {flujo: ([], [], [], [], [0]) for flujo in FLUJOS}
+        for i in range(iteraciones):
+            cliente = clientes[i % len(clientes)]
+            for flujo, url in urls.items():
+                duraciones, consultas, segundos_db, consultas_sesion, errores = mediciones[flujo]
+                contador = ContadorSesion()
+                with connection.execute_wrapper(contador):
+                    inicio = time.perf_counter()
+                    respuesta = cliente.get(url)
+                    duraciones.append(time.perf_counter() - inicio)
+                consultas.append(contador.consultas)
+                segundos_db.append(contador.segundos)
+                consultas_sesion.append(contador.consultas_sesion)
+                if respuesta.status_code != 200:
+                    errores[0] += 1
+
+        resultados = {}
+        for flujo, (duraciones, consultas, segundos_db, consultas_sesion, errores) in mediciones.items():
+            resumen = resumen_latencias(duraciones, consultas=consultas, errores=errores[0])
+            resumen['db_ms_por_solicitud'] = round(sum(segundos_db) / len(segundos_db) * 1000, 3)
+            resumen['consultas_sesion_usuario'] = round(sum(consultas_sesion) / len(consultas_sesion), 2)
+            resultados[flujo] = resumen
+        return resultados
+
+
+def _reduccion(anterior, actual):
+    if not anterior['db_ms_por_solicitud']:
+        return None
+    return f"{(1 - actual['db_ms_por_solicitud'] / anterior['db_ms_por_solicitud']) * 100:.0f}%"
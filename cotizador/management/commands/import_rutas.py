@@ -0,0 +1,143 @@
+import csv
+import io
+import json
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from cotizador.grafo import grafo_rutas
+from cotizador.models import Ruta
+from cotizador.normalizacion import clave_ruta, normalizar_lugar
+from cotizador.simulador import rutas_recientes
+from cotizador.ubicaciones import reconstruir_ubicaciones
+
+CAMPOS = ('origen', 'destino', 'distancia_km', 'tiempo_min')
+DISTANCIA_MAXIMA = Decimal('999.99')  # max_digits=5, decimal_places=2
+# Rango de tiempo_min (IntegerField) en la base configurada: un valor mayor haría fallar
+# todo el lote al guardarlo
+TIEMPO_MINIMO, TIEMPO_MAXIMO = connection.ops.integer_field_range(
+    Ruta._meta.get_field('tiempo_min').get_internal_type())
+
+
+def _leer_csv(archivo, delimitador):
+    lector = csv.DictReader(archivo, delimiter=delimitador)
+    faltantes = set(CAMPOS) - set(lector.fieldnames or ())
+    if faltantes:
+        raise CommandError(f"Faltan columnas en el CSV: {', '.join(sorted(faltantes))}")
+    yield from lector
+
+
+def _leer_jsonl(archivo):
+    # Cada línea se decodifica en _construir_ruta, para rechazar solo las líneas inválidas
+    for linea in archivo:
+        if linea.strip():
+            yield linea
+
+
+def _construir_ruta(fila):
+    """
+    Convierte una fila en Ruta (sin guardar). Lanza ValueError si los datos no son válidos.
+    """
+    if isinstance(fila, str):
+        fila = json.loads(fila)
+    origen = ' '.join(str(fila.get('origen') or '').split())
+    destino = ' '.join(str(fila.get('destino') or '').split())
+    if not origen or not destino or len(origen) > 100 or len(destino) > 100:
+        raise ValueError("origen/destino vacío o demasiado largo")
+    if normalizar_lugar(origen) == normalizar_lugar(destino):
+        raise ValueError("origen y destino no pueden ser iguales")
+    try:
+        distancia = Decimal(str(fila['distancia_km'])).quantize(Decimal('0.01'))
+        tiempo = Decimal(str(fila['tiempo_min']))
+    except (KeyError, TypeError, InvalidOperation) as e:
+        raise ValueError(f"distancia/tiempo inválidos: {e}")
+    if not distancia.is_finite() or not tiempo.is_finite():
+        # quantize() conserva NaN, que no se puede comparar
+        raise ValueError("distancia/tiempo no es un número finito")
+    if tiempo != tiempo.to_integral_value():
+        # int() truncaría 12.7 a 12 sin avisar
+        raise ValueError("tiempo no es un número entero de minutos")
+    tiempo = int(tiempo)
+    if not (0 <= distancia <= DISTANCIA_MAXIMA) or not (max(0, TIEMPO_MINIMO) <= tiempo <= TIEMPO_MAXIMO):
+        raise ValueError("distancia/tiempo fuera de rango")
+    # bulk_create no llama a save(): la clave se calcula aquí
+    return Ruta(origen=origen, destino=destino, distancia_km=distancia, tiempo_min=tiempo,
+                clave=clave_ruta(origen, destino))
+
+
+class Command(BaseCommand):
+    help = "Importa rutas desde un archivo CSV o JSONL (origen, destino, distancia_km, tiempo_min) en lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="Ruta del archivo, o '-' para leer de la entrada estándar")
+        parser.add_argument('--formato', choices=('csv', 'jsonl'),
+                            help="Por defecto se deduce de la extensión del archivo")
+        parser.add_argument('--lote', type=int, default=5000, help="Filas por transacción")
+        parser.add_argument('--delimitador', default=',')
+
+    def handle(self, *args, **options):
+        nombre = options['archivo']
+        formato = options['formato'] or ('jsonl' if nombre.endswith(('.jsonl', '.ndjson')) else 'csv')
+        tamano_lote = max(1, options['lote'])
+
+        if nombre == '-':
+            archivo = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8', newline='')
+        else:
+            try:
+                archivo = open(nombre, encoding='utf-8-sig', newline='')
+            except OSError as e:
+                raise CommandError(e)
+
+        leidas = importadas = rechazadas = 0
+        inicio = time.perf_counter()
+        with archivo:
+            filas = _leer_jsonl(archivo) if formato == 'jsonl' else _leer_csv(archivo, options['delimitador'])
+            lote = {}
+            for numero, fila in enumerate(filas, start=1):
+                leidas += 1
+                try:
+                    ruta = _construir_ruta(fila)
+                except (ValueError, AttributeError) as e:
+                    rechazadas += 1
+                    if options['verbosity'] >= 2:
+                        self.stderr.write(f"Fila {numero} rechazada: {e}")
+                    continue
+                # Dentro de un lote, la última fila de cada par de lugares gana
+                lote[ruta.clave] = ruta
+                if len(lote) >= tamano_lote:
+                    importadas += self._guardar(lote.values())
+                    lote = {}
+                    self._informar_avance(importadas, inicio, options['verbosity'])
+            if lote:
+                importadas += self._guardar(lote.values())
+
+        # bulk_create no dispara señales: se reconstruyen los índices derivados de Ruta
+        reconstruir_ubicaciones()
+        rutas_recientes.invalidar()
+        grafo_rutas.invalidar()
+
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"{leidas} filas leídas, {importadas} rutas importadas, {rechazadas} rechazadas "
+            f"en {duracion:.1f}s ({leidas / duracion if duracion else 0:.0f} filas/s)"
+        ))
+
+    @staticmethod
+    def _guardar(rutas):
+        rutas = list(rutas)
+        with transaction.atomic():
+            Ruta.objects.bulk_create(
+                rutas,
+                update_conflicts=True,
+                unique_fields=['clave'],
+                update_fields=['distancia_km', 'tiempo_min'],
+            )
+        return len(rutas)
+
+    def _informar_avance(self, importadas, inicio, verbosidad):
+        if verbosidad >= 1:
+            duracion = time.perf_counter() - inicio
+            self.stdout.write(f"  {importadas} rutas ({importadas / duracion:.0f}/s)")
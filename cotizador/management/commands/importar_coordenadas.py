@@ -0,0 +1,94 @@
+import csv
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from cotizador.models import Ubicacion
+from cotizador.normalizacion import normalizar_lugar
+from cotizador.ubicaciones import indice_ubicaciones
+
+CAMPOS = ('nombre', 'latitud', 'longitud')
+
+
+def _construir_ubicacion(fila, con_zona):
+    """
+    Convierte una fila en Ubicacion (sin guardar). Lanza ValueError si los datos no son válidos.
+    """
+    nombre = ' '.join(str(fila.get('nombre') or '').split())
+    if not nombre or len(nombre) > 100:
+        raise ValueError("nombre vacío o demasiado largo")
+    try:
+        latitud = Decimal(fila['latitud'].strip()).quantize(Decimal('0.000001'))
+        longitud = Decimal(fila['longitud'].strip()).quantize(Decimal('0.000001'))
+    except (AttributeError, InvalidOperation) as e:
+        raise ValueError(f"coordenadas inválidas: {e}")
+    if not (-90 <= latitud <= 90 and -180 <= longitud <= 180):
+        raise ValueError("coordenadas fuera de rango")
+    ubicacion = Ubicacion(nombre=nombre, nombre_normalizado=normalizar_lugar(nombre), num_rutas=0,
+                          latitud=latitud, longitud=longitud)
+    if con_zona:
+        ubicacion.zona = ' '.join(str(fila.get('zona') or '').split())[:50]
+    return ubicacion
+
+
+class Command(BaseCommand):
+    help = ("Carga las coordenadas de los lugares desde un CSV (nombre, latitud, longitud y opcionalmente zona). "
+            "Los lugares que no existen se crean aunque aún no tengan rutas.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo')
+        parser.add_argument('--lote', type=int, default=2000, help="Filas por transacción")
+        parser.add_argument('--delimitador', default=',')
+
+    def handle(self, *args, **options):
+        try:
+            archivo = open(options['archivo'], encoding='utf-8-sig', newline='')
+        except OSError as e:
+            raise CommandError(f"No se pudo abrir el archivo: {e}")
+
+        tamano_lote = max(1, options['lote'])
+        leidas = cargadas = rechazadas = 0
+        with archivo:
+            lector = csv.DictReader(archivo, delimiter=options['delimitador'])
+            faltantes = set(CAMPOS) - set(lector.fieldnames or ())
+            if faltantes:
+                raise CommandError(f"Faltan columnas en el CSV: {', '.join(sorted(faltantes))}")
+            con_zona = 'zona' in lector.fieldnames
+            campos = ['latitud', 'longitud'] + (['zona'] if con_zona else [])
+
+            lote = {}
+            for fila in lector:
+                leidas += 1
+                try:
+                    ubicacion = _construir_ubicacion(fila, con_zona)
+                except ValueError as e:
+                    rechazadas += 1
+                    if options['verbosity'] >= 2:
+                        self.stderr.write(f"Fila {leidas + 1} rechazada: {e}")
+                    continue
+                # Si un lugar se repite, gana la última fila
+                lote[ubicacion.nombre_normalizado] = ubicacion
+                if len(lote) >= tamano_lote:
+                    cargadas += self._guardar(lote.values(), campos)
+                    lote = {}
+            if lote:
+                cargadas += self._guardar(lote.values(), campos)
+
+        # bulk_create no dispara señales: se invalidan los índices de ubicaciones
+        indice_ubicaciones.invalidar()
+        self.stdout.write(self.style.SUCCESS(
+            f"{leidas} filas leídas, {cargadas} lugares con coordenadas, {rechazadas} rechazadas"
+        ))
+
+    @staticmethod
+    def _guardar(ubicaciones, campos):
+        ubicaciones = list(ubicaciones)
+        with transaction.atomic():
+            Ubicacion.objects.bulk_create(
+                ubicaciones,
+                update_conflicts=True,
+                unique_fields=['nombre_normalizado'],
+                update_fields=campos,
+            )
+        return len(ubicaciones)
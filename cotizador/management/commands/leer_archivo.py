@@ -0,0 +1,41 @@
+import csv
+import json
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cotizador.archivo import COLUMNAS, leer_archivos
+
+
+def _fecha(valor):
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise CommandError(f"Fecha inválida (se espera AAAA-MM-DD): {valor}")
+
+
+class Command(BaseCommand):
+    help = ("Lee las cotizaciones archivadas por archivar_cotizaciones, filtradas por fechas, usuario o lugar, "
+            "y las escribe en la salida estándar como JSONL o CSV (para auditorías).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directorio', help="Directorio de los archivos (por omisión, COTIZADOR_ARCHIVO_DIRECTORIO)")
+        parser.add_argument('--desde', type=_fecha, help="Primer día incluido (AAAA-MM-DD)")
+        parser.add_argument('--hasta', type=_fecha, help="Último día incluido (AAAA-MM-DD)")
+        parser.add_argument('--usuario', help="Nombre de usuario")
+        parser.add_argument('--lugar', help="Lugar de origen o destino")
+        parser.add_argument('--formato', choices=['jsonl', 'csv'], default='jsonl')
+
+    def handle(self, *args, **options):
+        registros = leer_archivos(
+            options['directorio'], desde=options['desde'], hasta=options['hasta'],
+            usuario=options['usuario'], lugar=options['lugar'],
+        )
+        if options['formato'] == 'csv':
+            escritor = csv.DictWriter(self.stdout, fieldnames=list(COLUMNAS))
+            escritor.writeheader()
+            for registro in registros:
+                escritor.writerow(registro)
+        else:
+            for registro in registros:
+                self.stdout.write(json.dumps(registro, ensure_ascii=False))
@@ -0,0 +1,56 @@
+import sys
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = ("Borra las sesiones vencidas (como clearsessions, pero en lotes cortos para no bloquear la base). "
+            "Con --crontab muestra la línea para programarlo con cron cada --cada-horas horas.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=5000, help="Sesiones borradas por transacción")
+        parser.add_argument('--pausa', type=float, default=0.0, help="Segundos de espera entre lotes")
+        parser.add_argument('--crontab', action='store_true', help="Muestra la línea de crontab y termina")
+        parser.add_argument('--cada-horas', type=int, default=24, help="Frecuencia para --crontab")
+
+    def handle(self, *args, **options):
+        if options['crontab']:
+            horas = '3' if options['cada_horas'] >= 24 else f"*/{max(options['cada_horas'], 1)}"
+            self.stdout.write(
+                f"17 {horas} * * * cd {settings.BASE_DIR} && {sys.executable} manage.py limpiar_sesiones --pausa 0.1"
+            )
+            return
+
+        motor = import_module(settings.SESSION_ENGINE)
+        if settings.SESSION_ENGINE == 'django.contrib.sessions.backends.signed_cookies':
+            self.stdout.write("Las sesiones se guardan en cookies firmadas: no hay nada que borrar.")
+            return
+        if not hasattr(motor.SessionStore, 'get_model_class'):
+            # Otros motores (cache, archivos): se delega en clearsessions
+            call_command('clearsessions')
+            return
+
+        modelo = motor.SessionStore.get_model_class()
+        inicio = time.perf_counter()
+        ahora = timezone.now()
+        borradas = 0
+        while True:
+            claves = list(
+                modelo.objects.filter(expire_date__lt=ahora).values_list('session_key', flat=True)[:options['lote']]
+            )
+            if not claves:
+                break
+            with transaction.atomic():
+                modelo.objects.filter(session_key__in=claves).delete()
+            borradas += len(claves)
+            if options['pausa']:
+                time.sleep(options['pausa'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{borradas} sesiones vencidas borradas en {time.perf_counter() - inicio:.1f}s"
+        ))
@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from cotizador.particiones import convertir_tabla, crear_particiones, tabla_particionada
+
+
+class Command(BaseCommand):
+    help = ("PostgreSQL: particiona por mes la tabla de cotizaciones (--convertir, una sola vez y en una ventana "
+            "de mantenimiento) y crea las particiones de los próximos meses (conviene programarlo mensualmente). "
+            "Con la tabla particionada, archivar_cotizaciones elimina los meses vencidos enteros.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--convertir', action='store_true',
+                            help="Convierte la tabla actual en particionada, copiando sus datos")
+        parser.add_argument('--meses', type=int, default=3, help="Meses futuros con partición creada")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("El particionado solo está disponible con PostgreSQL (DATABASE_URL).")
+        hasta = datetime.now(timezone.utc) + timedelta(days=31 * options['meses'])
+        if not tabla_particionada():
+            if not options['convertir']:
+                raise CommandError("La tabla de cotizaciones no está particionada: use --convertir.")
+            convertir_tabla(hasta)
+            self.stdout.write(self.style.SUCCESS("Tabla de cotizaciones particionada por mes"))
+        creadas = crear_particiones(hasta)
+        self.stdout.write(self.style.SUCCESS(f"{len(creadas)} particiones nuevas"))
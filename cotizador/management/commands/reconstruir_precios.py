@@ -0,0 +1,61 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from cotizador.matriz import bloques_rutas, datos_lote, filas_precios, guardar_filas, rutas_escaladas
+from cotizador.models import PrecioRutaApp, TransporteApp
+from cotizador.simulador import CotizadorLote
+
+
+class Command(BaseCommand):
+    help = "Recalcula la matriz completa de precios ruta x app en bloques paralelos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--lote', type=int, default=2000, help="Rutas por bloque")
+
+    def handle(self, *args, **options):
+        cotizador = CotizadorLote(TransporteApp.objects.order_by('pk'))
+        columnas = tuple(list(columna) for columna in cotizador.columnas)
+        apps = datos_lote(cotizador)
+        procesos = max(1, options['procesos'])
+        tamano_lote = max(1, options['lote'])
+
+        inicio = time.perf_counter()
+        total = 0
+        # Los procesos auxiliares solo calculan; las escrituras se hacen aquí, un bloque por transacción.
+        # Se limitan los bloques en vuelo para que la memoria no dependa del tamaño del catálogo.
+        # 'spawn' evita heredar la conexión abierta a la base de datos
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto, initializer=django.setup) as ejecutor:
+            en_vuelo = set()
+            for bloque in bloques_rutas(tamano_lote):
+                if len(en_vuelo) >= procesos * 2:
+                    listos, en_vuelo = wait(en_vuelo, return_when=FIRST_COMPLETED)
+                    total += self._guardar(listos)
+                en_vuelo.add(ejecutor.submit(filas_precios, columnas, apps, rutas_escaladas(bloque)))
+            total += self._guardar(wait(en_vuelo).done)
+
+        # Quita filas de apps que ya no cotizan (tarifas inválidas)
+        PrecioRutaApp.objects.exclude(app_id__in=[app_id for app_id, _ in apps]).delete()
+
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} precios calculados ({len(apps)} apps) en {duracion:.1f}s "
+            f"({total / duracion if duracion else 0:.0f} precios/s)"
+        ))
+
+    @staticmethod
+    def _guardar(futuros):
+        total = 0
+        for futuro in futuros:
+            filas = futuro.result()
+            with transaction.atomic():
+                guardar_filas(filas)
+            total += len(filas)
+        return total
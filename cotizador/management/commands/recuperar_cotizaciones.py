@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from cotizador.diferido import recuperar_spool
+
+
+class Command(BaseCommand):
+    help = "Guarda las cotizaciones diferidas que quedaron en el spool de procesos terminados."
+
+    def handle(self, *args, **options):
+        recuperadas = recuperar_spool(settings.COTIZADOR_DIFERIDA_DIRECTORIO)
+        self.stdout.write(self.style.SUCCESS(f"{recuperadas} cotizaciones recuperadas"))
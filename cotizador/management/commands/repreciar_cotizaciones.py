@@ -0,0 +1,110 @@
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from cotizador.analitica import recotizar_en_resumenes
+from cotizador.models import CotizacionTraslado
+from cotizador.tarifas import obtener_historial_tarifas
+
+
+CAMPOS = (
+    'id', 'ruta_id', 'app_seleccionada_id', 'fecha_creacion', 'factor_dinamico', 'precio', 'distancia_km', 'tiempo_min',
+)
+
+
+def _fecha(valor):
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise CommandError(f"Fecha inválida (se espera AAAA-MM-DD): {valor}")
+
+
+class Command(BaseCommand):
+    help = ("Recalcula el precio de las cotizaciones guardadas con la tarifa vigente al crearse cada una "
+            "(historial de tarifas en memoria, sin consultas por fila), con la distancia y el tiempo con que "
+            "se cotizaron y con su factor dinámico guardado, que ya incluye el recargo por horario. Informa "
+            "las diferencias; con --aplicar corrige el precio y los resúmenes diarios.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=_fecha, help="Primer día incluido (AAAA-MM-DD)")
+        parser.add_argument('--hasta', type=_fecha, help="Último día incluido (AAAA-MM-DD)")
+        parser.add_argument('--lote', type=int, default=5000, help="Cotizaciones leídas (y corregidas) por consulta")
+        parser.add_argument('--aplicar', action='store_true', help="Guarda el precio recalculado donde difiere")
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        historial = obtener_historial_tarifas()
+        consulta = CotizacionTraslado.objects.filter(ruta__isnull=False, app_seleccionada__isnull=False)
+        if options['desde']:
+            consulta = consulta.filter(fecha_creacion__gte=timezone.make_aware(datetime.combine(options['desde'], dt_time.min)))
+        if options['hasta']:
+            consulta = consulta.filter(fecha_creacion__lt=timezone.make_aware(
+                datetime.combine(options['hasta'] + timedelta(days=1), dt_time.min)
+            ))
+
+        revisadas = distintas = sin_tarifa = sin_medidas = 0
+        diferencia = Decimal(0)
+        ultimo_id = omitidas = 0
+        while True:
+            filas = list(consulta.filter(id__gt=ultimo_id).order_by('id').values_list(*CAMPOS)[:options['lote']])
+            if not filas:
+                break
+            ultimo_id = filas[-1][0]
+            corregidas = {}
+            for fila in filas:
+                id_, _, app_id, fecha, factor, precio, distancia, tiempo = fila
+                if distancia is None or tiempo is None:
+                    # La ruta actual pudo cambiar desde que se cotizó: no sirve para recalcular
+                    sin_medidas += 1
+                    continue
+                recalculado = historial.precio(app_id, fecha, distancia, tiempo, factor)
+                if recalculado is None:
+                    sin_tarifa += 1
+                    continue
+                if recalculado != precio:
+                    distintas += 1
+                    diferencia += recalculado - precio
+                    corregidas[fila] = Decimal(recalculado)
+            revisadas += len(filas)
+            if options['aplicar'] and corregidas:
+                omitidas += self._aplicar(corregidas)
+
+        accion = "corregidas" if options['aplicar'] else "con precio distinto"
+        self.stdout.write(self.style.SUCCESS(
+            f"{revisadas} cotizaciones revisadas en {time.perf_counter() - inicio:.1f}s: {distintas} {accion} "
+            f"(diferencia total {diferencia}), {sin_tarifa} sin tarifa registrada a su fecha, "
+            f"{sin_medidas} sin distancia y tiempo cotizados"
+        ))
+        if omitidas:
+            self.stdout.write(f"{omitidas} no se corrigieron porque cambiaron durante la revisión")
+
+    def _aplicar(self, corregidas):
+        """
+        Guarda los precios recalculados {fila leída: precio} y los refleja en los resúmenes
+        diarios, en una transacción con las filas bloqueadas. Se omiten (y se cuentan) las que
+        cambiaron desde que se leyeron, por ejemplo porque se recotizaron.
+        """
+        with transaction.atomic():
+            actuales = set(
+                CotizacionTraslado.objects.select_for_update()
+                .filter(id__in=[fila[0] for fila in corregidas]).values_list(*CAMPOS)
+            )
+            cotizaciones = []
+            for fila, precio in corregidas.items():
+                if fila not in actuales:
+                    continue
+                id_, ruta_id, app_id, fecha, factor, anterior, _, _ = fila
+                cotizacion = CotizacionTraslado(
+                    id=id_, ruta_id=ruta_id, app_seleccionada_id=app_id, fecha_creacion=fecha,
+                    factor_dinamico=factor, precio=precio,
+                )
+                cotizaciones.append((cotizacion, anterior))
+            CotizacionTraslado.objects.bulk_update([cotizacion for cotizacion, _ in cotizaciones], ['precio'])
+            for cotizacion, anterior in cotizaciones:
+                recotizar_en_resumenes(cotizacion, cotizacion.ruta_id, cotizacion.app_seleccionada_id, anterior,
+                                       cotizacion.factor_dinamico)
+        return len(corregidas) - len(cotizaciones)
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from cotizador.models import CotizacionTraslado, Ruta
+from cotizador.normalizacion import clave_ruta
+
+
+class Command(BaseCommand):
+    help = ("Lista las rutas que comparten clave canónica (A -> B y B -> A, o variantes de mayúsculas y tildes): "
+            "las que la migración 0003_ruta_clave une, conservando la primera por (origen, destino) y "
+            "reasignando las cotizaciones de las demás. Conviene ejecutarlo antes de migrar; no modifica nada.")
+
+    def handle(self, *args, **options):
+        # Solo columnas que existen antes de la migración (sin 'clave')
+        rutas = Ruta.objects.order_by('origen', 'destino', 'pk').values_list(
+            'pk', 'origen', 'destino', 'distancia_km', 'tiempo_min'
+        )
+        cotizaciones_por_ruta = dict(
+            CotizacionTraslado.objects.filter(ruta__isnull=False).order_by()
+            .values('ruta_id').annotate(cantidad=Count('id')).values_list('ruta_id', 'cantidad')
+        )
+        conservadas = {}
+        duplicadas = 0
+        for pk, origen, destino, distancia_km, tiempo_min in rutas.iterator():
+            clave = clave_ruta(origen, destino)
+            conservada = conservadas.setdefault(clave, (pk, origen, destino, distancia_km, tiempo_min))
+            if conservada[0] == pk:
+                continue
+            duplicadas += 1
+            cotizaciones = cotizaciones_por_ruta.get(pk, 0)
+            self.stdout.write(
+                f"Ruta {pk} ({origen} -> {destino}, {distancia_km} km, {tiempo_min} min, {cotizaciones} cotizaciones) "
+                f"se une a la ruta {conservada[0]} ({conservada[1]} -> {conservada[2]}, {conservada[3]} km, {conservada[4]} min)"
+            )
+        self.stdout.write(self.style.SUCCESS(f"{duplicadas} rutas duplicadas"))
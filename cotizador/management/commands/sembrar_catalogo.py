@@ -0,0 +1,168 @@
+import math
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from cotizador.grafo import grafo_rutas
+from cotizador.matriz import actualizar_columna_app
+from cotizador.models import CotizacionTraslado, HistorialTarifa, Ruta, TransporteApp
+from cotizador.normalizacion import clave_ruta
+from cotizador.simulador import rutas_recientes
+from cotizador.tarifas import tarifario
+from cotizador.ubicaciones import reconstruir_ubicaciones
+
+# Todo lo sembrado lleva estos prefijos, para poder reconocerlo y borrarlo
+PREFIJO_APP = "Bench App"
+PREFIJO_LUGAR = "Lugar Bench"
+PREFIJO_USUARIO = "bench_"
+CLAVE_USUARIOS = "bench-clave-2025"
+
+
+def limpiar_catalogo():
+    """
+    Borra los datos sembrados (las cotizaciones caen en cascada con sus usuarios).
+    """
+    with transaction.atomic():
+        User.objects.filter(username__startswith=PREFIJO_USUARIO).delete()
+        Ruta.objects.filter(origen__startswith=PREFIJO_LUGAR).delete()
+        TransporteApp.objects.filter(nombre__startswith=PREFIJO_APP).delete()
+
+
+def sembrar_catalogo(apps=10, rutas=5000, usuarios=20, cotizaciones=20000, semilla=2025, tamano_lote=5000):
+    """
+    Crea un catálogo sintético y reproducible: apps, rutas entre lugares ficticios, usuarios
+    (todos con la clave CLAVE_USUARIOS) e historial de cotizaciones. Usa inserciones en lote,
+    así que al final reconstruye los índices derivados y la matriz de precios.
+    Devuelve un resumen con las cantidades y los nombres de usuario.
+    """
+    azar = random.Random(semilla)
+
+    with transaction.atomic():
+        lista_apps = TransporteApp.objects.bulk_create([
+            TransporteApp(
+                nombre=f"{PREFIJO_APP} {i + 1}",
+                precio_base=Decimal(azar.randint(100000, 500000)) / 100,
+                costo_por_km=Decimal(azar.randint(50000, 120000)) / 100,
+                costo_por_min=Decimal(azar.randint(5000, 20000)) / 100,
+                factor_dinamico=Decimal(azar.randint(80, 250)) / 100,
+                tiempo_espera=azar.randint(2, 15),
+            )
+            for i in range(apps)
+        ])
+
+        # Suficientes lugares para que existan `rutas` pares distintos
+        lugares = max(4, math.ceil(math.sqrt(rutas * 4)))
+        claves, nuevas = set(), []
+        while len(nuevas) < rutas:
+            origen, destino = azar.sample(range(lugares), 2)
+            origen, destino = f"{PREFIJO_LUGAR} {origen}", f"{PREFIJO_LUGAR} {destino}"
+            clave = clave_ruta(origen, destino)
+            if clave in claves:
+                continue
+            claves.add(clave)
+            nuevas.append(Ruta(
+                origen=origen, destino=destino, clave=clave,
+                distancia_km=Decimal(azar.randint(50, 60000)) / 100,
+                tiempo_min=azar.randint(2, 180),
+            ))
+        Ruta.objects.bulk_create(nuevas, batch_size=tamano_lote)
+        ruta_ids = list(Ruta.objects.filter(clave__in=claves).values_list('pk', flat=True))
+
+        clave_cifrada = make_password(CLAVE_USUARIOS)
+        lista_usuarios = User.objects.bulk_create([
+            User(username=f"{PREFIJO_USUARIO}{i}", password=clave_cifrada) for i in range(usuarios)
+        ])
+        usuario_ids = list(
+            User.objects.filter(username__startswith=PREFIJO_USUARIO).values_list('pk', flat=True)
+        )
+
+    ahora = timezone.now()
+    apps_creadas = list(TransporteApp.objects.filter(nombre__startswith=PREFIJO_APP))
+    app_ids = [app.pk for app in apps_creadas]
+    # Tarifas vigentes desde antes de la cotización sembrada más antigua
+    HistorialTarifa.objects.bulk_create([
+        HistorialTarifa(
+            app=app, vigente_desde=ahora - timedelta(days=366),
+            **{campo: getattr(app, campo) for campo in HistorialTarifa.CAMPOS_TARIFA}
+        )
+        for app in apps_creadas
+    ])
+    if not (usuario_ids and ruta_ids and app_ids):
+        cotizaciones = 0
+    for inicio in range(0, cotizaciones, tamano_lote):
+        CotizacionTraslado.objects.bulk_create([
+            CotizacionTraslado(
+                usuario_id=azar.choice(usuario_ids),
+                ruta_id=azar.choice(ruta_ids),
+                app_seleccionada_id=azar.choice(app_ids),
+                precio=Decimal(azar.randint(3000, 90000)),
+                tiempo_espera=azar.randint(2, 15),
+                factor_dinamico=Decimal(azar.randint(80, 250)) / 100,
+                fecha_creacion=ahora - timedelta(seconds=azar.randint(0, 365 * 24 * 3600)),
+            )
+            for _ in range(min(tamano_lote, cotizaciones - inicio))
+        ])
+    # Cotizadas con la distancia y el tiempo de su ruta
+    medidas = Ruta.objects.filter(pk=OuterRef('ruta_id'))
+    CotizacionTraslado.objects.filter(usuario_id__in=usuario_ids, distancia_km__isnull=True).update(
+        distancia_km=Subquery(medidas.values('distancia_km')[:1]),
+        tiempo_min=Subquery(medidas.values('tiempo_min')[:1]),
+    )
+
+    # bulk_create no dispara señales: se reconstruye lo que se deriva de ellas
+    reconstruir_ubicaciones()
+    rutas_recientes.invalidar()
+    grafo_rutas.invalidar()
+    tarifario.invalidar()
+    for app in TransporteApp.objects.filter(nombre__startswith=PREFIJO_APP):
+        actualizar_columna_app(app)
+
+    return {
+        'apps': len(lista_apps),
+        'rutas': len(nuevas),
+        'lugares': lugares,
+        'usuarios': [usuario.username for usuario in lista_usuarios],
+        'cotizaciones': cotizaciones,
+    }
+
+
+class Command(BaseCommand):
+    help = ("Siembra un catálogo sintético reproducible (apps, rutas, usuarios e historial de cotizaciones) "
+            "para pruebas de rendimiento. Los usuarios bench_N tienen la clave " + CLAVE_USUARIOS + ".")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--apps', type=int, default=10)
+        parser.add_argument('--rutas', type=int, default=5000)
+        parser.add_argument('--usuarios', type=int, default=20)
+        parser.add_argument('--cotizaciones', type=int, default=20000)
+        parser.add_argument('--semilla', type=int, default=2025)
+        parser.add_argument('--limpiar', action='store_true', help="Borra antes los datos sembrados previamente")
+
+    def handle(self, *args, **options):
+        if options['limpiar']:
+            limpiar_catalogo()
+        elif TransporteApp.objects.filter(nombre__startswith=PREFIJO_APP).exists():
+            self.stderr.write(self.style.ERROR("Ya hay un catálogo sembrado: use --limpiar para reemplazarlo."))
+            return
+
+        inicio = time.perf_counter()
+        resumen = sembrar_catalogo(
+            apps=options['apps'],
+            rutas=options['rutas'],
+            usuarios=options['usuarios'],
+            cotizaciones=options['cotizaciones'],
+            semilla=options['semilla'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{resumen['apps']} apps, {resumen['rutas']} rutas entre {resumen['lugares']} lugares, "
+            f"{len(resumen['usuarios'])} usuarios y {resumen['cotizaciones']} cotizaciones "
+            f"en {time.perf_counter() - inicio:.1f}s"
+        ))
@@ -0,0 +1,157 @@
+import threading
+
+from django.db import close_old_connections, connection
+
+from .dinamica import obtener_multiplicadores
+from .models import PrecioRutaApp, Ruta, TransporteApp
+from .simulador import CotizadorLote, _escalar, firma_precio, firma_tarifas, precios_escalados
+from .tarifas import obtener_tarifario
+
+
+def filas_precios(columnas, apps, rutas):
+    """
+    Calcula las filas de la matriz para un bloque de rutas.
+    `apps` son tuplas (app_id, tiempo_espera) alineadas con las columnas y
+    `rutas` tuplas (ruta_id, distancia escalada, tiempo). Es una función pura,
+    pensada para ejecutarse en procesos auxiliares.
+    """
+    filas = []
+    firmas_apps = [
+        firma_tarifas(columnas_app, tiempo_espera)
+        for (_, tiempo_espera), columnas_app in zip(apps, zip(*columnas))
+    ]
+    for ruta_id, distancia, tiempo in rutas:
+        precios = precios_escalados(columnas, distancia, tiempo)
+        for (app_id, tiempo_espera), firma_app, precio in zip(apps, firmas_apps, precios):
+            filas.append((ruta_id, app_id, precio, tiempo_espera, firma_precio(firma_app, distancia, tiempo)))
+    return filas
+
+
+def guardar_filas(filas):
+    """
+    Inserta o actualiza filas (ruta_id, app_id, precio, tiempo_espera, firma) de la matriz.
+    """
+    PrecioRutaApp.objects.bulk_create(
+        [
+            PrecioRutaApp(ruta_id=ruta_id, app_id=app_id, precio=precio, tiempo_espera=tiempo_espera, firma=firma)
+            for ruta_id, app_id, precio, tiempo_espera, firma in filas
+        ],
+        update_conflicts=True,
+        unique_fields=['ruta', 'app'],
+        update_fields=['precio', 'tiempo_espera', 'firma'],
+    )
+
+
+def datos_lote(cotizador):
+    return [(app.pk, app.tiempo_espera) for app in cotizador.apps]
+
+
+def rutas_escaladas(rutas):
+    return [(ruta.pk, _escalar(ruta.distancia_km, 2), _escalar(ruta.tiempo_min, 0)) for ruta in rutas]
+
+
+def actualizar_fila_ruta(ruta_id):
+    """
+    Recalcula los precios de una ruta en todas las apps (una fila de la matriz).
+    Lee la ruta de nuevo: se llama después del commit, cuando pudo haber cambiado o ya no existir.
+    """
+    rutas = list(Ruta.objects.filter(pk=ruta_id, estimada=False).only('pk', 'distancia_km', 'tiempo_min'))
+    if not rutas:
+        return
+    cotizador = CotizadorLote(TransporteApp.objects.order_by('pk'))
+    guardar_filas(filas_precios(cotizador.columnas, datos_lote(cotizador), rutas_escaladas(rutas)))
+
+
+def bloques_rutas(tamano_lote):
+    """
+    Recorre las rutas en bloques por clave primaria (keyset), con una consulta corta
+    por bloque, para no mantener abierta una lectura que bloquee a los escritores.
+    """
+    ultimo = 0
+    while True:
+        bloque = list(
+            Ruta.objects.filter(pk__gt=ultimo, estimada=False).order_by('pk').only('pk', 'distancia_km', 'tiempo_min')[:tamano_lote]
+        )
+        if not bloque:
+            return
+        ultimo = bloque[-1].pk
+        yield bloque
+
+
+def actualizar_columna_app(app, tamano_lote=2000):
+    """
+    Recalcula los precios de una app en todas las rutas (una columna de la matriz).
+    """
+    cotizador = CotizadorLote([app])
+    if not cotizador.apps:
+        return
+    apps = datos_lote(cotizador)
+    for bloque in bloques_rutas(tamano_lote):
+        guardar_filas(filas_precios(cotizador.columnas, apps, rutas_escaladas(bloque)))
+
+
+class RecalculoColumnas:
+    """
+    Recalcula en un hilo en segundo plano, una por vez, las columnas de las apps modificadas,
+    sin bloquear la petición que las guardó. Mientras tanto las filas viejas no coinciden
+    con la firma vigente y se cotiza en memoria.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pendientes = set()
+        self._hilo = None
+
+    def programar(self, app_id):
+        with self._lock:
+            self._pendientes.add(app_id)
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._procesar, name='matriz-columnas', daemon=True)
+                self._hilo.start()
+
+    def _procesar(self):
+        try:
+            while True:
+                with self._lock:
+                    if not self._pendientes:
+                        self._hilo = None
+                        return
+                    app_id = self._pendientes.pop()
+                app = TransporteApp.objects.filter(pk=app_id).first()
+                if app is not None:
+                    actualizar_columna_app(app)
+        finally:
+            close_old_connections()
+            connection.close()
+
+
+recalculo_columnas = RecalculoColumnas()
+
+
+def cotizar_ruta(ruta, momento=None):
+    """
+    Cotizaciones de la ruta en todas las apps leyendo la matriz precalculada
+    (una consulta por índice). Si falta algún precio o su firma no es la vigente,
+    se calcula en memoria con el cotizador por lotes.
+    La matriz guarda los precios sin recargo: si hay una franja dinámica vigente
+    para la ruta, se calcula en memoria con los recargos.
+    """
+    cotizador = obtener_tarifario().cotizador
+    multiplicadores = obtener_multiplicadores(cotizador.apps, ruta, momento)
+    if multiplicadores is not None:
+        return cotizador.cotizaciones(ruta, multiplicadores=multiplicadores)
+    if ruta.pk is None:
+        return cotizador.cotizaciones(ruta)
+    precalculados = {
+        app_id: (precio, firma)
+        for app_id, precio, firma in PrecioRutaApp.objects.filter(ruta_id=ruta.pk).values_list(
+            'app_id', 'precio', 'firma'
+        )
+    }
+    precios = []
+    for app, firma in zip(cotizador.apps, cotizador.firmas(ruta)):
+        precio, firma_guardada = precalculados.get(app.pk, (None, None))
+        if firma_guardada != firma:
+            return cotizador.cotizaciones(ruta)
+        precios.append(precio)
+    return cotizador.cotizaciones(ruta, precios)
@@ -0,0 +1,56 @@
+import hashlib
+
+from django.core.cache import caches
+
+from .cache import obtener_generacion
+from .dinamica import hora_semana, obtener_tabla_dinamica
+from .metricas import registro_metricas
+from .normalizacion import normalizar_lugar
+
+# Catálogos de los que depende una cotización: tarifas de las apps, rutas guardadas,
+# caminos compuestos, coordenadas y zonas de los lugares y franjas de tarifa dinámica
+GENERACIONES = ('tarifas', 'rutas', 'grafo', 'ubicaciones', 'dinamica')
+
+_SIN_RESULTADO = object()
+
+
+class MemoCotizaciones:
+    """
+    Resultados de cotización (ruta y cotizaciones de todas las apps) por par de lugares,
+    guardados en el alias de cache 'cotizaciones' para compartirlos entre workers.
+    La clave incluye las generaciones de los catálogos de los que dependen, así que un
+    cambio en cualquiera de ellos deja sin uso las entradas anteriores (que luego vencen
+    por TTL o se descartan al llenarse la cache). Si hay franjas de tarifa dinámica,
+    también incluye la hora de la semana.
+    """
+
+    def __init__(self, alias='cotizaciones'):
+        self.alias = alias
+
+    def clave(self, origen, destino, momento=None):
+        versiones = ".".join(str(obtener_generacion(nombre)) for nombre in GENERACIONES)
+        franja = '' if obtener_tabla_dinamica().vacia else hora_semana(momento)
+        # En el sentido pedido: las rutas compuestas o estimadas conservan origen y destino
+        par = hashlib.sha1(f"{normalizar_lugar(origen)}\n{normalizar_lugar(destino)}".encode()).hexdigest()
+        return f"cotizador:memo:{par}:{versiones}:{franja}"
+
+    def obtener(self, origen, destino, calcular, momento=None):
+        """
+        Devuelve el resultado memorizado del par o lo calcula con `calcular()` y lo guarda.
+        """
+        cache = caches[self.alias]
+        clave = self.clave(origen, destino, momento)
+        resultado = cache.get(clave, _SIN_RESULTADO)
+        if resultado is not _SIN_RESULTADO:
+            registro_metricas.sumar('cotizador_memo_aciertos_total')
+            return resultado
+        registro_metricas.sumar('cotizador_memo_fallos_total')
+        resultado = calcular()
+        cache.set(clave, resultado)
+        return resultado
+
+    def vaciar(self):
+        caches[self.alias].clear()
+
+
+memo_cotizaciones = MemoCotizaciones()
@@ -0,0 +1,183 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+# Límites superiores (le) de los intervalos de cada histograma
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LIMITES_CONSULTAS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+HISTOGRAMAS = {
+    'cotizador_solicitud_segundos': ("Duración total de la solicitud", LIMITES_SEGUNDOS),
+    'cotizador_bd_consultas': ("Consultas a la base de datos por solicitud", LIMITES_CONSULTAS),
+    'cotizador_bd_segundos': ("Tiempo en la base de datos por solicitud", LIMITES_SEGUNDOS),
+    'cotizador_plantilla_segundos': ("Tiempo de renderizado de plantillas por solicitud", LIMITES_SEGUNDOS),
+}
+
+CONTADORES = {
+    'cotizador_memo_aciertos_total': "Cotizaciones servidas desde los resultados memorizados",
+    'cotizador_memo_fallos_total': "Cotizaciones calculadas por no estar memorizadas",
+}
+
+
+class Histograma:
+    """
+    Histograma acumulativo de intervalos fijos (como los de Prometheus): observar es O(log n).
+    """
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.conteos = [0] * (len(limites) + 1)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.conteos[bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+    def acumulados(self):
+        acumulado = 0
+        for limite, conteo in zip((*self.limites, '+Inf'), self.conteos):
+            acumulado += conteo
+            yield limite, acumulado
+
+
+class Medicion:
+    """
+    Consultas, tiempo en la base de datos y tiempo de plantillas de una solicitud en curso.
+    """
+    __slots__ = ('consultas', 'segundos_bd', 'segundos_plantilla', 'plantillas_abiertas')
+
+    def __init__(self):
+        self.consultas = 0
+        self.segundos_bd = 0.0
+        self.segundos_plantilla = 0.0
+        self.plantillas_abiertas = 0
+
+    def envolver_consulta(self, execute, sql, params, many, context):
+        # Se usa con connection.execute_wrapper()
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos_bd += time.perf_counter() - inicio
+            self.consultas += 1
+
+
+# Medición de la solicitud en curso (se propaga a las vistas async y a sync_to_async)
+medicion_actual = ContextVar('medicion_actual', default=None)
+
+
+class RegistroMetricas:
+    """
+    Histogramas por vista de este proceso. Con varios workers, cada uno expone los suyos
+    (Prometheus los suma al consultarlos por instancia).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histogramas = {}
+        self.solicitudes = {}
+        self.contadores = dict.fromkeys(CONTADORES, 0)
+
+    def contar(self, vista):
+        with self._lock:
+            self.solicitudes[vista] = self.solicitudes.get(vista, 0) + 1
+
+    def sumar(self, contador, cantidad=1):
+        with self._lock:
+            self.contadores[contador] += cantidad
+
+    def observar(self, vista, duracion, medicion):
+        valores = {
+            'cotizador_solicitud_segundos': duracion,
+            'cotizador_bd_consultas': medicion.consultas,
+            'cotizador_bd_segundos': medicion.segundos_bd,
+            'cotizador_plantilla_segundos': medicion.segundos_plantilla,
+        }
+        with self._lock:
+            self.solicitudes[vista] = self.solicitudes.get(vista, 0) + 1
+            for nombre, valor in valores.items():
+                histograma = self.histogramas.get((nombre, vista))
+                if histograma is None:
+                    histograma = self.histogramas[(nombre, vista)] = Histograma(HISTOGRAMAS[nombre][1])
+                histograma.observar(valor)
+
+    def exportar(self):
+        """
+        Métricas en el formato de texto de Prometheus.
+        """
+        with self._lock:
+            solicitudes = dict(self.solicitudes)
+            contadores = dict(self.contadores)
+            histogramas = {
+                clave: (list(histograma.acumulados()), histograma.suma, histograma.total)
+                for clave, histograma in self.histogramas.items()
+            }
+
+        lineas = [
+            "# HELP cotizador_solicitudes_total Solicitudes atendidas (medidas o no)",
+            "# TYPE cotizador_solicitudes_total counter",
+        ]
+        for vista, total in sorted(solicitudes.items()):
+            lineas.append(f'cotizador_solicitudes_total{{vista="{_escapar(vista)}"}} {total}')
+        for nombre, descripcion in CONTADORES.items():
+            lineas.append(f"# HELP {nombre} {descripcion}")
+            lineas.append(f"# TYPE {nombre} counter")
+            lineas.append(f"{nombre} {contadores[nombre]}")
+        for nombre, (descripcion, _) in HISTOGRAMAS.items():
+            lineas.append(f"# HELP {nombre} {descripcion} (solicitudes muestreadas)")
+            lineas.append(f"# TYPE {nombre} histogram")
+            for (nombre_histograma, vista), (acumulados, suma, total) in sorted(histogramas.items()):
+                if nombre_histograma != nombre:
+                    continue
+                etiqueta = f'vista="{_escapar(vista)}"'
+                for limite, acumulado in acumulados:
+                    lineas.append(f'{nombre}_bucket{{{etiqueta},le="{limite}"}} {acumulado}')
+                lineas.append(f"{nombre}_sum{{{etiqueta}}} {suma}")
+                lineas.append(f"{nombre}_count{{{etiqueta}}} {total}")
+        return "\n".join(lineas) + "\n"
+
+    def reiniciar(self):
+        with self._lock:
+            self.histogramas.clear()
+            self.solicitudes.clear()
+            self.contadores = dict.fromkeys(CONTADORES, 0)
+
+
+def _escapar(valor):
+    return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registro_metricas = RegistroMetricas()
+
+_instrumentadas = False
+
+
+def instrumentar_plantillas():
+    """
+    Envuelve el render de las plantillas de Django para sumar su duración a la medición
+    en curso. Solo se mide la plantilla de nivel superior (las anidadas quedan dentro).
+    """
+    global _instrumentadas
+    if _instrumentadas:
+        return
+    from django.template.backends.django import Template
+
+    render_original = Template.render
+
+    def render(self, context=None, request=None):
+        medicion = medicion_actual.get()
+        if medicion is None or medicion.plantillas_abiertas:
+            return render_original(self, context, request)
+        medicion.plantillas_abiertas += 1
+        inicio = time.perf_counter()
+        try:
+            return render_original(self, context, request)
+        finally:
+            medicion.segundos_plantilla += time.perf_counter() - inicio
+            medicion.plantillas_abiertas -= 1
+
+    Template.render = render
+    _instrumentadas = True
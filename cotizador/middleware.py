@@ -0,0 +1,62 @@
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .metricas import Medicion, instrumentar_plantillas, medicion_actual, registro_metricas
+
+logger = logging.getLogger(__name__)
+
+
+def _nombre_vista(request):
+    coincidencia = getattr(request, 'resolver_match', None)
+    if coincidencia is None:
+        return 'sin_ruta'
+    return coincidencia.view_name or coincidencia.route or 'sin_nombre'
+
+
+class MetricasMiddleware:
+    """
+    Mide por vista la duración de la solicitud, las consultas y el tiempo en la base de datos
+    y el tiempo de plantillas, en histogramas del proceso (ver /metricas/).
+    Solo se mide una fracción COTIZADOR_METRICAS_MUESTREO de las solicitudes; las que superan
+    COTIZADOR_METRICAS_LENTO_MS se registran en el log. En respuestas por partes
+    (StreamingHttpResponse) no se incluye el envío del cuerpo.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.muestreo = settings.COTIZADOR_METRICAS_MUESTREO
+        self.umbral_lento = settings.COTIZADOR_METRICAS_LENTO_MS / 1000
+        instrumentar_plantillas()
+
+    def __call__(self, request):
+        if self.muestreo < 1 and random.random() >= self.muestreo:
+            response = self.get_response(request)
+            registro_metricas.contar(_nombre_vista(request))
+            return response
+
+        medicion = Medicion()
+        token = medicion_actual.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            with ExitStack() as envolturas:
+                for conexion in connections.all():
+                    envolturas.enter_context(conexion.execute_wrapper(medicion.envolver_consulta))
+                response = self.get_response(request)
+        finally:
+            medicion_actual.reset(token)
+        duracion = time.perf_counter() - inicio
+
+        vista = _nombre_vista(request)
+        registro_metricas.observar(vista, duracion, medicion)
+        if duracion >= self.umbral_lento:
+            logger.warning(
+                "Solicitud lenta: %s %s (%s) %.0f ms, %d consultas (%.0f ms), plantillas %.0f ms",
+                request.method, request.path, vista, duracion * 1000,
+                medicion.consultas, medicion.segundos_bd * 1000, medicion.segundos_plantilla * 1000,
+            )
+        return response
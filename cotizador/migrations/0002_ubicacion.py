@@ -0,0 +1,75 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:51
+
+import unicodedata
+from collections import Counter
+
+from django.db import migrations, models
+
+
+# Copia de cotizador.normalizacion al escribir la migración: una migración histórica no
+# debe cambiar si después cambia (o se mueve) el código de la aplicación
+def normalizar_lugar(nombre):
+    nombre = " ".join((nombre or "").split())
+    descompuesto = unicodedata.normalize("NFKD", nombre)
+    sin_tildes = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return sin_tildes.casefold()
+
+
+def poblar_ubicaciones(apps, schema_editor):
+    Ruta = apps.get_model("cotizador", "Ruta")
+    Ubicacion = apps.get_model("cotizador", "Ubicacion")
+    conteo = Counter()
+    nombres = {}
+    for origen, destino in Ruta.objects.values_list("origen", "destino").iterator():
+        for nombre in (origen, destino):
+            clave = normalizar_lugar(nombre)
+            if clave:
+                conteo[clave] += 1
+                nombres.setdefault(clave, " ".join(nombre.split()))
+    Ubicacion.objects.bulk_create(
+        [
+            Ubicacion(
+                nombre=nombres[clave], nombre_normalizado=clave, num_rutas=cantidad
+            )
+            for clave, cantidad in conteo.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cotizador", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Ubicacion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("nombre", models.CharField(max_length=100)),
+                ("nombre_normalizado", models.CharField(max_length=100, unique=True)),
+                (
+                    "num_rutas",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Cantidad de rutas que usan este lugar"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ubicación",
+                "verbose_name_plural": "Ubicaciones",
+                "ordering": ["nombre"],
+            },
+        ),
+        migrations.RunPython(poblar_ubicaciones, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:05
+
+import logging
+import unicodedata
+from collections import Counter
+
+from django.db import migrations, models
+
+logger = logging.getLogger("cotizador.migraciones")
+
+
+# Copia de cotizador.normalizacion al escribir la migración: una migración histórica no
+# debe cambiar si después cambia (o se mueve) el código de la aplicación
+def normalizar_lugar(nombre):
+    nombre = " ".join((nombre or "").split())
+    descompuesto = unicodedata.normalize("NFKD", nombre)
+    sin_tildes = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return sin_tildes.casefold()
+
+
+def clave_ruta(origen, destino):
+    return "|".join(sorted((normalizar_lugar(origen), normalizar_lugar(destino))))
+
+
+def poblar_claves(apps, schema_editor):
+    """
+    Calcula la clave canónica de cada ruta. Si dos rutas comparten clave
+    (A -> B y B -> A, o variantes de mayúsculas/tildes) se conserva la primera
+    en el orden (origen, destino), que es la que devolvía la búsqueda anterior,
+    y las cotizaciones de las demás pasan a apuntar a ella. Cada ruta unida se registra
+    en el log (con `python manage.py rutas_duplicadas` se pueden ver antes de migrar).
+    """
+    Ruta = apps.get_model("cotizador", "Ruta")
+    CotizacionTraslado = apps.get_model("cotizador", "CotizacionTraslado")
+    Ubicacion = apps.get_model("cotizador", "Ubicacion")
+
+    conservadas = {}
+    duplicadas = {}
+    for ruta in Ruta.objects.order_by("origen", "destino", "pk").iterator():
+        clave = clave_ruta(ruta.origen, ruta.destino)
+        if clave in conservadas:
+            duplicadas[ruta] = conservadas[clave]
+        else:
+            conservadas[clave] = ruta
+            Ruta.objects.filter(pk=ruta.pk).update(clave=clave)
+
+    if not duplicadas:
+        return
+    for duplicada, conservada in duplicadas.items():
+        reasignadas = CotizacionTraslado.objects.filter(ruta_id=duplicada.pk).update(ruta_id=conservada.pk)
+        logger.warning(
+            "Ruta %s (%s -> %s, %s km, %s min) unida a la ruta %s (%s -> %s, %s km, %s min); "
+            "%s cotizaciones reasignadas",
+            duplicada.pk, duplicada.origen, duplicada.destino, duplicada.distancia_km, duplicada.tiempo_min,
+            conservada.pk, conservada.origen, conservada.destino, conservada.distancia_km, conservada.tiempo_min,
+            reasignadas,
+        )
+        Ruta.objects.filter(pk=duplicada.pk).delete()
+    logger.warning("%s rutas duplicadas unidas por clave canónica", len(duplicadas))
+
+    # Al eliminar rutas cambian los conteos del índice de ubicaciones
+    conteo = Counter(
+        normalizar_lugar(nombre)
+        for par in Ruta.objects.values_list("origen", "destino").iterator()
+        for nombre in par
+    )
+    for ubicacion in Ubicacion.objects.all():
+        cantidad = conteo.get(ubicacion.nombre_normalizado, 0)
+        if cantidad:
+            Ubicacion.objects.filter(pk=ubicacion.pk).update(num_rutas=cantidad)
+        else:
+            ubicacion.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cotizador", "0002_ubicacion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ruta",
+            name="clave",
+            field=models.CharField(editable=False, max_length=201, null=True),
+        ),
+        migrations.RunPython(poblar_claves, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="ruta",
+            name="clave",
+            field=models.CharField(editable=False, max_length=201, unique=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cotizador", "0004_cotizacion_fecha_default"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="cotizaciontraslado",
+            index=models.Index(
+                fields=["usuario", "-fecha_creacion", "-id"],
+                name="cotizacion_usuario_fecha_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:58
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cotizador", "0005_cotizacion_usuario_fecha_idx"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="cotizaciontraslado",
+            name="fecha_creacion",
+            field=models.DateTimeField(
+                db_index=True, default=django.utils.timezone.now, editable=False
+            ),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cotizador", "0006_cotizacion_fecha_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PrecioRutaApp",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("precio", models.DecimalField(decimal_places=0, max_digits=12)),
+                ("tiempo_espera", models.IntegerField()),
+                ("firma", models.BigIntegerField()),
+                (
+                    "app",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="precios",
+                        to="cotizador.transporteapp",
+                    ),
+                ),
+                (
+                    "ruta",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="precios",
+                        to="cotizador.ruta",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Precio precalculado",
+                "verbose_name_plural": "Precios precalculados",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("ruta", "app"), name="precio_ruta_app_unico"
+                    )
+                ],
+            },
+        ),
+    ]
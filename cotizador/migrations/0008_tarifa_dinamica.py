@@ -0,0 +1,99 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:09
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cotizador", "0007_precio_ruta_app"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ubicacion",
+            name="zona",
+            field=models.CharField(
+                blank=True,
+                help_text="Zona de tarifa dinámica (según el origen del viaje)",
+                max_length=50,
+            ),
+        ),
+        migrations.CreateModel(
+            name="FranjaDinamica",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "zona",
+                    models.CharField(
+                        blank=True, help_text="Vacío: todas las zonas", max_length=50
+                    ),
+                ),
+                (
+                    "dia_semana",
+                    models.PositiveSmallIntegerField(
+                        blank=True,
+                        choices=[
+                            (0, "Lunes"),
+                            (1, "Martes"),
+                            (2, "Miércoles"),
+                            (3, "Jueves"),
+                            (4, "Viernes"),
+                            (5, "Sábado"),
+                            (6, "Domingo"),
+                        ],
+                        help_text="Vacío: todos los días",
+                        null=True,
+                    ),
+                ),
+                (
+                    "hora_inicio",
+                    models.PositiveSmallIntegerField(
+                        validators=[django.core.validators.MaxValueValidator(23)]
+                    ),
+                ),
+                (
+                    "hora_fin",
+                    models.PositiveSmallIntegerField(
+                        help_text="Hora de término (no incluida)",
+                        validators=[
+                            django.core.validators.MinValueValidator(1),
+                            django.core.validators.MaxValueValidator(24),
+                        ],
+                    ),
+                ),
+                (
+                    "multiplicador",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=1.0,
+                        max_digits=4,
+                        validators=[django.core.validators.MinValueValidator(0)],
+                    ),
+                ),
+                (
+                    "app",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="franjas",
+                        to="cotizador.transporteapp",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Franja de tarifa dinámica",
+                "verbose_name_plural": "Franjas de tarifa dinámica",
+                "ordering": ["app", "zona", "dia_semana", "hora_inicio"],
+            },
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cotizador", "0009_ubicacion_coordenadas"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MarcaAgregacion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("nombre", models.CharField(max_length=50, unique=True)),
+                ("ultimo_id", models.BigIntegerField(default=0)),
+                ("actualizado", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Marca de agregación",
+                "verbose_name_plural": "Marcas de agregación",
+            },
+        ),
+        migrations.CreateModel(
+            name="ResumenDiario",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fecha", models.DateField()),
+                ("cantidad", models.PositiveIntegerField(default=0)),
+                (
+                    "suma_precio",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=16),
+                ),
+                ("precio_minimo", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("precio_maximo", models.DecimalField(decimal_places=2, max_digits=10)),
+                (
+                    "suma_factor",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "app",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="resumenes",
+                        to="cotizador.transporteapp",
+                    ),
+                ),
+                (
+                    "ruta",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="resumenes",
+                        to="cotizador.ruta",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Resumen diario",
+                "verbose_name_plural": "Resúmenes diarios",
+                "ordering": ["-fecha"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("fecha", "ruta", "app"),
+                        name="resumen_fecha_ruta_app_unico",
+                    )
+                ],
+            },
+        ),
+    ]
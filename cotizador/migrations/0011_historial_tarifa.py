@@ -0,0 +1,81 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:39
+
+import django.db.models.deletion
+import django.utils.timezone
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def registrar_tarifas_actuales(apps, schema_editor):
+    # Las tarifas anteriores no se conocen: las actuales rigen desde ahora, y las cotizaciones
+    # previas quedan sin tarifa registrada (repreciar_cotizaciones las omite)
+    TransporteApp = apps.get_model("cotizador", "TransporteApp")
+    HistorialTarifa = apps.get_model("cotizador", "HistorialTarifa")
+    ahora = timezone.now()
+    HistorialTarifa.objects.bulk_create([
+        HistorialTarifa(
+            app_id=app.pk,
+            vigente_desde=ahora,
+            precio_base=app.precio_base,
+            costo_por_km=app.costo_por_km,
+            costo_por_min=app.costo_por_min,
+            factor_dinamico=app.factor_dinamico,
+        )
+        for app in TransporteApp.objects.all()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cotizador", "0010_resumen_diario"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HistorialTarifa",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "vigente_desde",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("precio_base", models.DecimalField(decimal_places=2, max_digits=8)),
+                ("costo_por_km", models.DecimalField(decimal_places=2, max_digits=8)),
+                ("costo_por_min", models.DecimalField(decimal_places=2, max_digits=10)),
+                (
+                    "factor_dinamico",
+                    models.DecimalField(decimal_places=2, max_digits=4),
+                ),
+                (
+                    "app",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="historial_tarifas",
+                        to="cotizador.transporteapp",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Historial de tarifa",
+                "verbose_name_plural": "Historial de tarifas",
+                "ordering": ["app", "-vigente_desde"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("app", "vigente_desde"),
+                        name="historial_app_vigencia_unico",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(registrar_tarifas_actuales, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cotizador", "0011_historial_tarifa"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="cotizaciontraslado",
+            name="factor_dinamico",
+            field=models.DecimalField(decimal_places=2, default=1.0, max_digits=6),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cotizador", "0012_cotizacion_factor_dinamico_amplio"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name="ruta",
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name="ruta",
+            name="estimada",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AlterField(
+            model_name="ruta",
+            name="clave",
+            field=models.CharField(
+                editable=False, max_length=201, null=True, unique=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ruta",
+            index=models.Index(
+                fields=["origen", "destino"], name="ruta_origen_destino_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import migrations
+from django.utils import timezone
+
+
+def acotar_tarifas_desde_siempre(apps, schema_editor):
+    # La versión anterior de 0011 registró las tarifas vigentes al migrar como vigentes desde 1970,
+    # así que repreciar_cotizaciones aplicaba las tarifas actuales a las cotizaciones más viejas.
+    # Solo se sabe que regían hasta el cambio siguiente: se toman como vigentes desde justo antes
+    # de él (o desde ahora, si la app no cambió de tarifa).
+    HistorialTarifa = apps.get_model("cotizador", "HistorialTarifa")
+    desde_siempre = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+    ahora = timezone.now()
+    for tarifa in HistorialTarifa.objects.filter(vigente_desde=desde_siempre):
+        siguiente = (
+            HistorialTarifa.objects.filter(app_id=tarifa.app_id, vigente_desde__gt=desde_siempre)
+            .order_by("vigente_desde").values_list("vigente_desde", flat=True).first()
+        )
+        tarifa.vigente_desde = min(ahora, siguiente - timedelta(microseconds=1)) if siguiente else ahora
+        tarifa.save(update_fields=["vigente_desde"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cotizador", "0013_ruta_estimada"),
+    ]
+
+    operations = [
+        migrations.RunPython(acotar_tarifas_desde_siempre, migrations.RunPython.noop),
+    ]
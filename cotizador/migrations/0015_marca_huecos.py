@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cotizador", "0014_historial_sin_desde_siempre"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="marcaagregacion",
+            name="huecos",
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
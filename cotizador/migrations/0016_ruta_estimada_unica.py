@@ -0,0 +1,63 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:41
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def unir_estimadas_duplicadas(apps, schema_editor):
+    # Las filas repetidas por la carrera de materializar_ruta se unen en la de menor id:
+    # sus cotizaciones y resúmenes pasan a esa fila antes de borrarlas
+    Ruta = apps.get_model("cotizador", "Ruta")
+    CotizacionTraslado = apps.get_model("cotizador", "CotizacionTraslado")
+    ResumenDiario = apps.get_model("cotizador", "ResumenDiario")
+    campos = ("origen", "destino", "distancia_km", "tiempo_min")
+    repetidas = (
+        Ruta.objects.filter(estimada=True)
+        .values(*campos)
+        .annotate(cantidad=Count("id"), primera=Min("id"))
+        .filter(cantidad__gt=1)
+    )
+    for grupo in repetidas:
+        sobrantes = list(
+            Ruta.objects.filter(estimada=True, **{campo: grupo[campo] for campo in campos})
+            .exclude(id=grupo["primera"])
+            .values_list("id", flat=True)
+        )
+        CotizacionTraslado.objects.filter(ruta_id__in=sobrantes).update(ruta_id=grupo["primera"])
+        for resumen in ResumenDiario.objects.filter(ruta_id__in=sobrantes):
+            destino = ResumenDiario.objects.filter(
+                fecha=resumen.fecha, ruta_id=grupo["primera"], app_id=resumen.app_id
+            ).first()
+            if destino is None:
+                resumen.ruta_id = grupo["primera"]
+                resumen.save()
+                continue
+            destino.cantidad += resumen.cantidad
+            destino.suma_precio += resumen.suma_precio
+            destino.suma_factor += resumen.suma_factor
+            destino.precio_minimo = min(destino.precio_minimo, resumen.precio_minimo)
+            destino.precio_maximo = max(destino.precio_maximo, resumen.precio_maximo)
+            destino.save()
+            resumen.delete()
+        Ruta.objects.filter(id__in=sobrantes).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cotizador", "0015_marca_huecos"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(unir_estimadas_duplicadas, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="ruta",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("estimada", True)),
+                fields=("origen", "destino", "distancia_km", "tiempo_min"),
+                name="ruta_estimada_unica",
+            ),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:49
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copiar_medidas_de_ruta(apps, schema_editor):
+    # Antes no se guardaba con qué distancia y tiempo se cotizó: la ruta actual es lo más cercano
+    Ruta = apps.get_model("cotizador", "Ruta")
+    CotizacionTraslado = apps.get_model("cotizador", "CotizacionTraslado")
+    medidas = Ruta.objects.filter(pk=OuterRef("ruta_id"))
+    CotizacionTraslado.objects.filter(ruta__isnull=False).update(
+        distancia_km=Subquery(medidas.values("distancia_km")[:1]),
+        tiempo_min=Subquery(medidas.values("tiempo_min")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cotizador", "0016_ruta_estimada_unica"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cotizaciontraslado",
+            name="distancia_km",
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name="cotizaciontraslado",
+            name="tiempo_min",
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(copiar_medidas_de_ruta, migrations.RunPython.noop),
+    ]
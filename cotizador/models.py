@@ -1,5 +1,9 @@
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
+from .normalizacion import clave_ruta
 
 class TransporteApp(models.Model):
     nombre = models.CharField(max_length=50, unique=True)
@@ -26,24 +30,137 @@ class Ruta(models.Model):
     distancia_km = models.DecimalField (max_digits = 5, decimal_places=2)
     tiempo_min = models.IntegerField(help_text="Tiempo estimado en minutos")
     creado_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    # origen y destino normalizados y ordenados: una sola fila por par de lugares, en cualquier sentido
+    clave = models.CharField(max_length=201, unique=True, null=True, editable=False)
+    # Ruta aproximada (camino compuesto o estimada por coordenadas) que se guarda al elegir una
+    # cotización, para conservar la distancia y el tiempo cotizados. No tiene clave: las búsquedas
+    # por par no la encuentran, no es arista del grafo ni cuenta en el índice de lugares.
+    estimada = models.BooleanField(default=False, editable=False)
 
     def __str__(self):
         return (f"{self.origen} -> {self.destino} ({self.distancia_km}km)")
 
+    def clean(self):
+        if self.estimada:
+            return
+        self.clave = clave_ruta(self.origen, self.destino)
+        if Ruta.objects.filter(clave=self.clave).exclude(pk=self.pk).exists():
+            raise ValidationError("Ya existe una ruta entre estos lugares (en cualquier sentido).")
+
+    def save(self, *args, **kwargs):
+        self.clave = None if self.estimada else clave_ruta(self.origen, self.destino)
+        super().save(*args, **kwargs)
+
     class Meta:
-        unique_together = ('origen', 'destino')
+        # Las rutas directas son únicas por clave; las estimadas pueden repetir el par (con
+        # otra distancia o tiempo cotizados), pero no los mismos datos
+        indexes = [models.Index(fields=['origen', 'destino'], name='ruta_origen_destino_idx')]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['origen', 'destino', 'distancia_km', 'tiempo_min'],
+                condition=models.Q(estimada=True),
+                name='ruta_estimada_unica',
+            ),
+        ]
         verbose_name = "Ruta Disponible"
         ordering = ['origen', 'destino']
 
 
+class PrecioRutaApp(models.Model):
+    """
+    Precio precalculado de una ruta en una app (matriz materializada ruta x app).
+    `firma` identifica las tarifas y datos de la ruta con que se calculó:
+    si no coincide con los vigentes, el precio se recalcula al cotizar.
+    """
+    ruta = models.ForeignKey(Ruta, on_delete=models.CASCADE, related_name='precios')
+    app = models.ForeignKey(TransporteApp, on_delete=models.CASCADE, related_name='precios')
+    precio = models.DecimalField(max_digits=12, decimal_places=0)
+    tiempo_espera = models.IntegerField()
+    firma = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.ruta} en {self.app}: ${self.precio}"
+
+    class Meta:
+        verbose_name = "Precio precalculado"
+        verbose_name_plural = "Precios precalculados"
+        constraints = [
+            models.UniqueConstraint(fields=['ruta', 'app'], name='precio_ruta_app_unico'),
+        ]
+
+
+class Ubicacion(models.Model):
+    """
+    Índice de los lugares usados como origen o destino en las rutas
+    (y de los lugares con coordenadas, aunque no tengan rutas).
+    Se mantiene desde las señales de Ruta: a mano solo se editan la zona y las coordenadas.
+    """
+    nombre = models.CharField(max_length=100)
+    nombre_normalizado = models.CharField(max_length=100, unique=True)
+    num_rutas = models.PositiveIntegerField(default=0, help_text="Cantidad de rutas que usan este lugar")
+    zona = models.CharField(max_length=50, blank=True, help_text="Zona de tarifa dinámica (según el origen del viaje)")
+    latitud = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True,
+                                  validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitud = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True,
+                                   validators=[MinValueValidator(-180), MaxValueValidator(180)])
+
+    def __str__(self):
+        return self.nombre
+
+    class Meta:
+        verbose_name = "Ubicación"
+        verbose_name_plural = "Ubicaciones"
+        ordering = ['nombre']
+
+
+class FranjaDinamica(models.Model):
+    """
+    Recargo por horario: multiplica el factor dinámico de una app en una franja
+    horaria semanal, en una zona o en todas. Las franjas se compilan en memoria
+    en una tabla por (app, zona) con un multiplicador por hora de la semana.
+    """
+    DIAS_SEMANA = [
+        (0, 'Lunes'), (1, 'Martes'), (2, 'Miércoles'), (3, 'Jueves'),
+        (4, 'Viernes'), (5, 'Sábado'), (6, 'Domingo'),
+    ]
+
+    app = models.ForeignKey(TransporteApp, on_delete=models.CASCADE, related_name='franjas')
+    zona = models.CharField(max_length=50, blank=True, help_text="Vacío: todas las zonas")
+    dia_semana = models.PositiveSmallIntegerField(choices=DIAS_SEMANA, null=True, blank=True,
+                                                  help_text="Vacío: todos los días")
+    hora_inicio = models.PositiveSmallIntegerField(validators=[MaxValueValidator(23)])
+    hora_fin = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(24)],
+                                                help_text="Hora de término (no incluida)")
+    multiplicador = models.DecimalField(max_digits=4, decimal_places=2, default=1.0,
+                                        validators=[MinValueValidator(0)])
+
+    def __str__(self):
+        dia = self.get_dia_semana_display() if self.dia_semana is not None else "Todos los días"
+        return f"{self.app} x{self.multiplicador} ({dia} {self.hora_inicio}-{self.hora_fin}h, {self.zona or 'todas las zonas'})"
+
+    def clean(self):
+        if self.hora_inicio is not None and self.hora_fin is not None and self.hora_fin <= self.hora_inicio:
+            raise ValidationError("La hora de término debe ser posterior a la de inicio.")
+
+    class Meta:
+        verbose_name = "Franja de tarifa dinámica"
+        verbose_name_plural = "Franjas de tarifa dinámica"
+        ordering = ['app', 'zona', 'dia_semana', 'hora_inicio']
+
+
 class CotizacionTraslado(models.Model):
     usuario = models.ForeignKey(User, on_delete=models.CASCADE)
     ruta = models.ForeignKey(Ruta, on_delete=models.SET_NULL, null=True)
     app_seleccionada = models.ForeignKey(TransporteApp, on_delete=models.SET_NULL, null=True)
     precio = models.DecimalField(max_digits=10, decimal_places=2)
     tiempo_espera = models.IntegerField(null=True)
-    factor_dinamico = models.DecimalField(max_digits=3, decimal_places=2, default=1.00)
-    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    # Factor de la app (hasta 99.99) por el recargo por horario (hasta 99.99): cabe en 9999.99
+    factor_dinamico = models.DecimalField(max_digits=6, decimal_places=2, default=1.00)
+    # Distancia y tiempo con que se cotizó: import_rutas puede cambiar la ruta después
+    distancia_km = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    tiempo_min = models.IntegerField(null=True, blank=True)
+    # default en vez de auto_now_add: la escritura diferida conserva la hora real de la selección
+    fecha_creacion = models.DateTimeField(default=timezone.now, editable=False, db_index=True)
 
     def __str__(self):
         if self.ruta:
@@ -52,4 +169,90 @@ class CotizacionTraslado(models.Model):
 
     class Meta:
         verbose_name = "Solicitud de Cotizacion"
-        ordering = ['-fecha_creacion']
\ No newline at end of file
+        ordering = ['-fecha_creacion']
+        indexes = [
+            # Listado por usuario paginado por cursor (MisCotizacionesView)
+            models.Index(fields=['usuario', '-fecha_creacion', '-id'], name='cotizacion_usuario_fecha_idx'),
+        ]
+
+class ResumenDiario(models.Model):
+    """
+    Agregado diario de las cotizaciones seleccionadas por (ruta, app), mantenido
+    incrementalmente por el comando agregar_cotizaciones. Los informes leen esta tabla
+    en vez de recorrer todo el historial de CotizacionTraslado.
+    """
+    fecha = models.DateField()
+    ruta = models.ForeignKey(Ruta, on_delete=models.CASCADE, related_name='resumenes')
+    app = models.ForeignKey(TransporteApp, on_delete=models.CASCADE, related_name='resumenes')
+    cantidad = models.PositiveIntegerField(default=0)
+    suma_precio = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    precio_minimo = models.DecimalField(max_digits=10, decimal_places=2)
+    precio_maximo = models.DecimalField(max_digits=10, decimal_places=2)
+    suma_factor = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    @property
+    def precio_promedio(self):
+        return self.suma_precio / self.cantidad if self.cantidad else None
+
+    @property
+    def factor_promedio(self):
+        return self.suma_factor / self.cantidad if self.cantidad else None
+
+    def __str__(self):
+        return f"{self.fecha} {self.ruta} en {self.app}: {self.cantidad}"
+
+    class Meta:
+        verbose_name = "Resumen diario"
+        verbose_name_plural = "Resúmenes diarios"
+        ordering = ['-fecha']
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'ruta', 'app'], name='resumen_fecha_ruta_app_unico'),
+        ]
+
+
+class MarcaAgregacion(models.Model):
+    """
+    Última cotización (por id) incorporada a los agregados: cada corrida procesa solo las posteriores.
+    Los ids se asignan antes del commit, así que uno menor puede aparecer después de avanzar la
+    marca: los que faltaban quedan en `huecos` y cada corrida los vuelve a buscar mientras estén
+    a menos de COTIZADOR_AGREGACION_VENTANA ids de la marca.
+    """
+    nombre = models.CharField(max_length=50, unique=True)
+    ultimo_id = models.BigIntegerField(default=0)
+    huecos = models.JSONField(default=list, blank=True)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.nombre}: hasta #{self.ultimo_id}"
+
+    class Meta:
+        verbose_name = "Marca de agregación"
+        verbose_name_plural = "Marcas de agregación"
+
+
+class HistorialTarifa(models.Model):
+    """
+    Tarifas de una app vigentes desde `vigente_desde` hasta el registro siguiente de la
+    misma app. Solo se agrega (desde las señales de TransporteApp) cuando cambia alguna
+    tarifa, así que hay una fila por cambio y no por cada vez que se guarda la app.
+    """
+    app = models.ForeignKey(TransporteApp, on_delete=models.CASCADE, related_name='historial_tarifas')
+    vigente_desde = models.DateTimeField(default=timezone.now)
+    precio_base = models.DecimalField(max_digits=8, decimal_places=2)
+    costo_por_km = models.DecimalField(max_digits=8, decimal_places=2)
+    costo_por_min = models.DecimalField(max_digits=10, decimal_places=2)
+    factor_dinamico = models.DecimalField(max_digits=4, decimal_places=2)
+
+    CAMPOS_TARIFA = ('precio_base', 'costo_por_km', 'costo_por_min', 'factor_dinamico')
+
+    def __str__(self):
+        return f"{self.app} desde {self.vigente_desde:%Y-%m-%d %H:%M}"
+
+    class Meta:
+        verbose_name = "Historial de tarifa"
+        verbose_name_plural = "Historial de tarifas"
+        ordering = ['app', '-vigente_desde']
+        constraints = [
+            # También es el índice de las búsquedas por intervalo (app, vigente_desde <= momento)
+            models.UniqueConstraint(fields=['app', 'vigente_desde'], name='historial_app_vigencia_unico'),
+        ]
@@ -0,0 +1,20 @@
+import unicodedata
+
+
+def normalizar_lugar(nombre):
+    """
+    Normaliza el nombre de un lugar para compararlo: sin espacios sobrantes,
+    sin tildes y sin distinguir mayúsculas de minúsculas.
+    """
+    nombre = ' '.join((nombre or '').split())
+    descompuesto = unicodedata.normalize('NFKD', nombre)
+    sin_tildes = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return sin_tildes.casefold()
+
+
+def clave_ruta(origen, destino):
+    """
+    Clave canónica de una ruta: ambos lugares normalizados y ordenados,
+    de modo que A -> B y B -> A comparten la misma clave.
+    """
+    return '|'.join(sorted((normalizar_lugar(origen), normalizar_lugar(destino))))
@@ -0,0 +1,65 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+
+def codificar_cursor(cotizacion):
+    """
+    Codifica la posición (fecha_creacion, id) de una fila como cursor para la URL.
+    """
+    crudo = f"{cotizacion.fecha_creacion.isoformat()}|{cotizacion.pk}"
+    return base64.urlsafe_b64encode(crudo.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """
+    Devuelve (fecha_creacion, id) a partir de un cursor, o None si no es válido.
+    """
+    if not cursor:
+        return None
+    try:
+        crudo = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        fecha, pk = crudo.rsplit('|', 1)
+        return datetime.fromisoformat(fecha), int(pk)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+
+
+class PaginadorConteoEstimado(Paginator):
+    """
+    Paginador para tablas muy grandes: si la consulta no tiene filtros, el total
+    se estima (estadísticas del planificador en PostgreSQL, COUNT(*) cacheado en
+    los demás motores) en vez de contar todas las filas en cada página.
+    """
+    duracion_cache = 300  # segundos
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet) or queryset.query.where:
+            return super().count
+        modelo = queryset.model
+        conexion = connections[queryset.db]
+        if conexion.vendor == 'postgresql':
+            with conexion.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+                    [modelo._meta.db_table],
+                )
+                fila = cursor.fetchone()
+            # reltuples vale -1 si la tabla aún no fue analizada
+            if fila and fila[0] is not None and fila[0] >= 0:
+                return fila[0]
+            return super().count
+        clave = f"cotizador:conteo:{queryset.db}:{modelo._meta.db_table}"
+        total = cache.get(clave)
+        if total is None:
+            total = super().count
+            cache.set(clave, total, self.duracion_cache)
+        return total
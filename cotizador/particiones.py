@@ -0,0 +1,147 @@
+import re
+from collections import namedtuple
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+
+from .models import CotizacionTraslado
+
+TABLA = CotizacionTraslado._meta.db_table
+# Particiones mensuales: <tabla>_p2025_01 cubre [2025-01-01, 2025-02-01) UTC
+_NOMBRE_PARTICION = re.compile(rf'^{TABLA}_p(\d{{4}})_(\d{{2}})$')
+PARTICION_RESTO = f'{TABLA}_resto'
+
+Particion = namedtuple('Particion', ['nombre', 'desde', 'hasta'])
+
+
+def _inicio_mes(fecha):
+    return datetime(fecha.year, fecha.month, 1, tzinfo=dt_timezone.utc)
+
+
+def _mes_siguiente(inicio):
+    return inicio.replace(year=inicio.year + inicio.month // 12, month=inicio.month % 12 + 1)
+
+
+def _particion_del_mes(inicio):
+    return Particion(f'{TABLA}_p{inicio.year:04d}_{inicio.month:02d}', inicio, _mes_siguiente(inicio))
+
+
+def tabla_particionada():
+    """
+    Indica si la tabla de cotizaciones es una tabla particionada de PostgreSQL.
+    """
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [TABLA])
+        return cursor.fetchone() is not None
+
+
+def listar_particiones():
+    """
+    Particiones mensuales existentes, de la más antigua a la más reciente.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)",
+            [TABLA],
+        )
+        nombres = [fila[0] for fila in cursor.fetchall()]
+    meses = []
+    for nombre in nombres:
+        coincidencia = _NOMBRE_PARTICION.match(nombre)
+        if coincidencia:
+            meses.append(datetime(int(coincidencia.group(1)), int(coincidencia.group(2)), 1, tzinfo=dt_timezone.utc))
+    return [_particion_del_mes(inicio) for inicio in sorted(meses)]
+
+
+def particiones_vencidas(antes_de):
+    """
+    Particiones cuyo mes termina antes de `antes_de` (ninguna si la tabla no está particionada).
+    """
+    if not tabla_particionada():
+        return []
+    return [particion for particion in listar_particiones() if particion.hasta <= antes_de]
+
+
+def eliminar_particion(particion):
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{TABLA}" DETACH PARTITION "{particion.nombre}"')
+        cursor.execute(f'DROP TABLE "{particion.nombre}"')
+
+
+def crear_particiones(hasta):
+    """
+    Crea las particiones mensuales que falten desde la última existente (o el mes actual)
+    hasta el mes de `hasta`, inclusive. Devuelve los nombres creados.
+    """
+    existentes = listar_particiones()
+    inicio = existentes[-1].hasta if existentes else _inicio_mes(datetime.now(dt_timezone.utc))
+    creadas = []
+    with connection.cursor() as cursor:
+        while inicio <= hasta:
+            particion = _particion_del_mes(inicio)
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS "{particion.nombre}" PARTITION OF "{TABLA}" '
+                f"FOR VALUES FROM ('{particion.desde.isoformat()}') TO ('{particion.hasta.isoformat()}')"
+            )
+            creadas.append(particion.nombre)
+            inicio = particion.hasta
+    return creadas
+
+
+def convertir_tabla(hasta):
+    """
+    Reemplaza la tabla de cotizaciones por una particionada por mes de fecha_creacion, con
+    particiones desde la cotización más antigua hasta el mes de `hasta` y una partición
+    por omisión para el resto. Copia los datos y recrea índices y claves foráneas en una
+    sola transacción; bloquea la tabla mientras dura, así que conviene una ventana de
+    mantenimiento. La clave primaria pasa a ser (id, fecha_creacion), como exige PostgreSQL.
+    """
+    nueva = f'{TABLA}_nueva'
+    secuencia = f'{TABLA}_id_seq_particionada'
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT IN "
+            "(SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'p')",
+            [TABLA, TABLA],
+        )
+        indices = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+            [TABLA],
+        )
+        foraneas = cursor.fetchall()
+        cursor.execute(f'SELECT MIN(fecha_creacion), MAX(id) FROM "{TABLA}"')
+        mas_antigua, ultimo_id = cursor.fetchone()
+
+        cursor.execute(f'CREATE SEQUENCE "{secuencia}"')
+        cursor.execute("SELECT setval(%s, %s, false)", [secuencia, (ultimo_id or 0) + 1])
+        cursor.execute(
+            f'CREATE TABLE "{nueva}" (LIKE "{TABLA}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            'PARTITION BY RANGE (fecha_creacion)'
+        )
+        cursor.execute(f'''ALTER TABLE "{nueva}" ALTER COLUMN id SET DEFAULT nextval('"{secuencia}"')''')
+        cursor.execute(f'ALTER TABLE "{nueva}" ADD PRIMARY KEY (id, fecha_creacion)')
+        inicio = _inicio_mes(mas_antigua or datetime.now(dt_timezone.utc))
+        while inicio <= hasta:
+            particion = _particion_del_mes(inicio)
+            cursor.execute(
+                f'CREATE TABLE "{particion.nombre}" PARTITION OF "{nueva}" '
+                f"FOR VALUES FROM ('{particion.desde.isoformat()}') TO ('{particion.hasta.isoformat()}')"
+            )
+            inicio = particion.hasta
+        cursor.execute(f'CREATE TABLE "{PARTICION_RESTO}" PARTITION OF "{nueva}" DEFAULT')
+        cursor.execute(f'INSERT INTO "{nueva}" SELECT * FROM "{TABLA}"')
+
+        cursor.execute(f'DROP TABLE "{TABLA}"')
+        cursor.execute(f'ALTER TABLE "{nueva}" RENAME TO "{TABLA}"')
+        cursor.execute(f'ALTER SEQUENCE "{secuencia}" OWNED BY "{TABLA}".id')
+        cursor.execute(f'ALTER TABLE "{TABLA}" RENAME CONSTRAINT "{nueva}_pkey" TO "{TABLA}_pkey"')
+        # Las definiciones guardadas nombran la tabla original, que ahora es la particionada
+        for _, definicion in indices:
+            cursor.execute(definicion)
+        for nombre, definicion in foraneas:
+            cursor.execute(f'ALTER TABLE "{TABLA}" ADD CONSTRAINT "{nombre}" {definicion}')
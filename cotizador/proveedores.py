@@ -0,0 +1,121 @@
+import asyncio
+import json
+import logging
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .simulador import AppCotizadora
+
+logger = logging.getLogger(__name__)
+
+# Hilos para las llamadas HTTP bloqueantes; propios del módulo para que una llamada
+# que excede su tiempo límite no retrase el cierre del bucle de eventos de la solicitud
+_hilos_proveedores = ThreadPoolExecutor(max_workers=16, thread_name_prefix='proveedores')
+
+
+class ProveedorLocal:
+    """
+    Cotiza con la fórmula local de AppCotizadora.
+    """
+    remoto = False
+
+    def __init__(self, timeout=None, **opciones):
+        self.timeout = timeout
+
+    async def cotizar(self, app, ruta):
+        return await sync_to_async(AppCotizadora(app, ruta).calcular_cotizacion)()
+
+
+class ProveedorHTTP:
+    """
+    Cotiza llamando a un servicio de precios externo por HTTP (POST JSON).
+    El servicio recibe app, origen, destino, distancia_km y tiempo_min y responde
+    {"precio": ..., "tiempo_espera": ..., "factor_dinamico": ...}.
+    """
+    remoto = True
+
+    def __init__(self, url, timeout=None, **opciones):
+        self.url = url
+        self.timeout = timeout
+
+    def _solicitar(self, app, ruta):
+        cuerpo = json.dumps({
+            'app': app.nombre,
+            'origen': ruta.origen,
+            'destino': ruta.destino,
+            'distancia_km': str(ruta.distancia_km),
+            'tiempo_min': ruta.tiempo_min,
+        }).encode()
+        solicitud = urllib.request.Request(self.url, data=cuerpo, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(solicitud, timeout=self.timeout) as respuesta:
+            datos = json.loads(respuesta.read())
+        return {
+            'precio': round(Decimal(str(datos['precio'])), 0),
+            'tiempo_espera': int(datos.get('tiempo_espera', app.tiempo_espera)),
+            'factor_dinamico': Decimal(str(datos.get('factor_dinamico', app.factor_dinamico))),
+        }
+
+    async def cotizar(self, app, ruta):
+        # urllib es bloqueante: cada llamada corre en un hilo aparte
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hilos_proveedores, self._solicitar, app, ruta)
+
+
+def obtener_proveedor(app):
+    """
+    Devuelve el proveedor de precios configurado para la app en COTIZADOR_PROVEEDORES
+    (por nombre de app); por defecto, el proveedor local.
+    """
+    configuracion = dict(settings.COTIZADOR_PROVEEDORES.get(app.nombre, {}))
+    clase = configuracion.pop('clase', 'cotizador.proveedores.ProveedorHTTP' if 'url' in configuracion
+                              else 'cotizador.proveedores.ProveedorLocal')
+    configuracion.setdefault('timeout', settings.COTIZADOR_PROVEEDOR_TIMEOUT)
+    return import_string(clase)(**configuracion)
+
+
+async def _cotizar_con_limite(proveedor, app, ruta):
+    return await asyncio.wait_for(proveedor.cotizar(app, ruta), timeout=proveedor.timeout)
+
+
+async def cotizar_con_proveedores(cotizaciones, apps, ruta):
+    """
+    Reemplaza las cotizaciones locales de las apps con proveedor remoto por las del proveedor,
+    consultando todos los proveedores a la vez. Si un proveedor falla o excede su tiempo
+    límite, su app se omite y se devuelven las demás (resultado parcial).
+    La latencia total es la del proveedor más lento, no la suma.
+    """
+    remotas = {}
+    for app in apps:
+        proveedor = obtener_proveedor(app)
+        if proveedor.remoto:
+            remotas[app.pk] = (app, proveedor)
+    if not remotas:
+        return cotizaciones
+
+    resultados = await asyncio.gather(
+        *(_cotizar_con_limite(proveedor, app, ruta) for app, proveedor in remotas.values()),
+        return_exceptions=True,
+    )
+    por_app = dict(zip(remotas, resultados))
+
+    finales = []
+    for cotizacion in cotizaciones:
+        resultado = por_app.get(cotizacion['app_id'])
+        if resultado is None:
+            finales.append(cotizacion)
+        elif isinstance(resultado, BaseException):
+            # Si algún proveedor falla, se ignora y se continúa con las demás apps
+            logger.warning("Error al cotizar con %s: %r", cotizacion['app_nombre'], resultado)
+        else:
+            finales.append({
+                **cotizacion,
+                'precio': resultado['precio'],
+                'tiempo_espera': resultado['tiempo_espera'],
+                'factor_dinamico': resultado['factor_dinamico'],
+            })
+    return finales
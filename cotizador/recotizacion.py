@@ -0,0 +1,42 @@
+from decimal import Decimal
+
+from django.db import transaction
+
+from .analitica import recotizar_en_resumenes
+from .grafo import materializar_ruta
+from .models import CotizacionTraslado
+
+CAMPOS_RECOTIZADOS = [
+    'ruta', 'app_seleccionada', 'precio', 'tiempo_espera', 'factor_dinamico', 'distancia_km', 'tiempo_min',
+]
+
+
+def recotizar_cotizacion(cotizacion_id, usuario, ruta, cotizacion_app):
+    """
+    Reescribe en su lugar una cotización del usuario con otra ruta y la cotización de la app
+    elegida (app_id, precio, tiempo_espera, factor_dinamico), en una transacción con la fila
+    bloqueada: no se borra ni se crea otra fila. Una ruta aproximada (sin guardar) se guarda
+    como ruta estimada. Si ya estaba en los resúmenes diarios, pasa al grupo nuevo. Devuelve
+    la cotización, o None si no existe o no hay ruta. Lanza ValidationError si los valores no
+    caben en el modelo.
+    """
+    with transaction.atomic():
+        cotizacion = CotizacionTraslado.objects.select_for_update().filter(pk=cotizacion_id, usuario=usuario).first()
+        if cotizacion is None:
+            return None
+        anterior = (cotizacion.ruta_id, cotizacion.app_seleccionada_id, cotizacion.precio, cotizacion.factor_dinamico)
+        if ruta.pk is None:
+            ruta = materializar_ruta(ruta.origen, ruta.destino, usuario)
+            if ruta is None:
+                return None
+        cotizacion.ruta = ruta
+        cotizacion.distancia_km = ruta.distancia_km
+        cotizacion.tiempo_min = ruta.tiempo_min
+        cotizacion.app_seleccionada_id = int(cotizacion_app['app_id'])
+        cotizacion.precio = Decimal(cotizacion_app['precio'])
+        cotizacion.tiempo_espera = int(cotizacion_app['tiempo_espera'])
+        cotizacion.factor_dinamico = Decimal(cotizacion_app['factor_dinamico'] or "1.0")
+        cotizacion.clean_fields(exclude=['usuario', 'ruta', 'app_seleccionada'])
+        cotizacion.save(update_fields=CAMPOS_RECOTIZADOS)
+        recotizar_en_resumenes(cotizacion, *anterior)
+    return cotizacion
@@ -0,0 +1,80 @@
+import math
+import platform
+import re
+import subprocess
+from html import unescape
+
+from django.conf import settings
+from django.utils import timezone
+
+_FORMULARIO_REDIRECCION = re.compile(r'<form[^>]*action="(/redireccion/\d+/)"(.*?)</form>', re.S)
+_CAMPO = re.compile(r'<input[^>]*name="([^"]+)"[^>]*value="([^"]*)"')
+
+
+def percentil(ordenados, p):
+    """
+    Percentil `p` (0-100) de una lista ya ordenada, por el método del rango más cercano.
+    """
+    if not ordenados:
+        return None
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+def resumen_latencias(duraciones, segundos=None, consultas=None, errores=0):
+    """
+    Solicitudes, rendimiento (por segundo), latencias p50/p95/p99 en ms y consultas
+    promedio por solicitud de un flujo. Si no se indica `segundos`, el rendimiento
+    se calcula sobre la suma de las duraciones (solicitudes una tras otra).
+    """
+    ordenadas = sorted(duraciones)
+    total = sum(ordenadas)
+    segundos = segundos if segundos is not None else total
+    resumen = {
+        'solicitudes': len(ordenadas),
+        'errores': errores,
+        'por_segundo': round(len(ordenadas) / segundos, 1) if segundos else None,
+        'media_ms': round(total / len(ordenadas) * 1000, 2) if ordenadas else None,
+    }
+    for p in (50, 95, 99):
+        valor = percentil(ordenadas, p)
+        resumen[f'p{p}_ms'] = round(valor * 1000, 2) if valor is not None else None
+    if consultas is not None:
+        resumen['consultas_por_solicitud'] = round(sum(consultas) / len(consultas), 2) if consultas else None
+    return resumen
+
+
+def campos_redireccion(html):
+    """
+    Acción y campos ocultos de los formularios de selección de cotización (hacia RedireccionView)
+    de una página de resultados, como lista de pares (url, datos).
+    """
+    return [
+        (accion, {nombre: unescape(valor) for nombre, valor in _CAMPO.findall(cuerpo)})
+        for accion, cuerpo in _FORMULARIO_REDIRECCION.findall(html)
+    ]
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def informe(tipo, parametros, flujos):
+    """
+    Informe en formato JSON (como diccionario) de una corrida, con lo necesario
+    para comparar corridas entre commits.
+    """
+    return {
+        'tipo': tipo,
+        'commit': _commit_actual(),
+        'fecha': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'base_de_datos': settings.DATABASES['default']['ENGINE'].rsplit('.', 1)[-1],
+        'parametros': parametros,
+        'flujos': flujos,
+    }
@@ -0,0 +1,119 @@
+from decimal import InvalidOperation
+
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .basedatos import aplicar_pragmas
+from .dinamica import tabla_dinamica
+from .grafo import arista_ruta, grafo_rutas
+from .matriz import actualizar_fila_ruta, recalculo_columnas
+from .models import FranjaDinamica, Ruta, TransporteApp, Ubicacion
+from .normalizacion import normalizar_lugar
+from .simulador import rutas_recientes
+from .tarifas import registrar_tarifa, tarifario
+from .ubicaciones import actualizar_ubicaciones, indice_ubicaciones
+
+
+@receiver([post_save, post_delete], sender=TransporteApp)
+def invalidar_tarifas(sender, **kwargs):
+    # Se espera al commit para que los demás procesos no reconstruyan con datos sin confirmar.
+    # Nota: QuerySet.update() no dispara señales.
+    transaction.on_commit(tarifario.invalidar)
+
+
+@receiver(post_save, sender=TransporteApp)
+def registrar_historial_tarifa(sender, instance, raw=False, **kwargs):
+    # En la misma transacción que el cambio: la nueva generación de 'tarifas' ya incluye el historial
+    if not raw:
+        registrar_tarifa(instance)
+
+
+@receiver(post_save, sender=TransporteApp)
+def recalcular_columna_precios(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(lambda: recalculo_columnas.programar(instance.pk))
+
+
+@receiver(pre_save, sender=Ruta)
+def recordar_lugares_previos(sender, instance, raw=False, **kwargs):
+    # Guarda origen y destino anteriores para ajustar el índice de ubicaciones tras guardar
+    instance._lugares_previos = ()
+    if instance.pk and not raw and not instance.estimada:
+        previos = Ruta.objects.filter(pk=instance.pk).values_list('origen', 'destino').first()
+        instance._lugares_previos = previos or ()
+
+
+@receiver([post_save, post_delete], sender=Ruta)
+def invalidar_rutas(sender, **kwargs):
+    transaction.on_commit(rutas_recientes.invalidar)
+
+
+# Las rutas estimadas no son aristas del grafo, ni cuentan en el índice de lugares ni en la matriz
+
+@receiver(post_save, sender=Ruta)
+def indexar_lugares_ruta(sender, instance, raw=False, **kwargs):
+    if raw or instance.estimada:
+        return
+    actualizar_ubicaciones(
+        agregados=(instance.origen, instance.destino),
+        retirados=getattr(instance, '_lugares_previos', ()),
+    )
+
+
+@receiver(post_save, sender=Ruta)
+def recalcular_fila_precios(sender, instance, raw=False, **kwargs):
+    # Fuera de la transacción que guarda la ruta: mientras tanto la firma de las filas viejas
+    # no coincide y se cotiza en memoria
+    if not raw and not instance.estimada:
+        transaction.on_commit(lambda: actualizar_fila_ruta(instance.pk))
+
+
+@receiver(post_delete, sender=Ruta)
+def desindexar_lugares_ruta(sender, instance, **kwargs):
+    if not instance.estimada:
+        actualizar_ubicaciones(retirados=(instance.origen, instance.destino))
+
+
+@receiver(post_save, sender=Ruta)
+def actualizar_grafo_ruta(sender, instance, raw=False, **kwargs):
+    # El grafo de este proceso se actualiza en el lugar; los demás procesos lo reconstruyen
+    if instance.estimada:
+        return
+    previos = getattr(instance, '_lugares_previos', ())
+    retiradas = [tuple(normalizar_lugar(lugar) for lugar in previos)] if previos else []
+    try:
+        agregadas = [arista_ruta(instance)]
+    except (TypeError, ValueError, InvalidOperation):
+        agregadas = None
+    if raw or agregadas is None:
+        transaction.on_commit(grafo_rutas.invalidar)
+    else:
+        transaction.on_commit(lambda: grafo_rutas.actualizar(retiradas, agregadas))
+
+
+@receiver(post_delete, sender=Ruta)
+def retirar_del_grafo(sender, instance, **kwargs):
+    if instance.estimada:
+        return
+    retirada = (normalizar_lugar(instance.origen), normalizar_lugar(instance.destino))
+    transaction.on_commit(lambda: grafo_rutas.actualizar(retiradas=[retirada]))
+
+
+@receiver([post_save, post_delete], sender=FranjaDinamica)
+def invalidar_tabla_dinamica(sender, **kwargs):
+    transaction.on_commit(tabla_dinamica.invalidar)
+
+
+@receiver(post_save, sender=Ubicacion)
+def invalidar_zonas(sender, created, raw=False, **kwargs):
+    # Las altas ya invalidan el índice desde actualizar_ubicaciones; aquí, los cambios de zona o coordenadas
+    if not created and not raw:
+        transaction.on_commit(indice_ubicaciones.invalidar)
+
+
+@receiver(connection_created)
+def ajustar_sqlite(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite':
+        aplicar_pragmas(connection)
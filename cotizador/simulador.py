@@ -1,21 +1,44 @@
-from django.db.models import Q
+import hashlib
+import logging
+from array import array
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
+from .cache import CacheLRU
+from .dinamica import SIN_RECARGO, factor_efectivo, hora_semana, obtener_tabla_dinamica
 from .models import Ruta, TransporteApp
+from .normalizacion import clave_ruta
+from .ubicaciones import obtener_indice_ubicaciones
+
+logger = logging.getLogger(__name__)
+
 
 class AppCotizadora:
     """
     Clase que simula la cotización de traslados en distintas aplicaciones de transporte.
     """
 
-    def __init__(self, app: TransporteApp, ruta: Ruta):
+    def __init__(self, app: TransporteApp, ruta: Ruta, momento=None):
         self.app = app
         self.ruta = ruta
+        self.momento = momento
+
+    def multiplicador(self):
+        """
+        Recargo por horario (en centésimas) de la app en la zona de origen de la ruta.
+        """
+        tabla = obtener_tabla_dinamica()
+        if tabla.vacia:
+            return SIN_RECARGO
+        zona = obtener_indice_ubicaciones().zona(self.ruta.origen)
+        return tabla.multiplicador(self.app.pk, zona, hora_semana(self.momento))
 
     def calcular_cotizacion(self):
         """
-        Calcula el precio estimado del traslado según la distancia y el factor dinámico de la app.
+        Calcula el precio estimado del traslado según la distancia y el factor dinámico de la app
+        (con el recargo de la franja horaria vigente, si la hay).
         """
         precio_base = self.app.precio_base
-        factor_dinamico = self.app.factor_dinamico
+        factor_dinamico = factor_efectivo(self.app.factor_dinamico, self.multiplicador())
         distancia = self.ruta.distancia_km
         tiempo = self.ruta.tiempo_min
 
@@ -33,23 +56,203 @@ class AppCotizadora:
             "destino_nombre": self.ruta.destino,
         }
 
+# Rutas buscadas recientemente por clave; se vacía cuando cambia la generación 'rutas'
+rutas_recientes = CacheLRU('rutas', getattr(settings, 'COTIZADOR_CACHE_RUTAS', 1024))
+
+
+def _escalar(valor, decimales):
+    """
+    Convierte un valor numérico a entero escalado en 10**decimales, sin pérdida.
+    """
+    escalado = Decimal(valor).scaleb(decimales)
+    if escalado != escalado.to_integral_value():
+        raise ValueError(f"{valor} tiene más de {decimales} decimales")
+    return int(escalado)
+
+
+def _redondear(numerador, escala):
+    """
+    Divide por la escala redondeando al entero más cercano (mitad al par),
+    igual que round(Decimal, 0).
+    """
+    cociente, resto = divmod(numerador, escala)
+    if resto * 2 > escala or (resto * 2 == escala and cociente % 2):
+        cociente += 1
+    return cociente
+
+
+def precios_escalados(columnas, distancia, tiempo):
+    """
+    Precio redondeado de una ruta en cada app a partir de las columnas de tarifas
+    (precio_base, costo_por_km, costo_por_min, factor_dinamico) ya escaladas.
+    Es una función pura: puede ejecutarse en otro proceso.
+    """
+    precio_base, costo_por_km, costo_por_min, factor_dinamico = columnas
+    escala = CotizadorLote.ESCALA
+    return [
+        _redondear((base + distancia * km + tiempo * minuto) * factor, escala)
+        for base, km, minuto, factor in zip(precio_base, costo_por_km, costo_por_min, factor_dinamico)
+    ]
+
+
+# Constantes impares de 64 bits para mezclar los datos de la ruta en la firma
+_MEZCLA_DISTANCIA = 0x9E3779B97F4A7C15
+_MEZCLA_TIEMPO = 0xC2B2AE3D27D4EB4F
+_MODULO_FIRMA = 2 ** 63  # cabe en un BigIntegerField
+
+
+def firma_tarifas(columnas_app, tiempo_espera):
+    """
+    Huella de las tarifas de una app. Se calcula una vez por tarifario, no por cotización.
+    """
+    datos = '|'.join(str(valor) for valor in (*columnas_app, tiempo_espera))
+    return int.from_bytes(hashlib.blake2b(datos.encode(), digest_size=8).digest(), 'big') >> 1
+
+
+def firma_precio(firma_app, distancia, tiempo):
+    """
+    Huella de los datos de los que depende un precio (tarifas de la app y ruta).
+    Permite saber si un precio precalculado sigue vigente; son solo operaciones
+    con enteros, para que validar una fila cueste menos que calcular el precio.
+    """
+    return (firma_app + distancia * _MEZCLA_DISTANCIA + tiempo * _MEZCLA_TIEMPO) % _MODULO_FIRMA
+
+
+class CotizadorLote:
+    """
+    Motor de cotización por lotes.
+    Guarda las tarifas de todas las apps en columnas de enteros escalados
+    y calcula la matriz de precios ruta x app en una sola pasada,
+    con el mismo resultado redondeado que AppCotizadora.
+    """
+    # precio_base + distancia * costo_por_km + tiempo * costo_por_min queda en diezmilésimas,
+    # y al multiplicar por el factor dinámico (centésimas) en millonésimas.
+    ESCALA = 10 ** 6
+
+    def __init__(self, apps):
+        self.apps = []
+        precio_base, costo_por_km, costo_por_min, factor_dinamico = [], [], [], []
+        for app in apps:
+            try:
+                columnas = (
+                    _escalar(app.precio_base, 4),
+                    _escalar(app.costo_por_km, 2),
+                    _escalar(app.costo_por_min, 4),
+                    _escalar(app.factor_dinamico, 2),
+                )
+            except (TypeError, ValueError, InvalidOperation) as e:
+                # Si alguna app tiene tarifas inválidas, se ignora y se continúa con las demás
+                logger.warning("Tarifas inválidas en %s: %s", app.nombre, e)
+                continue
+            self.apps.append(app)
+            precio_base.append(columnas[0])
+            costo_por_km.append(columnas[1])
+            costo_por_min.append(columnas[2])
+            factor_dinamico.append(columnas[3])
+
+        self.precio_base = array('q', precio_base)
+        self.costo_por_km = array('q', costo_por_km)
+        self.costo_por_min = array('q', costo_por_min)
+        self.factor_dinamico = array('q', factor_dinamico)
+        self.logos = [app.logo.url if app.logo else None for app in self.apps]
+        self.firmas_tarifas = [
+            firma_tarifas(columnas_app, app.tiempo_espera)
+            for app, columnas_app in zip(self.apps, zip(*self.columnas))
+        ]
+
+    @property
+    def columnas(self):
+        return (self.precio_base, self.costo_por_km, self.costo_por_min, self.factor_dinamico)
+
+    def factores_con_recargo(self, multiplicadores):
+        """
+        Columna de factores dinámicos (en centésimas) con el recargo de cada app aplicado,
+        redondeados igual que factor_efectivo.
+        """
+        return array('q', (
+            _redondear(factor * multiplicador, SIN_RECARGO)
+            for factor, multiplicador in zip(self.factor_dinamico, multiplicadores)
+        ))
+
+    def calcular_precios(self, ruta: Ruta, multiplicadores=None):
+        """
+        Devuelve el precio redondeado de la ruta en cada app, en el orden de self.apps.
+        `multiplicadores` son los recargos por horario (en centésimas) de cada app, si los hay.
+        """
+        columnas = self.columnas
+        if multiplicadores is not None:
+            columnas = columnas[:3] + (self.factores_con_recargo(multiplicadores),)
+        distancia = _escalar(ruta.distancia_km, 2)
+        tiempo = _escalar(ruta.tiempo_min, 0)
+        return [Decimal(precio) for precio in precios_escalados(columnas, distancia, tiempo)]
+
+    def calcular_matriz(self, rutas):
+        """
+        Calcula la matriz de precios: una fila por ruta y una columna por app.
+        """
+        return [self.calcular_precios(ruta) for ruta in rutas]
+
+    def firmas(self, ruta: Ruta):
+        """
+        Huella vigente del precio de la ruta en cada app, en el orden de self.apps.
+        """
+        distancia = _escalar(ruta.distancia_km, 2)
+        tiempo = _escalar(ruta.tiempo_min, 0)
+        return [firma_precio(firma_app, distancia, tiempo) for firma_app in self.firmas_tarifas]
+
+    def cotizaciones(self, ruta: Ruta, precios=None, multiplicadores=None):
+        """
+        Genera la lista de cotizaciones de la ruta en todas las apps,
+        con el formato que usan las plantillas del cotizador.
+        Si se reciben precios ya calculados (en el orden de self.apps) se usan esos.
+        """
+        if precios is None:
+            precios = self.calcular_precios(ruta, multiplicadores)
+        if multiplicadores is None:
+            multiplicadores = [SIN_RECARGO] * len(self.apps)
+        return [
+            {
+                'app_id': app.pk,
+                'app_nombre': app.nombre,
+                'app_logo': logo,
+                'precio': precio,
+                'tiempo_espera': app.tiempo_espera,
+                'factor_dinamico': factor_efectivo(app.factor_dinamico, multiplicador),
+                'origen_nombre': ruta.origen,
+                'destino_nombre': ruta.destino,
+            }
+            for app, logo, precio, multiplicador in zip(self.apps, self.logos, precios, multiplicadores)
+        ]
+
 
 def obtener_datos_ruta(origen: str, destino: str):
     """
     Busca una ruta en la base de datos que coincida con el origen y destino.
     Se admite tanto la dirección directa como inversa.
+    La búsqueda usa la clave canónica (índice único) con una cache LRU delante.
     """
-    condicion_directa = Q(origen__iexact=origen, destino__iexact=destino)
-    condicion_inversa = Q(origen__iexact=destino, destino__iexact=origen)
-    return Ruta.objects.filter(condicion_directa | condicion_inversa).first()
+    return rutas_recientes.obtener(clave_ruta(origen, destino), _buscar_ruta)
 
 
-def obtener_ubicaciones_disponibles():
+def _buscar_ruta(clave):
+    try:
+        return Ruta.objects.get(clave=clave)
+    except Ruta.DoesNotExist:
+        return None
+
+
+def obtener_rutas(pares):
     """
-    Devuelve todas las ubicaciones disponibles (orígenes y destinos) registradas en la base de datos.
+    Busca varias rutas a la vez a partir de pares (origen, destino), en una sola consulta.
+    Devuelve un diccionario clave canónica -> Ruta con las rutas encontradas.
     """
-    origenes = list(Ruta.objects.values_list('origen', flat=True))
-    destinos = list(Ruta.objects.values_list('destino', flat=True))
-    ubicaciones = set(origenes + destinos)
-    return sorted(ubicaciones)
+    claves = {clave_ruta(origen, destino) for origen, destino in pares}
+    return {ruta.clave: ruta for ruta in Ruta.objects.filter(clave__in=claves).order_by()}
+
 
+def obtener_ubicaciones_disponibles():
+    """
+    Devuelve todas las ubicaciones disponibles (orígenes y destinos) ya ordenadas,
+    desde el índice de ubicaciones en memoria.
+    """
+    return obtener_indice_ubicaciones().nombres
@@ -0,0 +1,50 @@
+// Autocompletado de lugares: cada campo con data-autocompletar consulta la URL indicada
+// mientras se escribe y muestra las sugerencias en un <datalist> propio.
+(function () {
+    var ESPERA_MS = 120;
+
+    function preparar(campo) {
+        var lista = document.createElement('datalist');
+        lista.id = campo.id + '-sugerencias';
+        campo.after(lista);
+        campo.setAttribute('list', lista.id);
+
+        var temporizador = null;
+        var pendiente = null;
+        var ultimo = null;
+
+        function mostrar(ubicaciones) {
+            lista.replaceChildren.apply(lista, ubicaciones.map(function (nombre) {
+                var opcion = document.createElement('option');
+                opcion.value = nombre;
+                return opcion;
+            }));
+        }
+
+        function buscar() {
+            var texto = campo.value.trim();
+            if (!texto || texto === ultimo) {
+                return;
+            }
+            ultimo = texto;
+            if (pendiente) {
+                pendiente.abort();
+            }
+            pendiente = new AbortController();
+            var url = campo.dataset.autocompletar + '?cantidad=10&q=' + encodeURIComponent(texto);
+            fetch(url, {signal: pendiente.signal, credentials: 'same-origin'})
+                .then(function (respuesta) { return respuesta.ok ? respuesta.json() : {ubicaciones: []}; })
+                .then(function (datos) { mostrar(datos.ubicaciones); })
+                .catch(function () {});
+        }
+
+        campo.addEventListener('input', function () {
+            clearTimeout(temporizador);
+            temporizador = setTimeout(buscar, ESPERA_MS);
+        });
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        document.querySelectorAll('input[data-autocompletar]').forEach(preparar);
+    });
+})();
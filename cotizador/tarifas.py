@@ -0,0 +1,144 @@
+import copy
+from array import array
+from bisect import bisect_right
+from decimal import Decimal
+
+from django.utils import timezone
+
+from .cache import SnapshotVersionado
+from .models import HistorialTarifa, TransporteApp
+from .simulador import CotizadorLote, _escalar, _redondear
+
+
+class Tarifario:
+    """
+    Fotografía de las tarifas de todas las apps de transporte, indexada por id.
+    Las instancias son compartidas entre peticiones: no deben modificarse.
+    """
+
+    def __init__(self, apps):
+        self.apps = tuple(apps)
+        self.por_id = {app.pk: app for app in self.apps}
+        self.cotizador = CotizadorLote(self.apps)
+
+    def obtener(self, app_id):
+        return self.por_id.get(app_id)
+
+
+def _construir_tarifario():
+    return Tarifario(TransporteApp.objects.order_by('pk'))
+
+
+# Se reconstruye solo cuando las señales de TransporteApp incrementan la generación 'tarifas'
+tarifario = SnapshotVersionado('tarifas', _construir_tarifario)
+
+
+class HistorialTarifas:
+    """
+    Historial de tarifas de todas las apps en memoria: por app, un arreglo ordenado de
+    inicios de vigencia (segundos desde epoch) y, en paralelo, las tarifas de cada tramo,
+    tal como se guardan y escaladas como en CotizadorLote. La tarifa vigente en un momento
+    se busca por bisección, en O(log n) sobre los cambios de esa app.
+    Las instancias son compartidas entre peticiones: no deben modificarse.
+    """
+
+    def __init__(self, registros):
+        self.inicios = {}
+        self.tarifas = {}
+        self.escaladas = {}
+        for app_id, vigente_desde, *tarifa in registros:
+            self.inicios.setdefault(app_id, array('d')).append(vigente_desde.timestamp())
+            self.tarifas.setdefault(app_id, []).append(tuple(tarifa))
+            self.escaladas.setdefault(app_id, []).append(_escalar_tarifa(*tarifa))
+
+    def _indice(self, app_id, momento):
+        inicios = self.inicios.get(app_id)
+        if inicios is None:
+            return None
+        indice = bisect_right(inicios, momento.timestamp()) - 1
+        return indice if indice >= 0 else None
+
+    def vigente(self, app_id, momento):
+        """
+        (precio_base, costo_por_km, costo_por_min, factor_dinamico) de la app en `momento`,
+        o None si la app aún no tenía tarifas registradas.
+        """
+        indice = self._indice(app_id, momento)
+        return self.tarifas[app_id][indice] if indice is not None else None
+
+    def precio(self, app_id, momento, distancia_km, tiempo_min, factor_dinamico=None):
+        """
+        Precio redondeado de un traslado con la tarifa vigente en `momento`, igual que
+        CotizadorLote. Con `factor_dinamico` (p. ej. el guardado en una cotización, que ya
+        incluye el recargo por horario) se usa ese en vez del de la tarifa.
+        """
+        indice = self._indice(app_id, momento)
+        if indice is None:
+            return None
+        precio_base, costo_por_km, costo_por_min, factor = self.escaladas[app_id][indice]
+        if factor_dinamico is not None:
+            factor = _escalar(factor_dinamico, 2)
+        subtotal = precio_base + _escalar(distancia_km, 2) * costo_por_km + _escalar(tiempo_min, 0) * costo_por_min
+        return _redondear(subtotal * factor, CotizadorLote.ESCALA)
+
+    def tarifario(self, apps, momento):
+        """
+        Tarifario con las apps que ya existían en `momento` y las tarifas que tenían entonces.
+        """
+        vigentes = []
+        for app in apps:
+            tarifa = self.vigente(app.pk, momento)
+            if tarifa is None:
+                continue
+            app = copy.copy(app)
+            for campo, valor in zip(HistorialTarifa.CAMPOS_TARIFA, tarifa):
+                setattr(app, campo, valor)
+            vigentes.append(app)
+        return Tarifario(vigentes)
+
+
+def _escalar_tarifa(precio_base, costo_por_km, costo_por_min, factor_dinamico):
+    return (_escalar(precio_base, 4), _escalar(costo_por_km, 2), _escalar(costo_por_min, 4), _escalar(factor_dinamico, 2))
+
+
+def _construir_historial():
+    return HistorialTarifas(
+        HistorialTarifa.objects.order_by('app_id', 'vigente_desde').values_list(
+            'app_id', 'vigente_desde', *HistorialTarifa.CAMPOS_TARIFA
+        )
+    )
+
+
+# El historial cambia junto con las tarifas, en la misma transacción: comparte la generación
+historial_tarifas = SnapshotVersionado('tarifas', _construir_historial)
+
+
+def obtener_historial_tarifas():
+    return historial_tarifas.obtener()
+
+
+def obtener_tarifario(vigente_en=None):
+    """
+    Devuelve la fotografía vigente de las tarifas o, con `vigente_en`, la de ese momento
+    según el historial de tarifas.
+    """
+    actual = tarifario.obtener()
+    if vigente_en is None:
+        return actual
+    return obtener_historial_tarifas().tarifario(actual.apps, vigente_en)
+
+
+def registrar_tarifa(app):
+    """
+    Agrega la tarifa actual de la app al historial si difiere de la última registrada.
+    """
+    # str(): los valores por omisión del modelo pueden ser float (factor_dinamico=1.0)
+    tarifa = tuple(Decimal(str(getattr(app, campo))) for campo in HistorialTarifa.CAMPOS_TARIFA)
+    ultima = HistorialTarifa.objects.filter(app=app).order_by('-vigente_desde').values_list(
+        *HistorialTarifa.CAMPOS_TARIFA
+    ).first()
+    if ultima is not None and ultima == tarifa:
+        return None
+    return HistorialTarifa.objects.create(
+        app=app, vigente_desde=timezone.now(), **dict(zip(HistorialTarifa.CAMPOS_TARIFA, tarifa))
+    )
@@ -0,0 +1,21 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+
+class CotizadorTestCase(TestCase):
+    """
+    Base de las pruebas: sin el recálculo de columnas de precios en segundo plano, que
+    correría en otro hilo contra la base de pruebas.
+    """
+
+    def setUp(self):
+        programar = mock.patch('cotizador.matriz.recalculo_columnas.programar')
+        programar.start()
+        self.addCleanup(programar.stop)
+
+    def crear_usuario(self, username='ana'):
+        usuario = User.objects.create_user(username, password='clave-de-prueba')
+        self.client.force_login(usuario)
+        return usuario
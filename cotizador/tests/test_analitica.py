@@ -0,0 +1,104 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+
+from cotizador.analitica import agregar_cotizaciones
+from cotizador.models import CotizacionTraslado, MarcaAgregacion, ResumenDiario, Ruta, TransporteApp
+from cotizador.recotizacion import recotizar_cotizacion
+from cotizador.tests.base import CotizadorTestCase
+
+
+class AgregacionTest(CotizadorTestCase):
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.usuario = User.objects.create_user('ana', is_staff=True)
+            self.uber = TransporteApp.objects.create(nombre='Uber')
+            self.didi = TransporteApp.objects.create(nombre='Didi')
+            self.ruta = Ruta.objects.create(origen='A', destino='B', distancia_km=5, tiempo_min=10)
+            self.otra_ruta = Ruta.objects.create(origen='C', destino='D', distancia_km=7, tiempo_min=10)
+
+    def _crear(self, app, precio, factor=Decimal('1.00')):
+        return CotizacionTraslado.objects.create(
+            usuario=self.usuario, ruta=self.ruta, app_seleccionada=app, precio=precio, factor_dinamico=factor)
+
+    def _resumenes(self):
+        return sorted(ResumenDiario.objects.values_list(
+            'ruta_id', 'app_id', 'cantidad', 'suma_precio', 'precio_minimo', 'precio_maximo', 'suma_factor'))
+
+    def test_incremental(self):
+        self._crear(self.uber, 100)
+        self._crear(self.uber, 300, Decimal('2.00'))
+        self._crear(self.didi, 50)
+        self.assertEqual(agregar_cotizaciones(tamano_lote=2), (3, 2))
+        self.assertEqual(agregar_cotizaciones(), (0, 0))
+        self._crear(self.uber, 20)
+        self.assertEqual(agregar_cotizaciones(), (1, 1))
+        resumen = ResumenDiario.objects.get(app=self.uber)
+        self.assertEqual(
+            (resumen.cantidad, resumen.suma_precio, resumen.precio_minimo, resumen.precio_maximo, resumen.suma_factor),
+            (3, 420, 20, 300, 4),
+        )
+        antes = self._resumenes()
+        agregar_cotizaciones(reconstruir=True)
+        self.assertEqual(self._resumenes(), antes)
+
+    def test_informe(self):
+        self._crear(self.uber, 100)
+        self._crear(self.uber, 300)
+        self._crear(self.didi, 50)
+        agregar_cotizaciones()
+        self.client.force_login(self.usuario)
+        datos = self.client.get('/api/analitica/?dias=7').json()
+        self.assertEqual(datos['por_ruta'][0]['app_ganadora'], 'Uber')
+        self.assertEqual(datos['por_app'][0]['cantidad'], 2)
+        self.assertEqual(self.client.get('/analitica/').status_code, 200)
+        self.client.force_login(User.objects.create_user('beto'))
+        self.assertEqual(self.client.get('/api/analitica/').status_code, 403)
+
+    def test_hueco_confirmado_tarde(self):
+        self._crear(self.uber, 10)
+        tarde = self._crear(self.uber, 20)
+        self._crear(self.uber, 30)
+        # Simula una transacción que aún no confirmaba cuando corrió la agregación
+        valores = CotizacionTraslado.objects.filter(pk=tarde.pk).values()[0]
+        CotizacionTraslado.objects.filter(pk=tarde.pk).delete()
+        self.assertEqual(agregar_cotizaciones(), (2, 1))
+        self.assertEqual(MarcaAgregacion.objects.get().huecos, [tarde.pk])
+        CotizacionTraslado.objects.create(**valores)
+        self.assertEqual(agregar_cotizaciones(), (1, 1))
+        resumen = ResumenDiario.objects.get()
+        self.assertEqual((resumen.cantidad, resumen.suma_precio), (3, 60))
+        self.assertEqual(MarcaAgregacion.objects.get().huecos, [])
+        self.assertEqual(agregar_cotizaciones(), (0, 0))
+
+    def test_recotizar_mueve_de_grupo(self):
+        primera = self._crear(self.uber, 10)
+        segunda = self._crear(self.uber, 50)
+        agregar_cotizaciones()
+        recotizar_cotizacion(segunda.pk, self.usuario, self.otra_ruta, {
+            'app_id': self.didi.pk, 'precio': '70', 'tiempo_espera': 3, 'factor_dinamico': '1.5'})
+        viejo = ResumenDiario.objects.get(ruta=self.ruta)
+        self.assertEqual((viejo.cantidad, viejo.suma_precio, viejo.precio_minimo, viejo.precio_maximo), (1, 10, 10, 10))
+        nuevo = ResumenDiario.objects.get(ruta=self.otra_ruta)
+        self.assertEqual((nuevo.app_id, nuevo.cantidad, nuevo.suma_precio, nuevo.suma_factor),
+                         (self.didi.pk, 1, 70, Decimal('1.5')))
+        # El mínimo del grupo se recalcula al cambiar el precio de su única cotización
+        recotizar_cotizacion(primera.pk, self.usuario, self.ruta, {
+            'app_id': self.uber.pk, 'precio': '5', 'tiempo_espera': 3, 'factor_dinamico': '1.0'})
+        viejo = ResumenDiario.objects.get(ruta=self.ruta)
+        self.assertEqual((viejo.cantidad, viejo.suma_precio, viejo.precio_minimo), (1, 5, 5))
+        self.assertEqual(agregar_cotizaciones(), (0, 0))
+        antes = self._resumenes()
+        agregar_cotizaciones(reconstruir=True)
+        self.assertEqual(self._resumenes(), antes)
+
+    def test_recotizar_antes_de_agregar(self):
+        # Aún no agregada: recotizarla no toca los resúmenes y la agregación la suma una sola vez
+        cotizacion = self._crear(self.uber, 1)
+        recotizar_cotizacion(cotizacion.pk, self.usuario, self.ruta, {
+            'app_id': self.uber.pk, 'precio': '2', 'tiempo_espera': 3, 'factor_dinamico': '1.0'})
+        self.assertFalse(ResumenDiario.objects.exists())
+        agregar_cotizaciones()
+        self.assertEqual(ResumenDiario.objects.get().suma_precio, 2)
@@ -0,0 +1,56 @@
+import json
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import Client
+
+from cotizador.models import Ruta, TransporteApp
+from cotizador.simulador import AppCotizadora
+from cotizador.tarifas import tarifario
+from cotizador.tests.base import CotizadorTestCase
+
+
+class ApiCotizacionTest(CotizadorTestCase):
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.app = TransporteApp.objects.create(nombre='Uber', precio_base=Decimal('1000.50'))
+            self.ruta = Ruta.objects.create(origen='A', destino='Béta', distancia_km=Decimal('3.33'), tiempo_min=7)
+        tarifario.invalidar()
+        self.app.refresh_from_db()
+
+    def _post(self, cliente, cuerpo, **extra):
+        return cliente.post('/api/cotizaciones/', json.dumps(cuerpo), content_type='application/json', **extra)
+
+    def test_exige_sesion(self):
+        self.assertEqual(self._post(self.client, {'rutas': []}).status_code, 401)
+
+    def test_cotizacion_masiva(self):
+        self.crear_usuario()
+        pares = [{'origen': 'beta', 'destino': 'a'}, {'origen': 'x', 'destino': 'y'}]
+        datos = self._post(self.client, {'rutas': pares}).json()
+        precio = AppCotizadora(self.app, self.ruta).calcular_cotizacion()['precio']
+        self.assertEqual(datos['resultados'][0]['precios'], [int(precio)])
+        self.assertEqual(datos['resultados'][0]['ruta_id'], self.ruta.pk)
+        self.assertIsNone(datos['resultados'][1]['precios'])
+
+    def test_respuesta_grande_en_streaming(self):
+        self.crear_usuario()
+        pares = [{'origen': 'beta', 'destino': 'a'}, {'origen': 'x', 'destino': 'y'}]
+        respuesta = self._post(self.client, {'rutas': pares * 300})
+        self.assertTrue(respuesta.streaming)
+        self.assertEqual(len(json.loads(b''.join(respuesta.streaming_content))['resultados']), 600)
+
+    def test_cuerpo_invalido(self):
+        self.crear_usuario()
+        respuesta = self.client.post('/api/cotizaciones/', 'no es json', content_type='application/json')
+        self.assertEqual(respuesta.status_code, 400)
+
+    def test_exige_token_csrf(self):
+        cliente = Client(enforce_csrf_checks=True)
+        cliente.force_login(User.objects.create_user('csrf', password='clave-de-prueba'))
+        self.assertEqual(self._post(cliente, {'rutas': []}).status_code, 403)
+        cliente.get('/')
+        token = cliente.cookies['csrftoken'].value
+        self.assertEqual(self._post(cliente, {'rutas': []}, HTTP_X_CSRFTOKEN=token).status_code, 200)
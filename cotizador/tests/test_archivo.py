@@ -0,0 +1,129 @@
+import io
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+from datetime import timezone as dt_timezone
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from cotizador.analitica import agregar_cotizaciones
+from cotizador.archivo import archivar_cotizaciones, horizonte_retencion, leer_archivos
+from cotizador.models import CotizacionTraslado, MarcaAgregacion, ResumenDiario, Ruta, TransporteApp
+from cotizador.tests.base import CotizadorTestCase
+
+
+class ArchivoTest(CotizadorTestCase):
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.usuario = User.objects.create_user('ana')
+            self.app = TransporteApp.objects.create(nombre='Uber')
+            self.ruta = Ruta.objects.create(origen='Centro', destino='Aeropuerto', distancia_km=5, tiempo_min=10)
+        self.directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directorio.cleanup)
+
+    def _crear(self, fecha, precio=100):
+        return CotizacionTraslado.objects.create(
+            usuario=self.usuario, ruta=self.ruta, app_seleccionada=self.app, precio=precio, fecha_creacion=fecha)
+
+    def _resumenes(self):
+        return {
+            resumen.fecha: (resumen.cantidad, resumen.suma_precio, resumen.precio_minimo, resumen.precio_maximo)
+            for resumen in ResumenDiario.objects.all()
+        }
+
+    def test_archivar_y_leer(self):
+        ahora = timezone.now()
+        for dias in (400, 380, 370, 10):
+            for _ in range(3):
+                self._crear(ahora - timedelta(days=dias))
+        d = self.directorio.name
+        self.assertEqual(archivar_cotizaciones(horizonte_retencion(365), d, tamano_lote=4), 9)
+        self.assertEqual(CotizacionTraslado.objects.count(), 3)
+        self.assertGreaterEqual(len(os.listdir(d)), 2)
+        registros = list(leer_archivos(d))
+        self.assertEqual(len(registros), 9)
+        self.assertEqual((registros[0]['usuario'], registros[0]['origen']), ('ana', 'Centro'))
+        self.assertEqual(len(list(leer_archivos(d, usuario='beto'))), 0)
+        self.assertEqual(len(list(leer_archivos(d, lugar='aeropuerto'))), 9)
+        self.assertEqual(len(list(leer_archivos(d, desde=timezone.localdate(ahora - timedelta(days=381))))), 6)
+        salida = io.StringIO()
+        call_command('leer_archivo', directorio=d, formato='csv', stdout=salida)
+        self.assertEqual(len(salida.getvalue().strip().splitlines()), 10)
+        salida = io.StringIO()
+        call_command('archivar_cotizaciones', directorio=d, dias=5, stdout=salida)
+        self.assertIn("3 cotizaciones", salida.getvalue())
+        self.assertEqual(len(list(leer_archivos(d))), 12)
+        # Los resúmenes se conservan después de archivar
+        self.assertEqual(sum(cantidad for cantidad, *_ in self._resumenes().values()), 12)
+
+    def test_reconstruir_conserva_archivados(self):
+        base = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0) - timedelta(days=10)
+        # Día -10 entero archivado; día -5: 09:00 archivada y 15:00 en la tabla; día -1 en la tabla
+        for momento, precio in ((base, 10), (base, 20), (base + timedelta(days=5, hours=-3), 30),
+                                (base + timedelta(days=5, hours=3), 40), (base + timedelta(days=9), 50)):
+            self._crear(momento, precio)
+        agregar_cotizaciones()
+        antes = self._resumenes()
+        self.assertEqual(len(antes), 3)
+        d = self.directorio.name
+        with override_settings(COTIZADOR_ARCHIVO_DIRECTORIO=d):
+            self.assertEqual(archivar_cotizaciones(base + timedelta(days=5), d), 3)
+            self.assertEqual(self._resumenes(), antes)
+            agregar_cotizaciones(reconstruir=True)
+            self.assertEqual(self._resumenes(), antes)
+            CotizacionTraslado.objects.filter(precio=50).delete()
+            agregar_cotizaciones(reconstruir=True)
+            self.assertEqual(ResumenDiario.objects.count(), 2)
+
+    @override_settings(TIME_ZONE='America/Santiago')
+    def test_fechas_locales(self):
+        # 02:00 UTC del 1 de enero son las 23:00 del 31 de diciembre en Santiago
+        self._crear(datetime(2026, 1, 1, 2, tzinfo=dt_timezone.utc))
+        d = self.directorio.name
+        self.assertEqual(archivar_cotizaciones(datetime(2026, 2, 1, tzinfo=dt_timezone.utc), d), 1)
+        self.assertEqual(os.listdir(d), ['cotizaciones-2025-12.jsonl.gz'])
+        self.assertEqual(len(list(leer_archivos(d, desde=date(2025, 12, 31), hasta=date(2025, 12, 31)))), 1)
+        self.assertEqual(len(list(leer_archivos(d, desde=date(2026, 1, 1), hasta=date(2026, 1, 1)))), 0)
+        self.assertEqual(list(ResumenDiario.objects.values_list('fecha', flat=True)), [date(2025, 12, 31)])
+
+    def test_pendientes_quedan_en_tabla(self):
+        antigua = timezone.now() - timedelta(days=400)
+        primera = self._crear(antigua, 10)
+        tarde = self._crear(antigua, 20)
+        self._crear(antigua, 30)
+        valores = CotizacionTraslado.objects.filter(pk=tarde.pk).values()[0]
+        CotizacionTraslado.objects.filter(pk=tarde.pk).delete()
+        agregar_cotizaciones()
+        self.assertEqual(MarcaAgregacion.objects.get().huecos, [tarde.pk])
+        # Se confirma después de que archivar_cotizaciones agregó las pendientes
+        CotizacionTraslado.objects.create(**valores)
+        with mock.patch('cotizador.analitica.agregar_cotizaciones'):
+            self.assertEqual(archivar_cotizaciones(horizonte_retencion(365), self.directorio.name), 2)
+        self.assertEqual(list(CotizacionTraslado.objects.values_list('pk', flat=True)), [tarde.pk])
+        self.assertNotIn(tarde.pk, [r['id'] for r in leer_archivos(self.directorio.name)])
+        self.assertIn(primera.pk, [r['id'] for r in leer_archivos(self.directorio.name)])
+        self.assertEqual(archivar_cotizaciones(horizonte_retencion(365), self.directorio.name), 1)
+        self.assertEqual(list(self._resumenes().values()), [(3, 60, 10, 30)])
+
+    @override_settings(COTIZADOR_AGREGACION_VENTANA=0)
+    def test_fila_olvidada_se_suma_antes_de_archivar(self):
+        antigua = timezone.now() - timedelta(days=400)
+        self._crear(antigua, 10)
+        tarde = self._crear(antigua, 20)
+        self._crear(antigua, 30)
+        valores = CotizacionTraslado.objects.filter(pk=tarde.pk).values()[0]
+        CotizacionTraslado.objects.filter(pk=tarde.pk).delete()
+        agregar_cotizaciones()
+        # Sin ventana no queda como hueco: la agregación ya no la va a sumar
+        CotizacionTraslado.objects.create(**valores)
+        agregar_cotizaciones()
+        self.assertEqual(list(self._resumenes().values()), [(2, 40, 10, 30)])
+        with self.assertLogs('cotizador.analitica', 'WARNING'):
+            self.assertEqual(archivar_cotizaciones(horizonte_retencion(365), self.directorio.name), 3)
+        self.assertEqual(list(self._resumenes().values()), [(3, 60, 10, 30)])
@@ -0,0 +1,57 @@
+import random
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from cotizador.dinamica import SIN_RECARGO
+from cotizador.models import Ruta, TransporteApp
+from cotizador.simulador import AppCotizadora, CotizadorLote
+
+
+class PrecioLoteTest(SimpleTestCase):
+    """
+    CotizadorLote debe dar el mismo precio redondeado que AppCotizadora.
+    """
+
+    def _app(self, precio_base, costo_por_km=0, costo_por_min=0, factor_dinamico=1, pk=1):
+        return TransporteApp(
+            pk=pk, nombre=f'Prueba {pk}', precio_base=Decimal(precio_base), costo_por_km=Decimal(costo_por_km),
+            costo_por_min=Decimal(costo_por_min), factor_dinamico=Decimal(factor_dinamico),
+        )
+
+    def _precio(self, app, ruta, multiplicador=SIN_RECARGO):
+        with mock.patch.object(AppCotizadora, 'multiplicador', return_value=multiplicador):
+            return AppCotizadora(app, ruta).calcular_cotizacion()
+
+    def test_paridad_con_app_cotizadora(self):
+        azar = random.Random(2025)
+        for _ in range(500):
+            app = self._app(
+                Decimal(azar.randint(0, 10 ** 6)) / 100, Decimal(azar.randint(0, 10 ** 5)) / 100,
+                Decimal(azar.randint(0, 10 ** 5)) / 100, Decimal(azar.randint(0, 400)) / 100,
+            )
+            ruta = Ruta(origen='x', destino='y', distancia_km=Decimal(azar.randint(1, 99999)) / 100,
+                        tiempo_min=azar.randint(1, 300))
+            self.assertEqual(CotizadorLote([app]).calcular_precios(ruta)[0], self._precio(app, ruta)['precio'])
+
+    def test_matriz_en_orden_de_apps(self):
+        apps = [self._app('1000.55', '350', '80.5', '1.25', pk=1), self._app('900', '410.10', '60', '1', pk=2)]
+        rutas = [Ruta(origen='a', destino='b', distancia_km=Decimal('5.5'), tiempo_min=12),
+                 Ruta(origen='c', destino='d', distancia_km=Decimal('0.01'), tiempo_min=1)]
+        matriz = CotizadorLote(apps).calcular_matriz(rutas)
+        self.assertEqual(matriz, [[self._precio(app, ruta)['precio'] for app in apps] for ruta in rutas])
+
+    def test_redondeo_mitad_al_par(self):
+        ruta = Ruta(origen='x', destino='y', distancia_km=Decimal('0'), tiempo_min=0)
+        for precio_base, esperado in (('0.50', 0), ('1.50', 2), ('2.50', 2), ('2.51', 3), ('3.49', 3)):
+            app = self._app(precio_base)
+            self.assertEqual(self._precio(app, ruta)['precio'], esperado)
+            self.assertEqual(CotizadorLote([app]).calcular_precios(ruta)[0], esperado)
+
+    def test_tarifas_invalidas_se_omiten(self):
+        valida = self._app('10')
+        invalida = self._app('10.12345', pk=2)
+        with self.assertLogs('cotizador.simulador', 'WARNING'):
+            lote = CotizadorLote([valida, invalida])
+        self.assertEqual(lote.apps, [valida])
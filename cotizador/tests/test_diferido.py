@@ -0,0 +1,93 @@
+import json
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import OperationalError
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from cotizador.diferido import ColaCotizaciones, _a_registro
+from cotizador.models import CotizacionTraslado, Ruta, TransporteApp
+
+
+class ColaCotizacionesTest(TransactionTestCase):
+    """
+    Con TransactionTestCase: en SQLite las claves foráneas se revisan al confirmar la transacción.
+    """
+
+    def setUp(self):
+        programar = mock.patch('cotizador.matriz.recalculo_columnas.programar')
+        programar.start()
+        self.addCleanup(programar.stop)
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio)
+        self.usuario = User.objects.create_user('ana')
+        self.app = TransporteApp.objects.create(nombre='Uber')
+        self.ruta = Ruta.objects.create(origen='A', destino='B', distancia_km=1, tiempo_min=1)
+        self.cola = ColaCotizaciones(self.directorio)
+
+    def _lote(self, nombre, *rutas):
+        cotizaciones = [
+            CotizacionTraslado(usuario_id=self.usuario.pk, ruta_id=ruta_id, app_seleccionada_id=self.app.pk,
+                               precio=Decimal('10'), tiempo_espera=1, fecha_creacion=timezone.now())
+            for ruta_id in rutas
+        ]
+        segmento = os.path.join(self.directorio, f"cotizaciones-1-1-{nombre}.jsonl")
+        with open(segmento, 'w', encoding='utf-8') as archivo:
+            archivo.writelines(json.dumps(_a_registro(c)) + '\n' for c in cotizaciones)
+        self.cola._fallidos.append((cotizaciones, segmento))
+        return segmento
+
+    def _descartadas(self, segmento):
+        with open(os.path.join(self.directorio, f"descartadas-{os.path.basename(segmento)}"), encoding='utf-8') as archivo:
+            return [json.loads(linea)['ruta_id'] for linea in archivo]
+
+    def test_filas_invalidas_van_a_descartes(self):
+        # La ruta 999 no existe: esa fila se descarta y el resto del lote se guarda
+        segmento = self._lote('000001', self.ruta.pk, 999)
+        siguiente = self._lote('000002', self.ruta.pk)
+        with self.assertLogs('cotizador.diferido', 'ERROR'):
+            self.assertEqual(self.cola.vaciar(), 2)
+        self.assertEqual(CotizacionTraslado.objects.count(), 2)
+        self.assertEqual(self._descartadas(segmento), [999])
+        self.assertFalse(os.path.exists(segmento) or os.path.exists(siguiente))
+        self.assertEqual(self.cola._fallidos, [])
+
+    def test_error_permanente_no_bloquea_la_cola(self):
+        segmento = self._lote('000001', self.ruta.pk)
+        self._lote('000002', self.ruta.pk)
+        guardar = mock.patch('cotizador.diferido.guardar_cotizaciones',
+                             side_effect=[ValueError('dato corrupto'), 1])
+        with guardar, self.assertLogs('cotizador.diferido', 'ERROR'):
+            self.assertEqual(self.cola.vaciar(), 1)
+        self.assertEqual(self._descartadas(segmento), [self.ruta.pk])
+        self.assertEqual(self.cola._fallidos, [])
+        self.assertEqual(os.listdir(self.directorio), [f"descartadas-{os.path.basename(segmento)}"])
+
+    def test_error_de_conexion_se_reintenta(self):
+        segmento = self._lote('000001', self.ruta.pk)
+        with mock.patch('cotizador.diferido.guardar_cotizaciones', side_effect=OperationalError('locked')), \
+                self.assertLogs('cotizador.diferido', 'ERROR'):
+            self.assertEqual(self.cola.vaciar(), 0)
+        self.assertTrue(os.path.exists(segmento))
+        self.assertEqual(len(self.cola._fallidos), 1)
+        self.assertEqual(self.cola.vaciar(), 1)
+        self.assertEqual(CotizacionTraslado.objects.count(), 1)
+        self.assertEqual(os.listdir(self.directorio), [])
+
+    def test_el_hilo_sobrevive_a_los_errores(self):
+        errores = [OSError('disco lleno')]
+
+        def fallar_una_vez():
+            if errores:
+                raise errores.pop()
+            self.cola._detenida = True
+        self.cola.intervalo = 0
+        with mock.patch.object(self.cola, 'vaciar', side_effect=fallar_una_vez) as vaciar, \
+                self.assertLogs('cotizador.diferido', 'ERROR'):
+            self.cola._ciclo()
+        self.assertEqual(vaciar.call_count, 2)
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from cotizador.dinamica import SIN_RECARGO, TablaDinamica, factor_efectivo, hora_semana
+from cotizador.matriz import cotizar_ruta
+from cotizador.models import CotizacionTraslado, FranjaDinamica, Ruta, TransporteApp, Ubicacion
+from cotizador.simulador import AppCotizadora
+from cotizador.tests.base import CotizadorTestCase
+
+
+class DinamicaTest(CotizadorTestCase):
+    # Lunes 2026-10-19 a las 08:30 UTC
+    LUNES_8 = datetime(2026, 10, 19, 8, 30, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.uber = TransporteApp.objects.create(nombre='Uber', precio_base=Decimal('1000.55'), factor_dinamico=Decimal('1.25'))
+            self.didi = TransporteApp.objects.create(nombre='Didi')
+            self.ruta = Ruta.objects.create(origen='Centro', destino='Ñuñoa', distancia_km=Decimal('5.5'), tiempo_min=12)
+        for objeto in (self.uber, self.didi, self.ruta):
+            objeto.refresh_from_db()
+
+    def test_tabla(self):
+        tabla = TablaDinamica([
+            (1, '', None, 7, 9, Decimal('1.5')),
+            (1, 'Norte', 0, 8, 10, Decimal('2')),
+            (1, '', 0, 7, 8, Decimal('1.7')),
+        ])
+        self.assertEqual(hora_semana(self.LUNES_8), 8)
+        self.assertEqual(tabla.multiplicador(1, 'norte', 8), 200)
+        self.assertEqual(tabla.multiplicador(1, 'norte', 7), 170)
+        self.assertEqual(tabla.multiplicador(1, 'sur', 8), 150)
+        self.assertEqual(tabla.multiplicador(1, 'sur', 24 + 8), 150)
+        self.assertEqual(tabla.multiplicador(1, 'norte', 24 + 9), 100)
+        self.assertEqual(tabla.multiplicador(2, 'norte', 8), SIN_RECARGO)
+
+    def test_factor_redondeado_mitad_al_par(self):
+        # 1.25 x 1.10 = 1.375: el factor se redondea a 1.38 (mitad al par en las centésimas)
+        self.assertEqual(factor_efectivo(Decimal('1.25'), 110), Decimal('1.38'))
+        self.assertEqual(factor_efectivo(Decimal('1.25'), 130), Decimal('1.62'))
+        self.assertEqual(factor_efectivo(Decimal('1.25'), SIN_RECARGO), Decimal('1.25'))
+
+    def test_recargo_por_franja(self):
+        sin_recargo = cotizar_ruta(self.ruta, self.LUNES_8)
+        with self.captureOnCommitCallbacks(execute=True):
+            FranjaDinamica.objects.create(app=self.uber, zona='norte', dia_semana=0, hora_inicio=8, hora_fin=9,
+                                          multiplicador=Decimal('1.33'))
+            centro = Ubicacion.objects.get(nombre='Centro')
+            centro.zona = 'Norte'
+            centro.save()
+        con_recargo = {cotizacion['app_id']: cotizacion for cotizacion in cotizar_ruta(self.ruta, self.LUNES_8)}
+        self.assertEqual(con_recargo[self.uber.pk]['factor_dinamico'], Decimal('1.66'))
+        self.assertEqual(con_recargo[self.uber.pk]['precio'],
+                         AppCotizadora(self.uber, self.ruta, self.LUNES_8).calcular_cotizacion()['precio'])
+        sin_recargo = {cotizacion['app_id']: cotizacion for cotizacion in sin_recargo}
+        self.assertNotEqual(con_recargo[self.uber.pk]['precio'], sin_recargo[self.uber.pk]['precio'])
+        self.assertEqual(con_recargo[self.didi.pk]['precio'], sin_recargo[self.didi.pk]['precio'])
+        una_hora_despues = {c['app_id']: c for c in cotizar_ruta(self.ruta, self.LUNES_8 + timedelta(hours=1))}
+        self.assertEqual(una_hora_despues[self.uber.pk]['precio'], sin_recargo[self.uber.pk]['precio'])
+
+    def test_factor_guardado_sin_tope(self):
+        # Factor de la app por multiplicador máximo: no cabe en 3 dígitos
+        factor = factor_efectivo(Decimal('99.99'), 999)
+        usuario = self.crear_usuario()
+        cotizacion = CotizacionTraslado(usuario=usuario, ruta=self.ruta, app_seleccionada=self.uber,
+                                        precio=1, tiempo_espera=1, factor_dinamico=factor)
+        cotizacion.full_clean()
+        cotizacion.save()
+        cotizacion.refresh_from_db()
+        self.assertEqual(cotizacion.factor_dinamico, Decimal('998.90'))
@@ -0,0 +1,61 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+
+from cotizador.models import CotizacionTraslado, Ruta, TransporteApp
+from cotizador.views import EditarCotizacionView
+from cotizador.tests.base import CotizadorTestCase
+
+
+class EditarCotizacionTest(CotizadorTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.usuario = self.crear_usuario()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.uber = TransporteApp.objects.create(nombre='Uber')
+            self.didi = TransporteApp.objects.create(nombre='Didi', precio_base=5000)
+            self.ab = Ruta.objects.create(origen='A', destino='B', distancia_km=5, tiempo_min=10)
+            self.bc = Ruta.objects.create(origen='B', destino='C', distancia_km=7, tiempo_min=15)
+        self.cotizacion = CotizacionTraslado.objects.create(
+            usuario=self.usuario, ruta=self.ab, app_seleccionada=self.uber, precio=1, tiempo_espera=1)
+        self.url = f'/cotizacion/editar/{self.cotizacion.pk}/'
+
+    def _editar(self, origen, destino, app):
+        return self.client.post(self.url, {'origen': origen, 'destino': destino, 'app_seleccionada': app.pk})
+
+    def test_vista_async(self):
+        self.assertTrue(EditarCotizacionView.view_is_async)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    def test_cambio_de_lugares_consulta_proveedores(self):
+        with mock.patch('cotizador.views.cotizar_con_proveedores',
+                        new=mock.AsyncMock(side_effect=lambda cotizaciones, apps, ruta: cotizaciones)) as proveedores:
+            respuesta = self._editar('B', 'C', self.uber)
+        proveedores.assert_awaited_once()
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta.context['mostrar_modal'])
+        self.assertContains(respuesta, f'name="cotizacion_id" value="{self.cotizacion.pk}"')
+        cotizacion = CotizacionTraslado.objects.get()
+        precio_uber = next(c['precio'] for c in respuesta.context['cotizaciones'] if c['app_id'] == self.uber.pk)
+        self.assertEqual((cotizacion.pk, cotizacion.ruta_id, cotizacion.precio),
+                         (self.cotizacion.pk, self.bc.pk, precio_uber))
+
+    def test_ruta_desconocida(self):
+        respuesta = self._editar('A', 'Desconocido', self.uber)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(CotizacionTraslado.objects.get().ruta_id, self.ab.pk)
+
+    def test_cambio_de_app(self):
+        respuesta = self._editar('A', 'B', self.didi)
+        self.assertRedirects(respuesta, '/mis_cotizaciones/', fetch_redirect_response=False)
+        cotizacion = CotizacionTraslado.objects.get()
+        self.assertEqual(cotizacion.app_seleccionada_id, self.didi.pk)
+        self.assertGreaterEqual(cotizacion.precio, 5000)
+
+    def test_cotizacion_de_otro_usuario(self):
+        self.client.force_login(User.objects.create_user('beto'))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertEqual(self._editar('B', 'C', self.uber).status_code, 404)
@@ -0,0 +1,85 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.db import IntegrityError, transaction
+from django.db.models import QuerySet
+
+from cotizador.grafo import componer_ruta, grafo_rutas, materializar_ruta
+from cotizador.models import CotizacionTraslado, Ruta, TransporteApp
+from cotizador.simulador import obtener_datos_ruta
+from cotizador.tests.base import CotizadorTestCase
+
+
+class GrafoTest(CotizadorTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.usuario = self.crear_usuario()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.app = TransporteApp.objects.create(nombre='Uber')
+            Ruta.objects.create(origen='A', destino='B', distancia_km=Decimal('3.25'), tiempo_min=7)
+            Ruta.objects.create(origen='C', destino='B', distancia_km=Decimal('4'), tiempo_min=9)
+            Ruta.objects.create(origen='C', destino='D', distancia_km=Decimal('1'), tiempo_min=2)
+            Ruta.objects.create(origen='A', destino='D', distancia_km=Decimal('50'), tiempo_min=60)
+        grafo_rutas.invalidar()
+
+    def test_camino_mas_corto(self):
+        ruta = componer_ruta('a', 'C')
+        self.assertEqual((ruta.distancia_km, ruta.tiempo_min, ruta.pk), (Decimal('7.25'), 16, None))
+        # A-D directa mide 50: el camino por B y C es más corto
+        self.assertEqual(componer_ruta('A', 'D').distancia_km, Decimal('8.25'))
+        self.assertIsNone(componer_ruta('A', 'Z'))
+
+    def test_actualizacion_incremental(self):
+        self.assertEqual(componer_ruta('A', 'C').distancia_km, Decimal('7.25'))
+        with self.captureOnCommitCallbacks(execute=True):
+            atajo = Ruta.objects.create(origen='A', destino='E', distancia_km=Decimal('1'), tiempo_min=1)
+            Ruta.objects.create(origen='E', destino='C', distancia_km=Decimal('1'), tiempo_min=1)
+        self.assertEqual(componer_ruta('A', 'C').distancia_km, Decimal('2.00'))
+        with self.captureOnCommitCallbacks(execute=True):
+            atajo.delete()
+        self.assertEqual(componer_ruta('A', 'C').distancia_km, Decimal('7.25'))
+
+    def test_seleccion_guarda_ruta_estimada(self):
+        cotizacion = self.client.post('/', {'origen': 'A', 'destino': 'C'}).context['cotizaciones'][0]
+        datos = {
+            'origen': 'A', 'destino': 'C', 'precio': cotizacion['precio'],
+            'tiempo_espera': cotizacion['tiempo_espera'], 'factor_dinamico': cotizacion['factor_dinamico'],
+        }
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                respuesta = self.client.post(f"/redireccion/{cotizacion['app_id']}/", datos)
+            self.assertEqual(respuesta.status_code, 302)
+        guardada = CotizacionTraslado.objects.first().ruta
+        self.assertEqual((guardada.estimada, guardada.clave, guardada.distancia_km), (True, None, Decimal('7.25')))
+        # Las dos selecciones comparten la ruta estimada, que no es una arista ni se busca por clave
+        self.assertEqual(Ruta.objects.filter(estimada=True).count(), 1)
+        self.assertEqual(set(CotizacionTraslado.objects.values_list('ruta', flat=True)), {guardada.pk})
+        grafo_rutas.invalidar()
+        self.assertEqual(componer_ruta('A', 'C').distancia_km, Decimal('7.25'))
+        self.assertIsNone(obtener_datos_ruta('A', 'C'))
+
+    def test_estimada_unica(self):
+        materializar_ruta('A', 'C')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Ruta.objects.create(origen='A', destino='C', distancia_km=Decimal('7.25'), tiempo_min=16, estimada=True)
+        # Con otros datos cotizados (el grafo cambió) sí puede repetirse el par
+        Ruta.objects.create(origen='A', destino='C', distancia_km=Decimal('9'), tiempo_min=16, estimada=True)
+
+    def test_estimada_insertada_por_otra_peticion(self):
+        # Otra petición inserta la misma ruta estimada entre la búsqueda y el INSERT
+        otra = materializar_ruta('A', 'C', self.usuario)
+        get = QuerySet.get
+        llamadas = []
+
+        def get_tras_la_carrera(queryset, *args, **kwargs):
+            llamadas.append(kwargs)
+            if len(llamadas) == 1:
+                raise Ruta.DoesNotExist
+            return get(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, 'get', autospec=True, side_effect=get_tras_la_carrera):
+            ruta = materializar_ruta('A', 'C')
+        self.assertEqual(len(llamadas), 2)
+        self.assertEqual(ruta.pk, otra.pk)
+        self.assertEqual(Ruta.objects.filter(estimada=True).count(), 1)
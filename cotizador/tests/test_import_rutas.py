@@ -0,0 +1,74 @@
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from cotizador.models import Ruta, Ubicacion
+from cotizador.tests.base import CotizadorTestCase
+
+
+class ImportRutasTest(CotizadorTestCase):
+
+    def _importar(self, contenido, sufijo='.csv'):
+        with tempfile.NamedTemporaryFile('w', suffix=sufijo, delete=False, encoding='utf-8') as archivo:
+            archivo.write(contenido)
+        self.addCleanup(os.unlink, archivo.name)
+        salida = StringIO()
+        call_command('import_rutas', archivo.name, stdout=salida, stderr=StringIO())
+        return salida.getvalue()
+
+    def test_rechaza_filas_invalidas(self):
+        salida = self._importar(
+            "origen,destino,distancia_km,tiempo_min\n"
+            "Centro,Ñuñoa,5.5,12\n"
+            ",Ñuñoa,1,1\n"            # origen vacío
+            "Centro,centro,1,1\n"     # mismo lugar
+            "Centro,Maipú,NaN,10\n"   # distancia no finita
+            "Centro,Maipú,1000,10\n"  # fuera de rango
+            "Centro,Maipú,abc,10\n"   # distancia no numérica
+            "Centro,Maipú,3,-1\n"     # tiempo negativo
+            "Maipú,Centro,3.2,9\n"
+        )
+        self.assertIn("8 filas leídas, 2 rutas importadas, 6 rechazadas", salida)
+        self.assertEqual(
+            sorted(Ruta.objects.values_list('clave', 'distancia_km')),
+            [('centro|maipu', Decimal('3.20')), ('centro|nunoa', Decimal('5.50'))],
+        )
+
+    def test_rechaza_tiempos_invalidos(self):
+        salida = self._importar(
+            "origen,destino,distancia_km,tiempo_min\n"
+            "Centro,Maipú,3,12.7\n"                     # no entero
+            "Centro,Maipú,3,NaN\n"                      # no finito
+            "Centro,Maipú,3,Infinity\n"
+            "Centro,Maipú,3,99999999999999999999999\n"  # mayor que el campo
+            "Centro,Maipú,3,\n"                         # vacío
+            "Centro,Ñuñoa,5,12.0\n"
+        )
+        self.assertIn("6 filas leídas, 1 rutas importadas, 5 rechazadas", salida)
+        self.assertEqual(Ruta.objects.get().tiempo_min, 12)
+
+    def test_jsonl_actualiza_por_clave(self):
+        Ruta.objects.create(origen='Centro', destino='Ñuñoa', distancia_km=1, tiempo_min=1)
+        salida = self._importar(
+            '{"origen": "ñuñoa", "destino": "CENTRO", "distancia_km": 7, "tiempo_min": 15}\n'
+            '{"origen": "Centro"\n'
+            '["Centro", "Maipú", 1, 1]\n'
+            '{"origen": "Centro", "destino": "Maipú", "distancia_km": 1, "tiempo_min": 1e30}\n',
+            sufijo='.jsonl',
+        )
+        self.assertIn("1 rutas importadas, 3 rechazadas", salida)
+        ruta = Ruta.objects.get()
+        self.assertEqual((ruta.origen, ruta.distancia_km, ruta.tiempo_min), ('Centro', Decimal('7.00'), 15))
+        self.assertEqual(Ubicacion.objects.count(), 2)
+
+    def test_columnas_faltantes(self):
+        with self.assertRaisesMessage(CommandError, "tiempo_min"):
+            self._importar("origen,destino,distancia_km\nCentro,Maipú,3\n")
+
+    def test_archivo_inexistente(self):
+        with self.assertRaises(CommandError):
+            call_command('import_rutas', '/nonexistent/rutas.csv', stdout=StringIO())
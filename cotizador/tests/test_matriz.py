@@ -0,0 +1,50 @@
+from decimal import Decimal
+
+from cotizador.matriz import actualizar_columna_app, cotizar_ruta
+from cotizador.models import PrecioRutaApp, Ruta, TransporteApp
+from cotizador.tests.base import CotizadorTestCase
+
+
+class MatrizPreciosTest(CotizadorTestCase):
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.app = TransporteApp.objects.create(nombre='Uber', precio_base=1000, costo_por_km=100, costo_por_min=0)
+            self.ruta = Ruta.objects.create(origen='A', destino='B', distancia_km=2, tiempo_min=5)
+
+    def _precios(self, ruta):
+        return [cotizacion['precio'] for cotizacion in cotizar_ruta(ruta)]
+
+    def test_fila_se_calcula_despues_del_commit(self):
+        with self.captureOnCommitCallbacks() as pendientes:
+            ruta = Ruta.objects.create(origen='A', destino='C', distancia_km=3, tiempo_min=5)
+            self.assertFalse(PrecioRutaApp.objects.filter(ruta=ruta).exists())
+        for callback in pendientes:
+            callback()
+        self.assertEqual(PrecioRutaApp.objects.get(ruta=ruta).precio, Decimal('1300'))
+
+    def test_ruta_borrada_antes_del_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ruta = Ruta.objects.create(origen='A', destino='C', distancia_km=3, tiempo_min=5)
+            ruta.delete()
+        self.assertFalse(PrecioRutaApp.objects.filter(ruta_id=ruta.pk).exists())
+
+    def test_usa_la_fila_vigente(self):
+        # Un precio alterado con la firma vigente demuestra que se leyó de la matriz
+        PrecioRutaApp.objects.filter(ruta=self.ruta).update(precio=1)
+        self.assertEqual(self._precios(self.ruta), [Decimal('1')])
+
+    def test_fila_desactualizada_se_calcula_en_memoria(self):
+        PrecioRutaApp.objects.filter(ruta=self.ruta).update(precio=1)
+        # update() no dispara señales: la fila queda con la distancia anterior
+        Ruta.objects.filter(pk=self.ruta.pk).update(distancia_km=4)
+        self.ruta.refresh_from_db()
+        self.assertEqual(self._precios(self.ruta), [Decimal('1400')])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.app.precio_base = 2000
+            self.app.save()
+        self.assertEqual(self._precios(self.ruta), [Decimal('2400')])
+        actualizar_columna_app(self.app)
+        self.assertEqual(PrecioRutaApp.objects.get(ruta=self.ruta).precio, Decimal('2400'))
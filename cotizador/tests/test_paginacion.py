@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+
+from cotizador.models import CotizacionTraslado, Ruta, TransporteApp
+from cotizador.paginacion import codificar_cursor, decodificar_cursor
+from cotizador.tests.base import CotizadorTestCase
+
+
+class PaginacionTest(CotizadorTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.usuario = self.crear_usuario()
+        self.app = TransporteApp.objects.create(nombre='Uber')
+        self.ruta = Ruta.objects.create(origen='A', destino='B', distancia_km=1, tiempo_min=1)
+
+    def _recorrer(self):
+        vistas = []
+        url = '/mis_cotizaciones/'
+        while url:
+            respuesta = self.client.get(url)
+            vistas += [cotizacion.pk for cotizacion in respuesta.context['cotizaciones']]
+            cursor = respuesta.context['cursor_siguiente']
+            url = f'/mis_cotizaciones/?cursor={cursor}' if cursor else None
+        return vistas
+
+    def test_cursor(self):
+        ahora = datetime(2026, 1, 1, 12, tzinfo=dt_timezone.utc)
+        otro = User.objects.create_user('beto')
+        # Varias filas con la misma fecha: el cursor desempata por id
+        CotizacionTraslado.objects.bulk_create([
+            CotizacionTraslado(
+                usuario=otro if i % 5 == 0 else self.usuario, ruta=self.ruta, app_seleccionada=self.app,
+                precio=i, tiempo_espera=1, fecha_creacion=ahora if i % 2 else ahora - timedelta(minutes=i),
+            )
+            for i in range(45)
+        ])
+        esperadas = list(
+            CotizacionTraslado.objects.filter(usuario=self.usuario)
+            .order_by('-fecha_creacion', '-id').values_list('pk', flat=True)
+        )
+        self.assertEqual(self._recorrer(), esperadas)
+
+    def test_cursor_invalido(self):
+        cotizacion = CotizacionTraslado.objects.create(
+            usuario=self.usuario, ruta=self.ruta, app_seleccionada=self.app, precio=1, tiempo_espera=1)
+        self.assertEqual(decodificar_cursor(codificar_cursor(cotizacion)), (cotizacion.fecha_creacion, cotizacion.pk))
+        self.assertIsNone(decodificar_cursor('@@@'))
+        self.assertIsNone(decodificar_cursor('YWJj'))  # 'abc', sin separador
+        respuesta = self.client.get('/mis_cotizaciones/?cursor=@@@')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([c.pk for c in respuesta.context['cotizaciones']], [cotizacion.pk])
@@ -0,0 +1,57 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+
+from cotizador.grafo import componer_ruta, grafo_rutas
+from cotizador.models import CotizacionTraslado, Ruta, TransporteApp
+from cotizador.recotizacion import recotizar_cotizacion
+from cotizador.tests.base import CotizadorTestCase
+
+
+class RecotizacionTest(CotizadorTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.usuario = self.crear_usuario()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.uber = TransporteApp.objects.create(nombre='Uber')
+            self.didi = TransporteApp.objects.create(nombre='Didi')
+            self.ab = Ruta.objects.create(origen='A', destino='B', distancia_km=5, tiempo_min=10)
+            self.bc = Ruta.objects.create(origen='B', destino='C', distancia_km=7, tiempo_min=15)
+        grafo_rutas.invalidar()
+        self.cotizacion = CotizacionTraslado.objects.create(
+            usuario=self.usuario, ruta=self.ab, app_seleccionada=self.uber, precio=100, tiempo_espera=1,
+            distancia_km=5, tiempo_min=10)
+
+    def _elegida(self, app, precio='4200.00', factor='1.10'):
+        return {'app_id': app.pk, 'precio': precio, 'tiempo_espera': 3, 'factor_dinamico': factor}
+
+    def test_actualiza_en_su_lugar(self):
+        cotizacion = recotizar_cotizacion(self.cotizacion.pk, self.usuario, self.bc, self._elegida(self.didi))
+        self.assertEqual(cotizacion.pk, self.cotizacion.pk)
+        guardada = CotizacionTraslado.objects.get()
+        self.assertEqual(
+            (guardada.pk, guardada.ruta_id, guardada.app_seleccionada_id, guardada.precio, guardada.tiempo_espera,
+             guardada.factor_dinamico, guardada.distancia_km, guardada.tiempo_min),
+            (self.cotizacion.pk, self.bc.pk, self.didi.pk, Decimal('4200.00'), 3, Decimal('1.10'), Decimal('7.00'), 15),
+        )
+        self.assertEqual(guardada.fecha_creacion, self.cotizacion.fecha_creacion)
+
+    def test_ruta_compuesta_se_guarda_como_estimada(self):
+        ruta = componer_ruta('A', 'C')
+        self.assertIsNone(ruta.pk)
+        recotizar_cotizacion(self.cotizacion.pk, self.usuario, ruta, self._elegida(self.uber))
+        guardada = CotizacionTraslado.objects.get().ruta
+        self.assertEqual((guardada.estimada, guardada.distancia_km, guardada.tiempo_min), (True, Decimal('12.00'), 25))
+
+    def test_cotizacion_de_otro_usuario(self):
+        beto = User.objects.create_user('beto')
+        self.assertIsNone(recotizar_cotizacion(self.cotizacion.pk, beto, self.bc, self._elegida(self.didi)))
+        self.assertEqual(CotizacionTraslado.objects.get().ruta_id, self.ab.pk)
+
+    def test_precio_que_no_cabe(self):
+        with self.assertRaises(ValidationError):
+            recotizar_cotizacion(self.cotizacion.pk, self.usuario, self.bc, self._elegida(self.didi, precio='1e12'))
+        guardada = CotizacionTraslado.objects.get()
+        self.assertEqual((guardada.ruta_id, guardada.precio), (self.ab.pk, 100))
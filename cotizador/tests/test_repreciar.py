@@ -0,0 +1,69 @@
+import io
+from decimal import Decimal
+
+from django.core.management import call_command
+
+from cotizador.analitica import agregar_cotizaciones
+from cotizador.models import CotizacionTraslado, ResumenDiario, Ruta, TransporteApp
+from cotizador.tests.base import CotizadorTestCase
+
+
+class RepreciarTest(CotizadorTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.usuario = self.crear_usuario()
+        with self.captureOnCommitCallbacks(execute=True):
+            # 1000 + 10 km * 100 + 20 min * 10 = 2200
+            self.app = TransporteApp.objects.create(
+                nombre='Uber', precio_base=1000, costo_por_km=100, costo_por_min=10, factor_dinamico=1)
+            self.ruta = Ruta.objects.create(origen='A', destino='B', distancia_km=10, tiempo_min=20)
+
+    def _crear(self, precio, **medidas):
+        medidas = medidas or {'distancia_km': 10, 'tiempo_min': 20}
+        return CotizacionTraslado.objects.create(
+            usuario=self.usuario, ruta=self.ruta, app_seleccionada=self.app, precio=precio,
+            factor_dinamico=Decimal('1.00'), **medidas)
+
+    def _repreciar(self, **opciones):
+        salida = io.StringIO()
+        call_command('repreciar_cotizaciones', stdout=salida, **opciones)
+        return salida.getvalue()
+
+    def test_seleccion_guarda_medidas(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f"/redireccion/{self.app.pk}/", {
+                'origen': 'A', 'destino': 'B', 'precio': '2200', 'tiempo_espera': '5', 'factor_dinamico': '1.00',
+            })
+        cotizacion = CotizacionTraslado.objects.get()
+        self.assertEqual((cotizacion.distancia_km, cotizacion.tiempo_min), (Decimal('10.00'), 20))
+
+    def test_usa_medidas_cotizadas(self):
+        cotizacion = self._crear(2200)
+        # import_rutas actualiza la ruta en su lugar: el precio cotizado no debe cambiar
+        Ruta.objects.filter(pk=self.ruta.pk).update(distancia_km=50, tiempo_min=90)
+        self.assertIn("0 corregidas", self._repreciar(aplicar=True))
+        cotizacion.refresh_from_db()
+        self.assertEqual(cotizacion.precio, 2200)
+
+    def test_sin_medidas_se_omiten(self):
+        cotizacion = self._crear(2500, distancia_km=None, tiempo_min=None)
+        self.assertIn("1 sin distancia y tiempo cotizados", self._repreciar(aplicar=True))
+        cotizacion.refresh_from_db()
+        self.assertEqual(cotizacion.precio, 2500)
+
+    def test_aplicar_actualiza_resumenes(self):
+        cara = self._crear(2500)
+        self._crear(2200)
+        agregar_cotizaciones()
+        self.assertIn("1 con precio distinto (diferencia total -300", self._repreciar())
+        self.assertEqual(CotizacionTraslado.objects.get(pk=cara.pk).precio, 2500)
+        self.assertIn("1 corregidas", self._repreciar(aplicar=True))
+        self.assertEqual(CotizacionTraslado.objects.get(pk=cara.pk).precio, 2200)
+        resumen = ResumenDiario.objects.get()
+        self.assertEqual(
+            (resumen.cantidad, resumen.suma_precio, resumen.precio_minimo, resumen.precio_maximo), (2, 4400, 2200, 2200))
+        antes = list(ResumenDiario.objects.values_list('cantidad', 'suma_precio', 'precio_minimo', 'precio_maximo'))
+        agregar_cotizaciones(reconstruir=True)
+        self.assertEqual(
+            list(ResumenDiario.objects.values_list('cantidad', 'suma_precio', 'precio_minimo', 'precio_maximo')), antes)
@@ -0,0 +1,41 @@
+from io import StringIO
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+
+from cotizador.models import Ruta
+from cotizador.simulador import obtener_datos_ruta, obtener_rutas
+from cotizador.tests.base import CotizadorTestCase
+
+
+class RutaClaveTest(CotizadorTestCase):
+
+    def test_busqueda_en_ambos_sentidos(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ruta = Ruta.objects.create(origen='Centro', destino='Ñuñoa', distancia_km=1, tiempo_min=1)
+        self.assertEqual(ruta.clave, 'centro|nunoa')
+        self.assertEqual(obtener_datos_ruta('Centro', 'Ñuñoa'), ruta)
+        self.assertEqual(obtener_datos_ruta(' ñuñoa', 'CENTRO'), ruta)
+        self.assertIsNone(obtener_datos_ruta('Centro', 'Maipú'))
+        with self.captureOnCommitCallbacks(execute=True):
+            ruta.delete()
+        self.assertIsNone(obtener_datos_ruta('Centro', 'Ñuñoa'))
+
+    def test_busqueda_de_varios_pares(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            centro = Ruta.objects.create(origen='Centro', destino='Ñuñoa', distancia_km=1, tiempo_min=1)
+            maipu = Ruta.objects.create(origen='Maipú', destino='Centro', distancia_km=2, tiempo_min=2)
+        with self.assertNumQueries(1):
+            rutas = obtener_rutas([('ñuñoa', 'centro'), ('Centro', 'MAIPU'), ('Centro', 'Lo Prado')])
+        self.assertEqual(rutas, {'centro|nunoa': centro, 'centro|maipu': maipu})
+
+    def test_ruta_inversa_duplicada(self):
+        Ruta.objects.create(origen='A', destino='B', distancia_km=1, tiempo_min=1)
+        with self.assertRaises(ValidationError):
+            Ruta(origen='b', destino='á', distancia_km=1, tiempo_min=1).full_clean()
+
+    def test_informe_de_duplicadas(self):
+        Ruta.objects.create(origen='A', destino='B', distancia_km=1, tiempo_min=1)
+        salida = StringIO()
+        call_command('rutas_duplicadas', stdout=salida)
+        self.assertIn("0 rutas duplicadas", salida.getvalue())
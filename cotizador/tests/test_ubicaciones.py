@@ -0,0 +1,42 @@
+from cotizador.formularios import CotizacionForm
+from cotizador.models import Ruta, Ubicacion
+from cotizador.tests.base import CotizadorTestCase
+from cotizador.ubicaciones import obtener_indice_ubicaciones, reconstruir_ubicaciones
+
+
+class UbicacionesTest(CotizadorTestCase):
+
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.centro = Ruta.objects.create(origen='Centro', destino='Ñuñoa', distancia_km=1, tiempo_min=1)
+            self.maipu = Ruta.objects.create(origen='centro ', destino='Maipú', distancia_km=1, tiempo_min=1)
+
+    def test_indice_de_lugares(self):
+        self.assertEqual(list(obtener_indice_ubicaciones().nombres), ['Centro', 'Maipú', 'Ñuñoa'])
+        self.assertEqual(Ubicacion.objects.get(nombre_normalizado='centro').num_rutas, 2)
+
+    def test_cambios_de_rutas(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.maipu.destino = 'Providencia'
+            self.maipu.save()
+        self.assertEqual(
+            sorted(Ubicacion.objects.values_list('nombre', flat=True)), ['Centro', 'Providencia', 'Ñuñoa'])
+        self.assertIn('Providencia', obtener_indice_ubicaciones().conjunto)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.centro.delete()
+        self.assertEqual(
+            sorted(Ubicacion.objects.values_list('nombre', 'num_rutas')), [('Centro', 1), ('Providencia', 1)])
+
+    def test_reconstruir(self):
+        Ubicacion.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            reconstruir_ubicaciones()
+        self.assertEqual(Ubicacion.objects.get(nombre_normalizado='centro').num_rutas, 2)
+        self.assertEqual(Ubicacion.objects.count(), 3)
+
+    def test_formulario_valida_lugares(self):
+        formulario = CotizacionForm(data={'origen': 'CENTRO', 'destino': 'maipu'})
+        self.assertTrue(formulario.is_valid())
+        self.assertEqual(formulario.cleaned_data['origen'], 'Centro')
+        self.assertFalse(CotizacionForm(data={'origen': 'Centro', 'destino': 'Lo Prado'}).is_valid())
@@ -0,0 +1,202 @@
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F
+
+from .cache import SnapshotVersionado
+from .models import Ruta, Ubicacion
+from .normalizacion import normalizar_lugar
+
+
+class IndiceUbicaciones:
+    """
+    Lugares disponibles ya ordenados, con la zona de tarifa dinámica de cada lugar (por
+    nombre normalizado) y un índice para autocompletar: un arreglo ordenado con el nombre
+    normalizado de cada lugar desde el comienzo de cada una de sus palabras, en el que
+    las búsquedas por prefijo son bisecciones.
+    """
+    # Coincidencias por prefijo que se ordenan por relevancia; con más, se toman las primeras
+    MAX_CANDIDATOS = 500
+    # Largo de consulta (3 a este) con el que se buscan variantes a una letra de diferencia: cada
+    # letra genera unas dos por letra del alfabeto, y cada variante es una bisección
+    MAX_LARGO_APROXIMADO = 20
+
+    def __init__(self, nombres, zonas=None, popularidad=None):
+        self.nombres = tuple(sorted(nombres))
+        self.zonas = zonas or {}
+        self.conjunto = frozenset(self.nombres)
+        self.por_clave = {normalizar_lugar(nombre): nombre for nombre in self.nombres}
+        popularidad = popularidad or {}
+        self.popularidad = array('I', (popularidad.get(nombre, 0) for nombre in self.nombres))
+
+        entradas = []
+        for posicion, nombre in enumerate(self.nombres):
+            clave = normalizar_lugar(nombre)
+            inicio = 0
+            for palabra in clave.split(' '):
+                entradas.append((clave[inicio:], posicion, inicio == 0))
+                inicio += len(palabra) + 1
+        entradas.sort()
+        self.textos = [texto for texto, _, _ in entradas]
+        self.posiciones = array('I', (posicion for _, posicion, _ in entradas))
+        self.completos = bytes(completo for _, _, completo in entradas)
+        self.alfabeto = ''.join(sorted(set(''.join(self.por_clave))))
+
+    def zona(self, nombre):
+        """
+        Zona (normalizada) del lugar; cadena vacía si no tiene.
+        """
+        return self.zonas.get(normalizar_lugar(nombre), '')
+
+    def nombre(self, texto):
+        """
+        Nombre del lugar escrito en `texto` sin distinguir tildes ni mayúsculas, o None.
+        """
+        return self.por_clave.get(normalizar_lugar(texto))
+
+    def _prefijo(self, prefijo, rango, candidatos, limite):
+        """
+        Agrega a `candidatos` (posición -> rango) los lugares con una palabra que empieza por
+        `prefijo`, revisando como máximo `limite` entradas del arreglo.
+        """
+        i = bisect_left(self.textos, prefijo)
+        fin = min(len(self.textos), i + limite)
+        while i < fin and self.textos[i].startswith(prefijo):
+            posicion = self.posiciones[i]
+            # Rango 0: empieza por el texto; 1: otra palabra empieza por él; 2: con una letra de diferencia
+            rango_entrada = rango if rango or self.completos[i] else 1
+            if rango_entrada < candidatos.get(posicion, 3):
+                candidatos[posicion] = rango_entrada
+            i += 1
+
+    def _variantes(self, consulta):
+        """
+        Textos a una edición de `consulta`: sobra, falta o cambia una letra, o dos vecinas invertidas.
+        """
+        variantes = set()
+        for i in range(len(consulta)):
+            variantes.add(consulta[:i] + consulta[i + 1:])
+            if i + 1 < len(consulta):
+                variantes.add(consulta[:i] + consulta[i + 1] + consulta[i] + consulta[i + 2:])
+            for letra in self.alfabeto:
+                variantes.add(consulta[:i] + letra + consulta[i + 1:])
+                variantes.add(consulta[:i] + letra + consulta[i:])
+        variantes.discard(consulta)
+        return variantes
+
+    def sugerir(self, texto, cantidad=10):
+        """
+        Lugares para autocompletar `texto`, sin distinguir tildes ni mayúsculas: primero los
+        que empiezan por el texto, luego los que tienen otra palabra que empieza por él y, si
+        faltan, los que coinciden con una letra de diferencia (con 3 a MAX_LARGO_APROXIMADO
+        letras). Dentro de cada grupo, primero los lugares con más rutas.
+        """
+        consulta = normalizar_lugar(texto)
+        if not consulta:
+            return []
+        candidatos = {}
+        self._prefijo(consulta, 0, candidatos, self.MAX_CANDIDATOS)
+        if len(candidatos) < cantidad and 3 <= len(consulta) <= self.MAX_LARGO_APROXIMADO:
+            for variante in self._variantes(consulta):
+                if variante.strip():
+                    self._prefijo(variante, 2, candidatos, cantidad)
+        mejores = sorted(
+            candidatos.items(),
+            key=lambda candidato: (candidato[1], -self.popularidad[candidato[0]], candidato[0]),
+        )
+        return [self.nombres[posicion] for posicion, _ in mejores[:cantidad]]
+
+
+def _construir_indice():
+    filas = Ubicacion.objects.values_list('nombre', 'nombre_normalizado', 'zona', 'num_rutas')
+    nombres, zonas, popularidad = [], {}, {}
+    for nombre, nombre_normalizado, zona, num_rutas in filas:
+        nombres.append(nombre)
+        popularidad[nombre] = max(num_rutas, 0)
+        if zona:
+            zonas[nombre_normalizado] = normalizar_lugar(zona)
+    return IndiceUbicaciones(nombres, zonas, popularidad)
+
+
+indice_ubicaciones = SnapshotVersionado('ubicaciones', _construir_indice)
+
+
+def obtener_indice_ubicaciones():
+    """
+    Devuelve el índice vigente de ubicaciones (O(1) mientras no cambien las rutas).
+    """
+    return indice_ubicaciones.obtener()
+
+
+def _contar_lugares(nombres):
+    conteo = Counter()
+    nombre_por_clave = {}
+    for nombre in nombres:
+        clave = normalizar_lugar(nombre)
+        if clave:
+            conteo[clave] += 1
+            nombre_por_clave.setdefault(clave, ' '.join(nombre.split()))
+    return conteo, nombre_por_clave
+
+
+def actualizar_ubicaciones(agregados=(), retirados=()):
+    """
+    Ajusta el índice con los lugares de una ruta creada, modificada o eliminada.
+    Solo se invalida la copia en memoria si aparece o desaparece algún lugar.
+    """
+    sumados, nombres = _contar_lugares(agregados)
+    restados, _ = _contar_lugares(retirados)
+    sumados.subtract(restados)
+
+    hubo_cambios = False
+    for clave, delta in sumados.items():
+        if delta > 0:
+            _, creada = Ubicacion.objects.get_or_create(
+                nombre_normalizado=clave,
+                defaults={'nombre': nombres[clave], 'num_rutas': 0},
+            )
+            Ubicacion.objects.filter(nombre_normalizado=clave).update(num_rutas=F('num_rutas') + delta)
+            hubo_cambios |= creada
+        elif delta < 0:
+            Ubicacion.objects.filter(nombre_normalizado=clave).update(num_rutas=F('num_rutas') + delta)
+            # Los lugares con coordenadas se conservan aunque ya no tengan rutas
+            eliminadas, _ = Ubicacion.objects.filter(
+                nombre_normalizado=clave, num_rutas__lte=0, latitud__isnull=True
+            ).delete()
+            hubo_cambios |= bool(eliminadas)
+
+    if hubo_cambios:
+        transaction.on_commit(indice_ubicaciones.invalidar)
+
+
+@transaction.atomic
+def reconstruir_ubicaciones(tamano_lote=1000):
+    """
+    Recalcula el índice completo desde Ruta (para cargas masivas que no disparan señales).
+    """
+    conteo, nombres = _contar_lugares(
+        nombre
+        for par in Ruta.objects.filter(estimada=False).values_list('origen', 'destino').iterator(chunk_size=tamano_lote)
+        for nombre in par
+    )
+    actualizadas, sobrantes = [], []
+    for ubicacion in Ubicacion.objects.only('pk', 'nombre_normalizado', 'num_rutas', 'latitud').iterator():
+        cantidad = conteo.pop(ubicacion.nombre_normalizado, 0)
+        if not cantidad and ubicacion.latitud is None:
+            sobrantes.append(ubicacion.pk)
+        elif cantidad != ubicacion.num_rutas:
+            ubicacion.num_rutas = cantidad
+            actualizadas.append(ubicacion)
+
+    Ubicacion.objects.bulk_update(actualizadas, ['num_rutas'], batch_size=tamano_lote)
+    for inicio in range(0, len(sobrantes), tamano_lote):
+        Ubicacion.objects.filter(pk__in=sobrantes[inicio:inicio + tamano_lote]).delete()
+    # Lo que queda en el conteo son lugares nuevos
+    Ubicacion.objects.bulk_create(
+        [Ubicacion(nombre=nombres[clave], nombre_normalizado=clave, num_rutas=cantidad)
+         for clave, cantidad in conteo.items()],
+        batch_size=tamano_lote,
+    )
+    transaction.on_commit(indice_ubicaciones.invalidar)
@@ -1,5 +1,6 @@
+from django.conf import settings
 from django.urls import path
-from .views import CotizacionView, RedireccionView, MisCotizacionesView, EditarCotizacionView, EliminarCotizacionView
+from .views import CotizacionView, RedireccionView, MisCotizacionesView, EditarCotizacionView, EliminarCotizacionView, CotizacionApiView, ProveedorSimuladoView, UbicacionesCercanasView, SugerenciasUbicacionesView, MetricasView, AnaliticaView, AnaliticaApiView
 
 urlpatterns = [
     path('', CotizacionView.as_view(), name='home'),
@@ -7,5 +8,14 @@ urlpatterns = [
     path('mis_cotizaciones/', MisCotizacionesView.as_view(), name='mis_cotizaciones'),
     path('cotizacion/editar/<int:pk>/', EditarCotizacionView.as_view(), name='editar_cotizacion'),
     path('cotizacion/eliminar/<int:pk>/', EliminarCotizacionView.as_view(), name='eliminar_cotizacion'),
+    path('api/cotizaciones/', CotizacionApiView.as_view(), name='api_cotizaciones'),
+    path('api/ubicaciones/cercanas/', UbicacionesCercanasView.as_view(), name='ubicaciones_cercanas'),
+    path('api/ubicaciones/sugerencias/', SugerenciasUbicacionesView.as_view(), name='sugerencias_ubicaciones'),
+    path('metricas/', MetricasView.as_view(), name='metricas'),
+    path('analitica/', AnaliticaView.as_view(), name='analitica'),
+    path('api/analitica/', AnaliticaApiView.as_view(), name='api_analitica'),
 ]
 
+
+if settings.COTIZADOR_PROVEEDOR_SIMULADO:
+    urlpatterns.append(path('api/proveedor-simulado/', ProveedorSimuladoView.as_view(), name='proveedor_simulado'))
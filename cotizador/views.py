@@ -1,82 +1,159 @@
-from django.shortcuts import render, redirect, get_object_or_404
+import asyncio
+import hashlib
+import json
+import os
+from functools import lru_cache
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.shortcuts import render, redirect
+from django.db.models import Q
 from django.views import View
-from django.contrib.auth.mixins import LoginRequiredMixin
+from asgiref.sync import sync_to_async
+from django.contrib.auth.mixins import AccessMixin, LoginRequiredMixin, UserPassesTestMixin
 from django.views.generic import ListView, UpdateView, DeleteView
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
+from django.template.loader import get_template
 from decimal import Decimal, InvalidOperation
-from django.http import HttpResponseRedirect
+from django.http import Http404, HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.utils.dateparse import parse_datetime
+from .analitica import resumen_analitica
+from .cache import fecha_generacion, obtener_generacion
+from .diferido import cola_cotizaciones
+from .dinamica import RecargosVigentes
+from .geo import estimar_ruta, obtener_indice_espacial
+from .grafo import buscar_ruta, materializar_ruta, ruta_aproximada
 from .formularios import CotizacionForm, EditarCotizacionForm
-from .models import TransporteApp, CotizacionTraslado, Ruta
-from .simulador import AppCotizadora, obtener_datos_ruta
+from .matriz import cotizar_ruta
+from .memo import memo_cotizaciones
+from .metricas import registro_metricas
+from .models import CotizacionTraslado, Ruta
+from .proveedores import cotizar_con_proveedores
+from .recotizacion import recotizar_cotizacion
+from .paginacion import codificar_cursor, decodificar_cursor
+from .normalizacion import clave_ruta
+from .simulador import AppCotizadora, obtener_datos_ruta, obtener_rutas
+from .tarifas import obtener_tarifario
+from .ubicaciones import obtener_indice_ubicaciones
+
+
+class LoginRequeridoAsyncMixin(AccessMixin):
+    """
+    Equivalente a LoginRequiredMixin para vistas async:
+    carga el usuario con request.auser() en vez de acceder a request.user de forma síncrona.
+    """
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        return await super().dispatch(request, *args, **kwargs)
+
+
+@lru_cache(maxsize=None)
+def _version_plantillas():
+    # Cambia al desplegar plantillas nuevas (con DEBUG desactivado no se recargan en caliente)
+    marcas = [
+        str(os.stat(get_template(nombre).origin.name).st_mtime_ns)
+        for nombre in ('base.html', 'home.html', 'campos_cotizacion.html')
+    ]
+    return hashlib.sha256(":".join(marcas).encode()).hexdigest()[:12]
 
 
-class CotizacionView(LoginRequiredMixin, View):
+def _version_catalogo():
     """
-    Vista principal del cotizador.
+    Versión de lo que muestra la página de inicio sin cotizar: la generación del catálogo
+    de lugares y la de las plantillas.
+    """
+    return f"{obtener_generacion('ubicaciones')}-{_version_plantillas()}"
+
+
+def _etag_inicio(request, *args, **kwargs):
+    # La página también depende del usuario y del token CSRF incluido en el formulario
+    token = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+    return hashlib.sha256(f"{_version_catalogo()}:{request.user.pk}:{token}".encode()).hexdigest()[:32]
+
+
+def _modificacion_inicio(request, *args, **kwargs):
+    return fecha_generacion('ubicaciones')
+
+
+class CotizacionView(LoginRequeridoAsyncMixin, View):
+    """
+    Vista principal del cotizador (async).
     Permite al usuario ingresar origen y destino,
-    y calcula cotizaciones en todas las apps de transporte disponibles.
+    y calcula cotizaciones en todas las apps de transporte disponibles,
+    consultando a la vez a los proveedores de precios remotos.
     """
     template_name = 'home.html'
 
     def _calcular_cotizacion(self, request, origen, destino):
         """
         Método auxiliar que recibe origen y destino,
-        valida el formulario y genera cotizaciones para cada app.
+        valida el formulario y genera cotizaciones locales para cada app.
         """
         form = CotizacionForm(data={'origen': origen, 'destino': destino})
         cotizaciones = []
+        ruta_obj = None
 
         if form.is_valid():
-            ruta_obj = obtener_datos_ruta(origen, destino)
-            if ruta_obj:
-                todas_las_apps = TransporteApp.objects.all()
-                for app in todas_las_apps:
-                    try:
-                        cotizadora = AppCotizadora(app, ruta_obj)
-                        resultado = cotizadora.calcular_cotizacion()
-                        cotizaciones.append({
-                            'app_id': app.pk,
-                            'app_nombre': app.nombre,
-                            'app_logo': app.logo.url,
-                            'precio': resultado['precio'],
-                            'tiempo_espera': resultado['tiempo_espera'],
-                            'factor_dinamico': resultado['factor_dinamico'],
-                            'origen_nombre': ruta_obj.origen,
-                            'destino_nombre': ruta_obj.destino,
-                        })
-                    except Exception as e:
-                        # Si alguna app falla, se ignora y se continúa con las demás
-                        print(f"Error al cotizar con {app.nombre}: {e}")
-                        continue
-        return form, cotizaciones
-
-    def get(self, request):
-        """
-        GET: siempre muestra el formulario vacío al cargar la página.
-        No abre modal automáticamente.
-        """
+            # Los lugares se escriben a mano: se usan con el nombre del índice
+            origen, destino = form.cleaned_data['origen'], form.cleaned_data['destino']
+            # Los pares frecuentes se sirven memorizados mientras no cambien tarifas ni rutas
+            ruta_obj, cotizaciones = memo_cotizaciones.obtener(
+                origen, destino, lambda: self._cotizar_par(origen, destino)
+            )
+        return form, cotizaciones, ruta_obj
+
+    @staticmethod
+    def _cotizar_par(origen, destino):
+        # Ruta directa o, si no existe, compuesta por el camino más corto entre rutas guardadas
+        ruta_obj = buscar_ruta(origen, destino)
+        if ruta_obj is None:
+            return None, []
+        # Precios precalculados de la ruta (o calculados en una sola pasada si no están vigentes)
+        return ruta_obj, cotizar_ruta(ruta_obj)
+
+    def _mostrar_formulario(self, request):
         form = CotizacionForm()
-        rutas = Ruta.objects.all()
 
         return render(request, self.template_name, {
             'form': form,
             'cotizaciones': None,            # no mostrar resultados
             'origen_seleccionado': None,     # no rellenar origen
             'destino_seleccionado': None,    # no rellenar destino
-            'rutas': rutas,
+            'version_catalogo': _version_catalogo(),  # clave del fragmento cacheado de los campos
             'mostrar_modal': False           # <- asegura que el modal no se abra al volver
         })
 
-    def post(self, request):
+    @method_decorator(cache_control(private=True, no_cache=True))
+    @method_decorator(condition(etag_func=_etag_inicio, last_modified_func=_modificacion_inicio))
+    async def get(self, request):
+        """
+        GET: siempre muestra el formulario vacío al cargar la página.
+        No abre modal automáticamente. Responde 304 si el navegador ya tiene esta versión.
+        """
+        return await sync_to_async(self._mostrar_formulario)(request)
+
+    async def post(self, request):
         """
         POST: recibe origen y destino desde el formulario y calcula cotizaciones.
         Abre modal automáticamente para mostrar resultados.
         """
         origen = request.POST.get('origen')
         destino = request.POST.get('destino')
-        form, cotizaciones = self._calcular_cotizacion(request, origen, destino)
+        form, cotizaciones, ruta_obj = await sync_to_async(self._calcular_cotizacion)(request, origen, destino)
+        if form.is_valid():
+            origen, destino = form.cleaned_data['origen'], form.cleaned_data['destino']
+        if cotizaciones:
+            apps = (await sync_to_async(obtener_tarifario)()).cotizador.apps
+            cotizaciones = await cotizar_con_proveedores(cotizaciones, apps, ruta_obj)
 
-        return render(request, self.template_name, {
+        return await sync_to_async(render)(request, self.template_name, {
             'form': form,
             'cotizaciones': cotizaciones,
             'origen_seleccionado': origen,
@@ -97,20 +174,44 @@ class RedireccionView(LoginRequiredMixin, View):
         tiempo = request.POST.get('tiempo_espera')
         factor = request.POST.get('factor_dinamico')
 
-        # Buscar la app seleccionada (equivale a SELECT * FROM transporte_app WHERE id = app_id LIMIT 1)
-        app_seleccionada = get_object_or_404(TransporteApp, pk=app_id)
-        ruta_obj = obtener_datos_ruta(origen, destino)
+        # Buscar la app seleccionada en las tarifas en memoria (sin consultar la base de datos)
+        app_seleccionada = obtener_tarifario().obtener(app_id)
+        if app_seleccionada is None:
+            raise Http404("No existe la aplicación de transporte seleccionada.")
+        # Una ruta compuesta o estimada se guarda como ruta estimada (no como arista del grafo)
+        ruta_obj = obtener_datos_ruta(origen, destino) or materializar_ruta(origen, destino, request.user)
+
+        cotizacion_id = request.POST.get('cotizacion_id')
+        if cotizacion_id:
+            # Elección tras editar una cotización: se actualiza la misma fila
+            try:
+                cotizacion = ruta_obj and recotizar_cotizacion(int(cotizacion_id), request.user, ruta_obj, {
+                    'app_id': app_seleccionada.pk, 'precio': precio, 'tiempo_espera': tiempo, 'factor_dinamico': factor,
+                })
+            except (TypeError, ValueError, InvalidOperation, ValidationError):
+                return redirect('mis_cotizaciones')
+            if cotizacion is None:
+                raise Http404("No existe la cotización.")
+            return HttpResponseRedirect(app_seleccionada.link_base)
 
         try:
-            CotizacionTraslado.objects.create(
+            cotizacion = CotizacionTraslado(
                 usuario=request.user,
                 ruta=ruta_obj,
                 app_seleccionada=app_seleccionada,
                 precio=Decimal(precio),
                 tiempo_espera=int(tiempo),
                 factor_dinamico=Decimal(factor) if factor else Decimal("1.0"),
+                distancia_km=ruta_obj.distancia_km if ruta_obj else None,
+                tiempo_min=ruta_obj.tiempo_min if ruta_obj else None,
             )
-        except (TypeError, ValueError, InvalidOperation):
+            if settings.COTIZADOR_ESCRITURA_DIFERIDA:
+                # Se valida antes de encolar: un lote no debe fallar por una fila inválida
+                cotizacion.clean_fields(exclude=['usuario', 'ruta', 'app_seleccionada'])
+                cola_cotizaciones.encolar(cotizacion)
+            else:
+                cotizacion.save()
+        except (TypeError, ValueError, InvalidOperation, ValidationError):
             # Si algo falla al guardar, se redirige al home
             return redirect('home')
 
@@ -120,97 +221,115 @@ class RedireccionView(LoginRequiredMixin, View):
 
 class MisCotizacionesView(LoginRequiredMixin, ListView):
     """
-    Muestra un listado de todas las cotizaciones realizadas por el usuario autenticado.
+    Muestra un listado de las cotizaciones realizadas por el usuario autenticado,
+    paginado por cursor sobre (fecha_creacion, id).
     """
     model = CotizacionTraslado
     template_name = 'mis_cotizaciones.html'
     context_object_name = 'cotizaciones'
+    tamano_pagina = 20
 
     def get_queryset(self):
-        # Equivale a: SELECT * FROM cotizador_cotizaciontraslado WHERE usuario_id = [USER_ID] ORDER BY fecha_creacion DESC
-        return CotizacionTraslado.objects.filter(usuario=self.request.user).order_by('-fecha_creacion')
-
-
-class EditarCotizacionView(LoginRequiredMixin, UpdateView):
+        # Equivale a: SELECT ... FROM cotizador_cotizaciontraslado JOIN ruta JOIN app
+        # WHERE usuario_id = [USER_ID] AND (fecha_creacion, id) < [CURSOR] ORDER BY fecha_creacion DESC, id DESC
+        # y se resuelve con el índice (usuario, -fecha_creacion, -id) sin importar el largo del historial
+        queryset = (
+            CotizacionTraslado.objects
+            .filter(usuario=self.request.user)
+            .select_related('ruta', 'app_seleccionada')
+            .only(
+                'fecha_creacion', 'precio', 'tiempo_espera',
+                'ruta', 'ruta__origen', 'ruta__destino',
+                'app_seleccionada', 'app_seleccionada__nombre', 'app_seleccionada__logo',
+            )
+            .order_by('-fecha_creacion', '-id')
+        )
+        cursor = decodificar_cursor(self.request.GET.get('cursor'))
+        if cursor:
+            fecha, pk = cursor
+            queryset = queryset.filter(Q(fecha_creacion__lt=fecha) | Q(fecha_creacion=fecha, id__lt=pk))
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        # Se pide una fila de más para saber si hay página siguiente sin hacer COUNT(*)
+        filas = list(self.object_list[:self.tamano_pagina + 1])
+        pagina = filas[:self.tamano_pagina]
+        context = super().get_context_data(object_list=pagina, **kwargs)
+        context['cursor_siguiente'] = codificar_cursor(pagina[-1]) if len(filas) > self.tamano_pagina else None
+        context['es_primera_pagina'] = not self.request.GET.get('cursor')
+        return context
+
+
+class EditarCotizacionView(LoginRequeridoAsyncMixin, UpdateView):
     """
-    Permite editar una cotización existente.
-    Si se cambia origen/destino, se elimina la cotización original y se generan nuevas.
+    Permite editar una cotización existente del usuario, que se recotiza en su lugar (async).
+    Si se cambia origen/destino, se busca la ruta por su clave (o el camino más corto), se
+    cotizan todas las apps en una pasada, consultando a la vez a los proveedores remotos,
+    y se muestran para elegir; la cotización queda con la nueva ruta y el precio de su app.
     Si se cambia solo la app, se recalculan los valores.
     """
     model = CotizacionTraslado
     form_class = EditarCotizacionForm
     template_name = 'editar_cotizacion.html'
     success_url = reverse_lazy('mis_cotizaciones')
+    # Todos los métodos de una vista async deben ser async: sin el PUT síncrono de UpdateView
+    http_method_names = ['get', 'post', 'head', 'options']
+
+    def get_queryset(self):
+        return CotizacionTraslado.objects.filter(usuario=self.request.user).select_related('ruta')
+
+    async def post(self, request, *args, **kwargs):
+        self.object = await sync_to_async(self.get_object)()
+        form = await sync_to_async(self.get_form)()
+        if not await sync_to_async(form.is_valid)():
+            return self.form_invalid(form)
+        return await self.form_valid(form)
 
-    def form_valid(self, form):
+    async def form_valid(self, form):
+        guardar = sync_to_async(super().form_valid)
         cotizacion = form.instance
+        app_id = form.cleaned_data['app_seleccionada'].pk if form.cleaned_data.get('app_seleccionada') else None
+        cambio_lugares = 'origen' in form.changed_data or 'destino' in form.changed_data
+        if not cambio_lugares and ('app_seleccionada' not in form.changed_data or not cotizacion.ruta):
+            return await guardar(form)
 
-        # Caso 1: el usuario edita origen o destino
-        if 'origen' in form.changed_data or 'destino' in form.changed_data:
+        if cambio_lugares:
             origen = form.cleaned_data['origen']
             destino = form.cleaned_data['destino']
-
-            # Guardar datos antes de borrar
-            usuario = cotizacion.usuario
-            distancia = cotizacion.ruta.distancia_km if cotizacion.ruta else 0
-            tiempo = cotizacion.ruta.tiempo_min if cotizacion.ruta else 0
-
-            # Eliminar la cotización original
-            cotizacion.delete()
-
-            # Crear/obtener nueva ruta
-            ruta, _ = Ruta.objects.get_or_create(
-                origen=origen,
-                destino=destino,
-                defaults={
-                    'distancia_km': distancia,
-                    'tiempo_min': tiempo,
-                    'creado_por': usuario
-                }
+            # Ruta directa por su clave o compuesta, y precios de todas las apps, memorizados por par
+            ruta, cotizaciones = await sync_to_async(memo_cotizaciones.obtener)(
+                origen, destino, lambda: CotizacionView._cotizar_par(origen, destino)
             )
-
-            # Generar nuevas cotizaciones para todas las apps
-            cotizaciones = []
-            for app in TransporteApp.objects.all():
-                cotizador = AppCotizadora(app, ruta)
-                datos = cotizador.calcular_cotizacion()
-                cotizaciones.append({
-                    'app_id': app.id,
-                    'app_nombre': app.nombre,
-                    'app_logo': app.logo.url,
-                    'precio': datos['precio'],
-                    'tiempo_espera': datos['tiempo_espera'],
-                    'factor_dinamico': datos['factor_dinamico'],
-                    'origen_nombre': origen,
-                    'destino_nombre': destino,
-                })
-
-            # Mostrar modal con nuevas cotizaciones
-            return self.render_to_response(
-                self.get_context_data(
-                    form=form,
-                    recotizar=True,
-                    cotizaciones=cotizaciones,
-                    mostrar_modal=True   # <- abre modal solo tras recotizar
-                )
+            if ruta is None:
+                form.add_error(None, "No hay una ruta conocida entre estos lugares.")
+                return self.form_invalid(form)
+            apps = (await sync_to_async(obtener_tarifario)()).cotizador.apps
+            cotizaciones = await cotizar_con_proveedores(cotizaciones, apps, ruta)
+        else:
+            ruta = cotizacion.ruta
+            cotizaciones = await sync_to_async(cotizar_ruta)(ruta)
+
+        elegida = next((cot for cot in cotizaciones if cot['app_id'] == app_id), None)
+        if elegida is not None:
+            await sync_to_async(recotizar_cotizacion)(cotizacion.pk, self.request.user, ruta, elegida)
+        if not cambio_lugares:
+            return HttpResponseRedirect(self.get_success_url()) if elegida else await guardar(form)
+
+        # Mostrar modal con nuevas cotizaciones: elegir otra app vuelve a actualizar esta cotización
+        return self.render_to_response(
+            self.get_context_data(
+                form=form,
+                recotizar=True,
+                cotizaciones=cotizaciones,
+                mostrar_modal=True   # <- abre modal solo tras recotizar
             )
+        )
 
-        # Caso 2: el usuario solo cambia la app seleccionada
-        elif 'app_seleccionada' in form.changed_data and cotizacion.ruta:
-            cotizador = AppCotizadora(cotizacion.app_seleccionada, cotizacion.ruta)
-            datos = cotizador.calcular_cotizacion()
-            cotizacion.precio = datos['precio']
-            cotizacion.tiempo_espera = datos['tiempo_espera']
-            cotizacion.factor_dinamico = datos['factor_dinamico']
-            cotizacion.save()
-
-        return super().form_valid(form)
-
-    def get(self, request, *args, **kwargs):
+    async def get(self, request, *args, **kwargs):
         """
         GET: al volver desde la app externa, no abrir modal.
         """
-        response = super().get(request, *args, **kwargs)
+        response = await sync_to_async(super().get)(request, *args, **kwargs)
         # Forzar que el modal no se abra automáticamente
         response.context_data['mostrar_modal'] = False
         return response
@@ -228,3 +347,232 @@ class EliminarCotizacionView(LoginRequiredMixin, DeleteView):
         # Solo permite eliminar cotizaciones del usuario actual
         return self.model.objects.filter(usuario=self.request.user)
 
+
+
+class CotizacionApiView(View):
+    """
+    API JSON de cotización masiva.
+    Recibe {"rutas": [{"origen": ..., "destino": ...}, ...]} y devuelve la matriz de
+    precios de todas las apps para cada par. Las rutas se resuelven en una sola consulta;
+    los pares sin ruta directa se cotizan por el camino más corto o estimados por coordenadas
+    (con ruta_id null). Origen y destino también pueden ser puntos {"lat": ..., "lon": ...}.
+    Con "vigente_en" (fecha y hora ISO 8601) se cotiza con las tarifas de ese momento.
+    Exige sesión iniciada y el token CSRF (cabecera X-CSRFToken): cada solicitud puede
+    cotizar miles de rutas y no debe poder dispararla otro sitio con la sesión del usuario.
+    """
+    http_method_names = ['post']
+
+    def _leer_extremo(self, valor):
+        """
+        Nombre de lugar, o punto asociado al lugar más cercano (COTIZADOR_RADIO_CERCANO_KM).
+        Devuelve (nombre, coordenadas); las coordenadas solo si el punto no tiene un lugar cerca.
+        """
+        if not isinstance(valor, dict):
+            return str(valor), None
+        latitud, longitud = float(valor['lat']), float(valor['lon'])
+        if not (-90 <= latitud <= 90 and -180 <= longitud <= 180):
+            raise ValueError("Coordenadas fuera de rango")
+        nombre = obtener_indice_espacial().mas_cercano(latitud, longitud, settings.COTIZADOR_RADIO_CERCANO_KM)
+        if nombre:
+            return nombre, None
+        return f"{latitud:.6f},{longitud:.6f}", (latitud, longitud)
+
+    def _leer_momento(self, valor):
+        """
+        Momento de "vigente_en" (None si no se indica); sin zona horaria se toma como hora local.
+        """
+        if valor is None:
+            return None
+        momento = parse_datetime(valor)
+        if momento is None:
+            raise ValueError("Fecha y hora inválidas")
+        return momento if timezone.is_aware(momento) else timezone.make_aware(momento)
+
+    def post(self, request):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Autenticación requerida.'}, status=401)
+        try:
+            datos = json.loads(request.body)
+            pares = [
+                (*self._leer_extremo(par['origen']), *self._leer_extremo(par['destino']))
+                for par in datos['rutas']
+            ]
+            vigente_en = self._leer_momento(datos.get('vigente_en'))
+        except (ValueError, TypeError, KeyError):
+            return JsonResponse(
+                {'error': 'Se espera {"rutas": [{"origen": "...", "destino": "..."}, ...]}; '
+                          'origen y destino pueden ser {"lat": ..., "lon": ...} y "vigente_en", '
+                          'una fecha y hora ISO 8601.'},
+                status=400,
+            )
+        if len(pares) > settings.COTIZADOR_API_MAX_RUTAS:
+            return JsonResponse(
+                {'error': f'Se admiten como máximo {settings.COTIZADOR_API_MAX_RUTAS} rutas por solicitud.'},
+                status=400,
+            )
+
+        cotizador = obtener_tarifario(vigente_en).cotizador
+        rutas = obtener_rutas((origen, destino) for origen, _, destino, _ in pares)
+        recargos = RecargosVigentes(cotizador.apps, vigente_en)
+        encabezado = {
+            'apps': [
+                {
+                    'id': app.pk,
+                    'nombre': app.nombre,
+                    'tiempo_espera': app.tiempo_espera,
+                    'factor_dinamico': str(app.factor_dinamico),
+                }
+                for app in cotizador.apps
+            ],
+        }
+
+        def resultados():
+            for origen, coordenadas_origen, destino, coordenadas_destino in pares:
+                if coordenadas_origen or coordenadas_destino:
+                    ruta = estimar_ruta(origen, destino, coordenadas_origen, coordenadas_destino)
+                else:
+                    ruta = rutas.get(clave_ruta(origen, destino)) or ruta_aproximada(origen, destino)
+                yield {
+                    'origen': origen,
+                    'destino': destino,
+                    'ruta_id': ruta.pk if ruta else None,
+                    'precios': [
+                        int(precio) for precio in cotizador.calcular_precios(ruta, recargos.para(ruta))
+                    ] if ruta else None,
+                }
+
+        if len(pares) <= settings.COTIZADOR_API_STREAMING:
+            return JsonResponse({**encabezado, 'resultados': list(resultados())})
+
+        # Lotes grandes: el JSON se genera y envía por partes
+        def generar():
+            yield json.dumps(encabezado)[:-1] + ', "resultados": ['
+            for i, resultado in enumerate(resultados()):
+                yield (', ' if i else '') + json.dumps(resultado)
+            yield ']}'
+
+        return StreamingHttpResponse(generar(), content_type='application/json')
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ProveedorSimuladoView(View):
+    """
+    Proveedor de precios simulado para desarrollo (COTIZADOR_PROVEEDOR_SIMULADO).
+    Responde como un servicio externo usando la fórmula local;
+    ?demora=<segundos> (máx. 10) simula la latencia de la red.
+    """
+    http_method_names = ['post']
+
+    async def post(self, request):
+        try:
+            datos = json.loads(request.body)
+            demora = min(float(request.GET.get('demora', 0)), 10.0)
+            ruta = Ruta(
+                origen=str(datos['origen']),
+                destino=str(datos['destino']),
+                distancia_km=Decimal(str(datos['distancia_km'])),
+                tiempo_min=int(datos['tiempo_min']),
+            )
+        except (ValueError, TypeError, KeyError, InvalidOperation):
+            return JsonResponse({'error': 'Solicitud inválida.'}, status=400)
+
+        tarifario = await sync_to_async(obtener_tarifario)()
+        app = next((app for app in tarifario.apps if app.nombre == datos.get('app')), None)
+        if app is None:
+            return JsonResponse({'error': 'App no encontrada.'}, status=404)
+        if demora > 0:
+            await asyncio.sleep(demora)
+
+        # Puede leer la tabla de recargos de la base de datos
+        cotizacion = await sync_to_async(AppCotizadora(app, ruta).calcular_cotizacion)()
+        return JsonResponse({
+            'precio': str(cotizacion['precio']),
+            'tiempo_espera': cotizacion['tiempo_espera'],
+            'factor_dinamico': str(cotizacion['factor_dinamico']),
+        })
+
+
+class UbicacionesCercanasView(View):
+    """
+    Lugares más cercanos a un punto: GET ?lat=...&lon=...&cantidad=5.
+    """
+    def get(self, request):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Autenticación requerida.'}, status=401)
+        try:
+            latitud = float(request.GET['lat'])
+            longitud = float(request.GET['lon'])
+            cantidad = min(max(int(request.GET.get('cantidad', 5)), 1), 50)
+            if not (-90 <= latitud <= 90 and -180 <= longitud <= 180):
+                raise ValueError
+        except (KeyError, ValueError):
+            return JsonResponse({'error': 'Se esperan lat y lon válidos.'}, status=400)
+
+        cercanos = obtener_indice_espacial().cercanos(latitud, longitud, cantidad)
+        return JsonResponse({
+            'ubicaciones': [
+                {'nombre': nombre, 'distancia_km': round(distancia, 3)} for distancia, nombre in cercanos
+            ],
+        })
+
+
+@method_decorator(cache_control(private=True, max_age=60), name='get')
+class SugerenciasUbicacionesView(View):
+    """
+    Autocompletado de lugares: GET ?q=...&cantidad=10, desde el índice de ubicaciones en memoria.
+    """
+    def get(self, request):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Autenticación requerida.'}, status=401)
+        try:
+            cantidad = min(max(int(request.GET.get('cantidad', 10)), 1), 50)
+        except ValueError:
+            return JsonResponse({'error': 'cantidad debe ser un número.'}, status=400)
+        texto = request.GET.get('q', '')[:100]
+        return JsonResponse({'ubicaciones': obtener_indice_ubicaciones().sugerir(texto, cantidad)})
+
+
+class MetricasView(View):
+    """
+    Métricas por vista de este proceso en formato de texto de Prometheus.
+    Acceso para usuarios staff o con la cabecera "Authorization: Bearer <COTIZADOR_METRICAS_TOKEN>".
+    """
+    def get(self, request):
+        token = settings.COTIZADOR_METRICAS_TOKEN
+        autorizado = request.user.is_staff or (
+            token and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+        )
+        if not autorizado:
+            return HttpResponse(status=403)
+        return HttpResponse(registro_metricas.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _dias_analitica(request, predeterminado=30):
+    try:
+        return min(max(int(request.GET.get('dias', predeterminado)), 1), 366)
+    except ValueError:
+        return predeterminado
+
+
+class AnaliticaView(UserPassesTestMixin, View):
+    """
+    Tablero de selecciones para usuarios staff (GET ?dias=30): cotizaciones y precio promedio
+    por día, por app y rutas más elegidas con la app que más gana, leídos de ResumenDiario.
+    """
+    template_name = 'analitica.html'
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request):
+        return render(request, self.template_name, resumen_analitica(_dias_analitica(request)))
+
+
+class AnaliticaApiView(AnaliticaView):
+    """
+    Los mismos indicadores del tablero en JSON.
+    """
+    raise_exception = True
+
+    def get(self, request):
+        return JsonResponse(resumen_analitica(_dias_analitica(request)))
@@ -0,0 +1,68 @@
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+# Columnas que se leen del usuario en cada solicitud: las que usan las vistas y plantillas
+# (id, username, permisos de staff, first_name en el encabezado del admin) e is_active, que
+# verifica django.contrib.auth. La clave solo se lee de la base para calcular el hash de la
+# sesión: en la cache se guarda ese hash, no la clave. Las demás se cargan solo si se accede a
+# ellas. En el orden de las columnas del modelo, como espera from_db().
+CAMPOS_CON_CLAVE = ('id', 'password', 'last_login', 'is_superuser', 'username', 'first_name', 'is_staff', 'is_active')
+CAMPOS_USUARIO = tuple(campo for campo in CAMPOS_CON_CLAVE if campo != 'password')
+
+
+def clave_usuario(user_id):
+    return f"usuarios:usuario-sesion:{user_id}"
+
+
+def _hash_sesion(usuario, hash_guardado):
+    # Si se cargó o cambió la clave (p. ej. set_password antes de update_session_auth_hash), vale la actual
+    if 'password' in usuario.__dict__:
+        return type(usuario).get_session_auth_hash(usuario)
+    return hash_guardado
+
+
+def olvidar_usuario(user_id):
+    """
+    Quita al usuario de la cache (tras guardarlo o eliminarlo).
+    """
+    caches[settings.SESSION_CACHE_ALIAS].delete(clave_usuario(user_id))
+
+
+class UsuarioLivianoBackend(ModelBackend):
+    """
+    ModelBackend que carga el usuario de la sesión solo con CAMPOS_USUARIO y, con
+    COTIZADOR_USUARIOS_CACHE_TTL, lo guarda esos segundos en la cache de sesiones junto con
+    el hash de la sesión, de modo que las solicitudes autenticadas no consultan auth_user.
+    Guardar o eliminar un usuario lo quita de la cache; con caches propias de cada proceso,
+    los demás workers pueden seguir viendo la versión anterior hasta que venza.
+    """
+
+    def get_user(self, user_id):
+        modelo = get_user_model()
+        ttl = settings.COTIZADOR_USUARIOS_CACHE_TTL
+        cache = caches[settings.SESSION_CACHE_ALIAS]
+        guardado = cache.get(clave_usuario(user_id)) if ttl else None
+        if guardado is None:
+            valores = modelo._default_manager.filter(pk=user_id).values_list(*CAMPOS_CON_CLAVE).first()
+            if valores is None:
+                return None
+            usuario = modelo.from_db(DEFAULT_DB_ALIAS, CAMPOS_CON_CLAVE, valores)
+            if ttl:
+                sin_clave = tuple(valor for campo, valor in zip(CAMPOS_CON_CLAVE, valores) if campo != 'password')
+                cache.set(clave_usuario(user_id), (sin_clave, usuario.get_session_auth_hash()), ttl)
+        else:
+            # Las demás columnas, y la clave, quedan diferidas: save() solo escribe las cargadas
+            valores, hash_guardado = guardado
+            usuario = modelo.from_db(DEFAULT_DB_ALIAS, CAMPOS_USUARIO, valores)
+            usuario.get_session_auth_hash = partial(_hash_sesion, usuario, hash_guardado)
+        return usuario if self.user_can_authenticate(usuario) else None
+
+    async def aget_user(self, user_id):
+        # ModelBackend.aget_user consulta el usuario completo por su cuenta
+        return await sync_to_async(self.get_user)(user_id)
@@ -0,0 +1,30 @@
+from functools import partial
+
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.functional import SimpleLazyObject
+
+
+def _usuario(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = auth.get_user(request)
+    return request._cached_user
+
+
+async def _ausuario(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = await auth.aget_user(request)
+    return request._cached_user
+
+
+class AutenticacionMiddleware(AuthenticationMiddleware):
+    """
+    AuthenticationMiddleware en el que request.user y request.auser() comparten el usuario
+    cargado: Django memoriza cada uno por separado, así que una solicitud que usa ambos
+    (una vista async y luego las plantillas o el middleware de métricas) lo cargaba dos veces.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: _usuario(request))
+        request.auser = partial(_ausuario, request)
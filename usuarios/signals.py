@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .autenticacion import olvidar_usuario
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def invalidar_usuario(sender, instance, **kwargs):
+    # Incluye el cambio de clave (invalida las sesiones) y de last_login al iniciar sesión
+    # (el id se toma ahora: al terminar delete() queda en None)
+    user_id = instance.pk
+    transaction.on_commit(lambda: olvidar_usuario(user_id))
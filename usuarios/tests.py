@@ -1,3 +1,93 @@
-from django.test import TestCase
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import update_session_auth_hash
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from .autenticacion import UsuarioLivianoBackend, clave_usuario
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db', COTIZADOR_USUARIOS_CACHE_TTL=30)
+class UsuarioLivianoBackendTest(TestCase):
+
+    def setUp(self):
+        caches['sesiones'].clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.usuario = User.objects.create_user(
+                'ana', password='clave-larga-1', email='ana@ejemplo.cl', first_name='Ana',
+            )
+
+    def _entrar(self):
+        self.assertTrue(self.client.login(username='ana', password='clave-larga-1'))
+        return self.client.get('/mis_cotizaciones/')
+
+    def test_usuario_cacheado_sin_clave(self):
+        self._entrar()
+        valores, hash_sesion = caches['sesiones'].get(clave_usuario(self.usuario.pk))
+        self.assertNotIn(self.usuario.password, valores)
+        self.assertEqual(hash_sesion, self.usuario.get_session_auth_hash())
+        # Sesión y usuario salen de la cache
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/').status_code, 200)
+        usuario = UsuarioLivianoBackend().get_user(self.usuario.pk)
+        self.assertEqual(usuario.get_deferred_fields(), {'password', 'last_name', 'email', 'date_joined'})
+        with self.assertNumQueries(0):
+            self.assertEqual(usuario.get_session_auth_hash(), hash_sesion)
+
+    def test_sin_cache(self):
+        with override_settings(COTIZADOR_USUARIOS_CACHE_TTL=0):
+            self._entrar()
+            usuario = UsuarioLivianoBackend().get_user(self.usuario.pk)
+        self.assertIsNone(caches['sesiones'].get(clave_usuario(self.usuario.pk)))
+        self.assertEqual(usuario.get_deferred_fields(), {'last_name', 'email', 'date_joined'})
+        self.assertEqual(usuario.get_session_auth_hash(), self.usuario.get_session_auth_hash())
+        self.assertIsNone(UsuarioLivianoBackend().get_user(self.usuario.pk + 1))
+
+    def test_guardar_solo_columnas_cargadas(self):
+        self._entrar()
+        usuario = UsuarioLivianoBackend().get_user(self.usuario.pk)
+        usuario.last_name = 'Pérez'
+        usuario.save()
+        self.usuario.refresh_from_db()
+        self.assertEqual(
+            (self.usuario.email, self.usuario.first_name, self.usuario.last_name),
+            ('ana@ejemplo.cl', 'Ana', 'Pérez'),
+        )
+        self.assertTrue(self.usuario.check_password('clave-larga-1'))
+
+    def test_cambio_de_clave_invalida_las_sesiones(self):
+        self._entrar()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.usuario.set_password('otra-clave-2')
+            self.usuario.save()
+        self.assertEqual(self.client.get('/mis_cotizaciones/').status_code, 302)
+
+    def test_cambio_de_clave_conserva_la_sesion_actual(self):
+        respuesta = self._entrar()
+        request = respuesta.wsgi_request
+        usuario = UsuarioLivianoBackend().get_user(self.usuario.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            usuario.set_password('otra-clave-2')
+            usuario.save()
+            update_session_auth_hash(request, usuario)
+            request.session.save()
+        # update_session_auth_hash cambia la clave de la sesión: la cookie la recibiría en la respuesta
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = request.session.session_key
+        self.assertEqual(self.client.get('/mis_cotizaciones/').status_code, 200)
+
+    def test_usuario_desactivado(self):
+        self._entrar()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.usuario.is_active = False
+            self.usuario.save()
+        self.assertEqual(self.client.get('/mis_cotizaciones/').status_code, 302)
+        self.assertIsNone(UsuarioLivianoBackend().get_user(self.usuario.pk))
+
+    def test_sesiones_de_model_backend(self):
+        self.client.force_login(self.usuario, backend='django.contrib.auth.backends.ModelBackend')
+        self.assertEqual(self.client.get('/mis_cotizaciones/').status_code, 200)
+
+    def test_aget_user(self):
+        usuario = async_to_sync(UsuarioLivianoBackend().aget_user)(self.usuario.pk)
+        self.assertEqual((usuario.pk, usuario.username), (self.usuario.pk, 'ana'))